@@ -17,9 +17,31 @@
 """
 
 import functools #To copy documentation to function wrappers and for partial function calls.
+import heapq #To keep the delayed listeners ordered by when they must be called.
 import inspect #To check if listeners are bound methods, so we need to make a different type of reference then.
+import itertools #To number scheduled calls.
+import logging #Fallback logging for slow listeners if the logger plug-ins aren't loaded.
+import threading #To guard the listeners and the instrumentation statistics against concurrent access.
+import time #To measure the latency of listeners and to delay debounced and throttled listeners.
 import weakref #To automatically remove listeners if their class instances are removed.
 
+_instrumentation = None
+"""
+The statistics of listener calls, if instrumentation is enabled.
+
+If instrumentation is disabled, this is ``None``. Calling listeners then costs
+no more than a single check of this variable.
+"""
+
+_listeners_lock = threading.Lock()
+"""
+Lock that must be held while adding or removing listeners of any model.
+
+The listeners of a model are stored in immutable sets. Adding or removing
+listeners replaces the set with a modified copy. Calling the listeners doesn't
+require this lock, since the set being iterated over can't change.
+"""
+
 class DictionaryModel(dict):
 	"""
 	Wrapper for dictionaries that can be used with listeners.
@@ -30,7 +52,201 @@ class DictionaryModel(dict):
 	dictionary class.
 	"""
 
-def listen(listener, instance, attribute=None):
+class _Instrumentation:
+	"""
+	Keeps statistics on how often listeners are called and how long they take.
+
+	This is only created when instrumentation is enabled.
+	"""
+
+	def __init__(self, slow_threshold):
+		"""
+		Starts a new set of statistics, without any listener calls recorded.
+		:param slow_threshold: The time in seconds that a listener may take
+		before it is reported as slow.
+		"""
+		self.slow_threshold = slow_threshold
+		self.listeners = {} #For each listener name, a dictionary with the number of calls, the total time and the maximum time.
+		self.models = {} #For each model name, a dictionary with the number of notifications and listener calls.
+		self.lock = threading.Lock() #Listeners may be called from multiple threads.
+
+class _DelayedListener:
+	"""
+	Wraps around a listener to call it later with only the latest changes.
+
+	This is used to debounce and throttle listeners. The wrapper collects the
+	changes it gets notified of. Then it lets the timer thread call the wrapped
+	listener with the latest value of every attribute that changed.
+	"""
+
+	def __init__(self, listener, debounce=None, interval=None):
+		"""
+		Creates a delayed listener.
+
+		Exactly one of ``debounce`` and ``interval`` must be set.
+		:param listener: A weak reference to the listener to call.
+		:param debounce: The time in seconds without changes after which the
+		listener gets called.
+		:param interval: The minimum time in seconds between two calls to the
+		listener.
+		"""
+		self.listener = listener
+		self._debounce = debounce
+		self._interval = interval
+		self._pending = {} #The latest value of each attribute that changed since the last call, in order of changing.
+		self._deadline = None #When the listener must be called, if a call is scheduled.
+		self._last_call = None #When the listener was last called.
+		self._lock = threading.Lock() #Changes may be reported from multiple threads.
+
+	def __call__(self, attribute, value):
+		"""
+		Records a change and makes sure that the listener gets called for it.
+		:param attribute: The attribute that changed.
+		:param value: The new value of the attribute.
+		"""
+		with self._lock:
+			self._pending.pop(attribute, None) #Remove the older value, so that the attribute moves to the end of the order.
+			self._pending[attribute] = value
+			now = time.monotonic()
+			must_schedule = self._deadline is None
+			if self._debounce is not None:
+				self._deadline = now + self._debounce #Any change postpones the call.
+			elif must_schedule:
+				self._deadline = now if self._last_call is None else max(now, self._last_call + self._interval)
+			if must_schedule:
+				_timer.schedule(self._deadline, self._deliver)
+
+	def _deliver(self):
+		"""
+		Calls the listener with the pending changes.
+
+		This is called by the timer thread. If the deadline was postponed in
+		the meantime, the call is rescheduled instead.
+		"""
+		with self._lock:
+			now = time.monotonic()
+			if now < self._deadline: #Postponed by a new change.
+				_timer.schedule(self._deadline, self._deliver)
+				return
+			pending = self._pending
+			self._pending = {}
+			self._deadline = None
+			self._last_call = now
+		listener = self.listener()
+		if listener is None: #Garbage collection nicked it!
+			return
+		for attribute, value in pending.items():
+			listener(attribute, value)
+
+class _Timer:
+	"""
+	Calls functions at scheduled times from a single thread.
+
+	The thread is only started when the first function is scheduled.
+	"""
+
+	def __init__(self):
+		"""
+		Creates a timer without anything scheduled.
+		"""
+		self._scheduled = [] #Heap of tuples with the time to call, a sequence number to keep the order stable, and the function to call.
+		self._sequence = itertools.count()
+		self._condition = threading.Condition()
+		self._thread = None
+
+	def schedule(self, deadline, function):
+		"""
+		Schedules a function to be called at a certain time.
+		:param deadline: The time, according to ``time.monotonic``, at which to
+		call the function.
+		:param function: The function to call, without arguments.
+		"""
+		with self._condition:
+			heapq.heappush(self._scheduled, (deadline, next(self._sequence), function))
+			if self._thread is None:
+				self._thread = threading.Thread(target=self._run, name="Listener timer", daemon=True) #Daemon, so that pending calls don't keep the application open.
+				self._thread.start()
+			self._condition.notify()
+
+	def _run(self):
+		"""
+		Waits for scheduled functions and calls them when it's time.
+		"""
+		while True:
+			with self._condition:
+				while not self._scheduled or self._scheduled[0][0] > time.monotonic():
+					self._condition.wait(self._scheduled[0][0] - time.monotonic() if self._scheduled else None)
+				_, _, function = heapq.heappop(self._scheduled)
+			try:
+				function()
+			except Exception as e: #pylint: disable=broad-except
+				import luna.plugins #Imported here because the plug-in system itself uses this module for its models.
+				try:
+					luna.plugins.api("logger").error("A delayed listener failed: {error_message}", error_message=str(e))
+				except ImportError: #The logger plug-in type isn't loaded (yet).
+					logging.exception("A delayed listener failed: {error_message}".format(error_message=str(e))) #pylint: disable=logging-format-interpolation
+
+_timer = _Timer()
+"""
+The timer that calls all debounced and throttled listeners.
+"""
+
+def disable_instrumentation():
+	"""
+	Stops measuring the listener calls.
+
+	Any statistics gathered so far are discarded.
+	"""
+	global _instrumentation #pylint: disable=global-statement
+	_instrumentation = None
+
+def enable_instrumentation(slow_threshold=0.1):
+	"""
+	Starts measuring how often listeners are called and how long they take.
+
+	This is intended to find out which listener is responsible if changing a
+	model is slow. While instrumentation is enabled, every call to a listener is
+	timed. Listeners that take longer than the specified threshold are reported
+	in the log as warnings. The gathered statistics can be requested with
+	``instrumentation_snapshot``.
+
+	If instrumentation was already enabled, the statistics are reset.
+	:param slow_threshold: The time in seconds that a single call to a listener
+	may take before it gets reported as being slow.
+	"""
+	global _instrumentation #pylint: disable=global-statement
+	_instrumentation = _Instrumentation(slow_threshold)
+
+def instrumentation_snapshot():
+	"""
+	Gives a copy of the statistics gathered since instrumentation was enabled.
+
+	The result is a dictionary with two entries:
+
+	- ``listeners``: A dictionary with an entry for every listener that was
+	  called, by the name of the listener. Each entry is a dictionary with the
+	  number of ``calls``, the ``total_time`` and the ``max_time`` in seconds.
+	- ``models``: A dictionary with an entry for every model of which listeners
+	  were called, by the name of the model class and its identity. Each entry
+	  is a dictionary with the number of ``notifications``, the total number of
+	  ``listener_calls`` and the ``max_fan_out``, the largest number of
+	  listeners called for a single change.
+
+	The snapshot is a copy, so it doesn't change when listeners get called
+	afterwards.
+	:return: A dictionary of listener statistics, or ``None`` if
+	instrumentation is not enabled.
+	"""
+	instrumentation = _instrumentation #Copy the reference, in case instrumentation gets disabled during this call.
+	if instrumentation is None:
+		return None
+	with instrumentation.lock:
+		return {
+			"listeners": {name: dict(statistics) for name, statistics in instrumentation.listeners.items()},
+			"models": {name: dict(statistics) for name, statistics in instrumentation.models.items()}
+		}
+
+def listen(listener, instance, attribute=None, debounce=None, throttle=None):
 	"""
 	Listen for changes of the specified attribute or the specified instance.
 
@@ -53,6 +269,14 @@ def listen(listener, instance, attribute=None):
 	of the instance is defined natively (for instance with a `list` or `dict`)
 	or if the class has a `__slots__` field. For those cases, it is advisable to
 	use a transparent wrapper.
+
+	Listeners are normally called synchronously for every change. If the model
+	changes very often, the listener can be debounced or throttled instead. A
+	debounced listener is called once the model hasn't changed for the
+	specified time. A throttled listener is called at most the specified number
+	of times per second. In both cases, the listener only gets the latest value
+	of each attribute that changed in the meantime, and it gets called from a
+	timer thread that is shared by all delayed listeners.
 	:param listener: A callable object that takes two arguments for its call.
 	The first argument should be interpreted as the name of the attribute that
 	changed. The second argument should be interpreted as the new value for the
@@ -61,13 +285,28 @@ def listen(listener, instance, attribute=None):
 	:param attribute: If set, the name of the attribute of the instance to
 	listen to for changes. If this is `None`, all attribute changes of the
 	instance will cause the listener to be called.
+	:param debounce: If set, the time in seconds that the model must remain
+	unchanged before the listener is called.
+	:param throttle: If set, the maximum number of times per second that the
+	listener may be called.
+	:raises ValueError: Both ``debounce`` and ``throttle`` are set, or one of
+	them is not positive.
 	"""
+	if debounce is not None and throttle is not None:
+		raise ValueError("A listener can't be debounced and throttled at the same time.")
+	if (debounce is not None and debounce <= 0) or (throttle is not None and throttle <= 0):
+		raise ValueError("The debounce time and throttle rate must be positive.")
+
 	#Take a weak reference to the listener.
 	if inspect.ismethod(listener) and hasattr(listener, "__self__"): #Is a bound method.
 		listener = weakref.WeakMethod(listener) #Then we use the special WeakMethod that destroys the reference if the instance this method is bound to is destroyed.
 	else:
 		listener = weakref.ref(listener)
 
+	if debounce is not None:
+		listener = _DelayedListener(listener, debounce=debounce)
+	elif throttle is not None:
+		listener = _DelayedListener(listener, interval=1 / throttle)
 	_add_listener(listener, instance, attribute)
 
 def listen_value(listener, instance, attribute, value):
@@ -113,17 +352,70 @@ def _add_listener(listener, instance, attribute=None):
 	to. If not set, the listener will be registered as listening to all changes
 	to all attributes.
 	"""
-	if not hasattr(instance, "_instance_listeners") or not hasattr(instance, "_attribute_listeners"):
-		_initialise_listeners(instance) #Create lists of listeners.
+	#This function only accesses attributes that are defined by the _initialise_listeners, so we can safely allow protected member access.
+	#pylint: disable=protected-access
+	with _listeners_lock: #Make sure that no other thread adds or removes listeners in between copying the listeners and storing the copy.
+		if not hasattr(instance, "_instance_listeners") or not hasattr(instance, "_attribute_listeners"):
+			_initialise_listeners(instance) #Create sets of listeners.
 
+		if type(attribute) is str: #We are listening to a specific attribute.
+			instance._attribute_listeners[attribute] = instance._attribute_listeners.get(attribute, frozenset()) | {listener}
+		else: #We are listening to all changes.
+			object.__setattr__(instance, "_instance_listeners", instance._instance_listeners | {listener}) #Bypass the model's __setattr__, so this isn't reported as a change.
+
+def _call_listeners(instance, attribute, value):
+	"""
+	Calls the listeners of a model to notify them of a change.
+
+	This calls all instance listeners of the model, and the attribute listeners
+	of the changed attribute if an attribute was changed. Listeners that are
+	weak references are dereferenced. If their referent has been garbage
+	collected, they are not called but removed from the model. The same goes
+	for debounced or throttled listeners of which the wrapped listener has been
+	garbage collected.
+
+	The sets of listeners are never modified in place, so they can be iterated
+	over without taking a lock, even if other threads add listeners meanwhile.
+	Listeners that are added during the notification are not called for this
+	change.
+
+	If instrumentation is enabled, the calls are measured.
+	:param instance: The model that changed.
+	:param attribute: The attribute that changed, to pass on to the listeners.
+	If this is ``None``, only the instance listeners are called.
+	:param value: The new value of the attribute, to pass on to the listeners.
+	"""
 	#This function only accesses attributes that are defined by the _initialise_listeners, so we can safely allow protected member access.
 	#pylint: disable=protected-access
-	if type(attribute) is str: #We are listening to a specific attribute.
-		if attribute not in instance._attribute_listeners:
-			instance._attribute_listeners[attribute] = set()
-		instance._attribute_listeners[attribute].add(listener)
-	else: #We are listening to all changes.
-		instance._instance_listeners.add(listener)
+	instrumentation = _instrumentation #Copy the reference, in case instrumentation gets disabled during the calls.
+	num_called = 0
+	listener_sets = [(None, instance._instance_listeners)] #Instance listeners always need to be called.
+	if attribute is not None and attribute in instance._attribute_listeners:
+		listener_sets.append((attribute, instance._attribute_listeners[attribute]))
+	for listened_attribute, listeners in listener_sets:
+		to_remove = set()
+		for listener in listeners:
+			if isinstance(listener, _DelayedListener) and listener.listener() is None: #The wrapped listener got garbage collected, so don't schedule any more calls for it.
+				to_remove.add(listener)
+				continue
+			if isinstance(listener, weakref.ReferenceType):
+				listener_instance = listener() #Dereference the weakref.
+				if listener_instance is None: #Garbage collection nicked it!
+					to_remove.add(listener)
+					continue
+			else:
+				listener_instance = listener
+			if instrumentation is None:
+				listener_instance(attribute, value)
+			else:
+				start_time = time.perf_counter()
+				listener_instance(attribute, value)
+				_record_listener_call(instrumentation, listener_instance, time.perf_counter() - start_time)
+			num_called += 1
+		if to_remove:
+			_remove_listeners(instance, listened_attribute, to_remove)
+	if instrumentation is not None and num_called > 0:
+		_record_notification(instrumentation, instance, num_called)
 
 def _initialise_listeners(instance):
 	"""
@@ -133,7 +425,7 @@ def _initialise_listeners(instance):
 	#This function only defines new attributes. They should be protected because it should only be visible to this module. We can therefore safely allow protected member access.
 	#pylint: disable=protected-access
 	instance._attribute_listeners = {}
-	instance._instance_listeners = set()
+	instance._instance_listeners = frozenset()
 
 	#Make a copy of the instance's class to modify some methods of.
 	modified_class = type(instance.__class__.__name__ + "_Model", instance.__class__.__bases__, dict(instance.__class__.__dict__))
@@ -160,17 +452,7 @@ def new_function(old_method, self, *args, **kwargs):
 			:return: The result of the method that changed the model.
 			"""
 			result = old_method(self, *args, **kwargs)
-			to_remove = set()
-			for listener in self._instance_listeners:
-				if isinstance(listener, weakref.ReferenceType):
-					listener_instance = listener()
-					if listener_instance is None: #Garbage collection nicked it!
-						to_remove.add(listener)
-						continue
-				else:
-					listener_instance = listener
-				listener_instance(None, None)
-			self._instance_listeners -= to_remove
+			_call_listeners(self, None, None)
 			return result
 		setattr(modified_class, function_name, functools.partial(new_function, old_method)) #Replace the method with a hooked method.
 
@@ -189,29 +471,7 @@ def new_delattr(self, name):
 			:param name: The name of the attribute to delete.
 			"""
 			old_delattr(name)
-			to_remove = set()
-			for listener in self._instance_listeners: #Instance listeners always need to be called.
-				if isinstance(listener, weakref.ReferenceType):
-					listener_instance = listener() #Dereference the weakref.
-					if listener_instance is None: #Garbage collection nicked it!
-						to_remove.add(listener)
-						continue
-				else:
-					listener_instance = listener
-				listener_instance(name, None) #Since the attribute has no value any more, we won't pass any value on to the listener.
-			self._instance_listeners -= to_remove
-			if name in self._attribute_listeners:
-				to_remove = set()
-				for listener in self._attribute_listeners[name]:
-					if isinstance(listener, weakref.ReferenceType):
-						listener_instance = listener() #Dereference the weakref.
-						if listener_instance is None: #Garbage collection nicked it!
-							to_remove.add(listener)
-							continue
-					else:
-						listener_instance = listener
-					listener_instance(name, None) #Since the attribute has no value any more, we won't pass any value on to the listener.
-				self._attribute_listeners[name] -= to_remove
+			_call_listeners(self, name, None) #Since the attribute has no value any more, we won't pass any value on to the listener.
 		modified_class.__delattr__ = new_delattr
 
 	if hasattr(instance, "__delitem__"):
@@ -228,29 +488,7 @@ def new_delitem(self, key):
 			:param key: The name of the item to delete.
 			"""
 			old_delitem(key)
-			to_remove = set()
-			for listener in self._instance_listeners: #Instance listeners always need to be called.
-				if isinstance(listener, weakref.ReferenceType):
-					listener_instance = listener() #Dereference the weakref.
-					if listener_instance is None: #Garbage collection nicked it!
-						to_remove.add(listener)
-						continue
-				else:
-					listener_instance = listener
-				listener_instance(key, None) #Since the item has no value any more, we won't pass any value on to the listener.
-			self._instance_listeners -= to_remove
-			if key in self._attribute_listeners:
-				to_remove = set()
-				for listener in self._attribute_listeners[key]:
-					if isinstance(listener, weakref.ReferenceType):
-						listener_instance = listener() #Dereference the weakref.
-						if listener_instance is None: #Garbage collection nicked it!
-							to_remove.add(listener)
-							continue
-					else:
-						listener_instance = listener
-					listener_instance(key, None) #Since the item has no value any more, we won't pass any value on to the listener.
-				self._attribute_listeners[key] -= to_remove
+			_call_listeners(self, key, None) #Since the item has no value any more, we won't pass any value on to the listener.
 		modified_class.__delitem__ = new_delitem
 
 	if hasattr(instance, "__setitem__"):
@@ -269,29 +507,7 @@ def new_setitem(self, key, value):
 			:param value: The new value of the item.
 			"""
 			old_setitem(key, value)
-			to_remove = set()
-			for listener in self._instance_listeners: #Instance listeners always need to be called.
-				if isinstance(listener, weakref.ReferenceType):
-					listener_instance = listener() #Dereference the weakref.
-					if listener_instance is None: #Garbage collection nicked it!
-						to_remove.add(listener)
-						continue
-				else:
-					listener_instance = listener
-				listener_instance(key, value)
-			self._instance_listeners -= to_remove
-			if key in self._attribute_listeners:
-				to_remove = set()
-				for listener in self._attribute_listeners[key]:
-					if isinstance(listener, weakref.ReferenceType):
-						listener_instance = listener() #Dereference the weakref.
-						if listener_instance is None: #Garbage collection nicked it!
-							to_remove.add(listener)
-							continue
-					else:
-						listener_instance = listener
-					listener_instance(key, value)
-				self._attribute_listeners[key] -= to_remove
+			_call_listeners(self, key, value)
 		modified_class.__setitem__ = new_setitem
 
 	if hasattr(instance, "append"):
@@ -307,17 +523,7 @@ def new_append(self, x):
 			:param x: The new item to add to the list.
 			"""
 			old_append(x)
-			to_remove = set()
-			for listener in self._instance_listeners:
-				if isinstance(listener, weakref.ReferenceType):
-					listener_instance = listener() #Dereference the weakref.
-					if listener_instance is None: #Garbage collection nicked it!
-						to_remove.add(listener)
-						continue
-				else:
-					listener_instance = listener
-				listener_instance(None, x)
-			self._instance_listeners -= to_remove
+			_call_listeners(self, None, x)
 		modified_class.append = new_append
 
 	#Replace __setattr__ with a special one that alerts the attribute listeners.
@@ -339,33 +545,88 @@ def new_setattr(self, name, value):
 		if hasattr(self, name): #Only detect that we haven't actually changed the value if the value existed before setting.
 			if old_value == getattr(self, name):
 				return #Set to the same value it already had. No change!
-		to_remove = set()
-		for listener in self._instance_listeners: #Instance listeners always need to be called.
-			if isinstance(listener, weakref.ReferenceType):
-				listener_instance = listener() #Dereference the weakref.
-				if listener_instance is None: #Garbage collection nicked it!
-					to_remove.add(listener)
-					continue
-			else:
-				listener_instance = listener
-			listener_instance(name, value)
-		self._instance_listeners -= to_remove
-		if name in self._attribute_listeners:
-			to_remove = set()
-			for listener in self._attribute_listeners[name]:
-				if isinstance(listener, weakref.ReferenceType):
-					listener_instance = listener() #Dereference the weakref.
-					if listener_instance is None: #Garbage collection nicked it!
-						to_remove.add(listener)
-						continue
-				else:
-					listener_instance = listener
-				listener_instance(name, value)
-				self._attribute_listeners[name] -= to_remove
+		_call_listeners(self, name, value)
 	modified_class.__setattr__ = new_setattr
 
 	instance.__class__ = modified_class #Swap out the class of the object, and thereby change its methods.
 
+def _listener_name(listener):
+	"""
+	Gives a human-readable name for a listener, for use in statistics.
+
+	The listeners that are wrapped by ``listen_value`` or that are delayed are
+	named after the listener they wrap.
+	:param listener: The listener to name.
+	:return: A name for the listener.
+	"""
+	while isinstance(listener, (functools.partial, _DelayedListener)): #Unwrap any partial functions and delayed listeners.
+		if isinstance(listener, _DelayedListener):
+			listener = listener.listener() #The wrapped listener is a weak reference.
+		elif listener.func is _value_checking_listener and listener.args:
+			listener = listener.args[0]()
+		else:
+			listener = listener.func
+	if hasattr(listener, "__qualname__"):
+		return getattr(listener, "__module__", "") + "." + listener.__qualname__
+	return repr(listener)
+
+def _record_listener_call(instrumentation, listener, duration):
+	"""
+	Adds a call to a listener to the instrumentation statistics.
+
+	If the call took longer than the threshold, a warning is logged.
+	:param instrumentation: The statistics to add the call to.
+	:param listener: The listener that was called.
+	:param duration: How long the call took, in seconds.
+	"""
+	name = _listener_name(listener)
+	with instrumentation.lock:
+		statistics = instrumentation.listeners.setdefault(name, {"calls": 0, "total_time": 0.0, "max_time": 0.0})
+		statistics["calls"] += 1
+		statistics["total_time"] += duration
+		statistics["max_time"] = max(statistics["max_time"], duration)
+	if duration > instrumentation.slow_threshold:
+		import luna.plugins #Imported here because the plug-in system itself uses this module for its models.
+		message = "Listener {listener} took {duration:.3f} seconds, exceeding the threshold of {threshold:.3f} seconds."
+		try:
+			luna.plugins.api("logger").warning(message, listener=name, duration=duration, threshold=instrumentation.slow_threshold)
+		except ImportError: #The logger plug-in type isn't loaded (yet).
+			logging.warning(message.format(listener=name, duration=duration, threshold=instrumentation.slow_threshold)) #pylint: disable=logging-format-interpolation
+
+def _record_notification(instrumentation, instance, num_called):
+	"""
+	Adds a notification of a model's listeners to the instrumentation
+	statistics.
+	:param instrumentation: The statistics to add the notification to.
+	:param instance: The model whose listeners were notified.
+	:param num_called: The number of listeners that were called.
+	"""
+	name = "{class_name}@{identity:x}".format(class_name=type(instance).__name__, identity=id(instance))
+	with instrumentation.lock:
+		statistics = instrumentation.models.setdefault(name, {"notifications": 0, "listener_calls": 0, "max_fan_out": 0})
+		statistics["notifications"] += 1
+		statistics["listener_calls"] += num_called
+		statistics["max_fan_out"] = max(statistics["max_fan_out"], num_called)
+
+def _remove_listeners(instance, attribute, listeners):
+	"""
+	Removes listeners from a model.
+
+	The set of listeners is replaced by a copy without the removed listeners, so
+	that any notifications that are iterating over the old set can continue.
+	:param instance: The model to remove the listeners from.
+	:param attribute: The attribute that the listeners were listening to, or
+	``None`` if they were listening to all changes.
+	:param listeners: The listeners to remove.
+	"""
+	#This function only accesses attributes that are defined by the _initialise_listeners, so we can safely allow protected member access.
+	#pylint: disable=protected-access
+	with _listeners_lock:
+		if attribute is None:
+			object.__setattr__(instance, "_instance_listeners", instance._instance_listeners - listeners) #Bypass the model's __setattr__, so this isn't reported as a change.
+		else:
+			instance._attribute_listeners[attribute] -= listeners
+
 def _value_checking_listener(listener, required_value, _, value):
 	"""
 	A wrapper for a listener that calls the listener only when a specific value
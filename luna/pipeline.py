@@ -0,0 +1,655 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+#This software is distributed under the Creative Commons license (CC0) version 1.0. A copy of this license should have been distributed with this software.
+#The license can also be read online: <https://creativecommons.org/publicdomain/zero/1.0/>. If this online license differs from the license provided with this software, the license provided with this software should be applied.
+
+"""
+An engine that converts data in multiple stages running concurrently.
+
+A pipeline takes items from a source, such as chunks of a file, and passes them
+through a sequence of stages. Every stage transforms the items it gets and
+passes its results on to the next stage, for instance to split the chunks into
+records, to deserialise those records, to transform them, to serialise them
+again and finally to write them to a file.
+
+Every stage runs in a thread of its own. Between every two stages there is a
+queue of limited size. If a stage is slower than the stage before it, the queue
+fills up and the stage before it has to wait. This way, the items that are in
+flight at any one time are limited, so that large inputs stream through in
+constant memory rather than being read entirely into memory. A stage may use
+multiple workers, either threads or processes, to transform multiple items at
+the same time. The order of the items is always retained.
+
+If any stage raises an exception, the pipeline is cancelled and the exception
+is raised again from ``Pipeline.run``. The pipeline can also be cancelled from
+another thread with ``Pipeline.cancel``.
+"""
+
+import collections #To keep track of the items that are being transformed by the workers, in order.
+import concurrent.futures #To transform items with multiple workers.
+import functools #To make data plug-in calls that can be sent to other processes.
+import queue #To pass items between the stages.
+import threading #To run the stages concurrently.
+import time #To measure how long the stages take.
+import urllib.parse #To determine whether a URI points to a local file.
+
+import luna.listen #To give worker processes the data plug-ins.
+import luna.plugins #To use the data and storage APIs.
+import luna.stream #To read and write local files in chunks, and to (de)compress them.
+
+DEFAULT_QUEUE_SIZE = 8
+"""
+The number of items that may wait between two stages before the stage that
+produces them has to wait.
+"""
+
+_END = object()
+"""
+Marker that is passed through the queues to indicate that there are no more
+items.
+"""
+
+_POLL_INTERVAL = 0.05
+"""
+How long to wait for a queue, in seconds, before checking whether the pipeline
+got cancelled.
+"""
+
+class PipelineCancelledError(Exception):
+	"""
+	Marker exception to indicate that a pipeline was cancelled before it
+	completed.
+	"""
+
+class Pipeline:
+	"""
+	A sequence of stages that items from a source flow through.
+
+	The results of the last stage are discarded, so the last stage is normally
+	the one that writes the results somewhere, such as the stage created by
+	``write``.
+	"""
+
+	def __init__(self, source, stages, queue_size=DEFAULT_QUEUE_SIZE):
+		"""
+		Creates a new pipeline.
+		:param source: An iterable that produces the items to transform, such as
+		the chunks given by ``read``.
+		:param stages: A sequence of ``Stage`` instances that transform the
+		items, in order.
+		:param queue_size: The maximum number of items that may wait between
+		two stages.
+		"""
+		self._source = source
+		self._stages = list(stages)
+		self._queue_size = queue_size
+		self._cancelled = threading.Event()
+		self._error = None #The first exception raised by any of the stages.
+		self._error_lock = threading.Lock()
+		self._metrics = [_Metrics("source")] + [_Metrics(stage.name) for stage in self._stages]
+
+	def cancel(self):
+		"""
+		Cancels the pipeline.
+
+		The stages stop as soon as they've finished the items they are working
+		on, and ``run`` raises a ``PipelineCancelledError``.
+		"""
+		self._cancelled.set()
+
+	def metrics(self):
+		"""
+		Gives statistics on how much every stage has processed so far.
+
+		The source is included as the first entry. The time is the time spent
+		transforming the items, summed over all workers of the stage, so it
+		excludes the time spent waiting for other stages.
+		:return: A list with a dictionary for the source and then for every
+		stage, in order. Every dictionary contains the ``name`` of the stage,
+		the number of ``items`` it produced, the number of ``bytes`` in those
+		items if they were bytes-like objects or strings, the ``seconds`` it
+		spent and its ``throughput`` in bytes per second.
+		"""
+		result = []
+		for metrics in self._metrics:
+			result.append({
+				"name": metrics.name,
+				"items": metrics.items,
+				"bytes": metrics.bytes,
+				"seconds": metrics.seconds,
+				"throughput": metrics.bytes / metrics.seconds if metrics.seconds > 0 else 0.0
+			})
+		return result
+
+	def run(self):
+		"""
+		Runs all items of the source through the pipeline.
+
+		This blocks until all items have passed through all stages, or until
+		the pipeline failed or got cancelled.
+		:raises PipelineCancelledError: The pipeline was cancelled before it
+		completed.
+		:raises Exception: One of the stages failed. The first exception raised
+		by a stage is raised again here.
+		"""
+		queues = [queue.Queue(maxsize=self._queue_size) for _ in self._stages]
+		threads = [threading.Thread(target=self._run_source, args=(queues[0] if queues else None,), name="Pipeline source", daemon=True)]
+		for index, stage in enumerate(self._stages):
+			outbox = queues[index + 1] if index + 1 < len(queues) else None
+			threads.append(threading.Thread(target=self._run_stage, args=(stage, self._metrics[index + 1], queues[index], outbox), name="Pipeline stage " + stage.name, daemon=True))
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		if self._error is not None:
+			raise self._error
+		if self._cancelled.is_set():
+			raise PipelineCancelledError("The pipeline was cancelled.")
+
+	def _deliver(self, stage, metrics, result, seconds, outbox):
+		"""
+		Passes the result of transforming an item on to the next stage.
+		:param stage: The stage that produced the result.
+		:param metrics: The metrics of that stage.
+		:param result: The result of the transformation. If the stage expands
+		items, this is an iterable of items, which may also be a generator that
+		transforms lazily.
+		:param seconds: How long the transformation took.
+		:param outbox: The queue to the next stage, or ``None`` if this is the
+		last stage.
+		"""
+		metrics.seconds += seconds
+		if not stage.expand:
+			metrics.add(result)
+			if outbox is not None:
+				self._put(outbox, result)
+			return
+		self._deliver_each(metrics, result, outbox)
+
+	def _deliver_each(self, metrics, items, outbox):
+		"""
+		Passes a sequence of items on to the next stage.
+		:param metrics: The metrics of the stage that produced the items.
+		:param items: An iterable of items, which may also be a generator that
+		transforms lazily. The time spent iterating is counted for the stage.
+		:param outbox: The queue to the next stage, or ``None`` if this is the
+		last stage.
+		"""
+		iterator = iter(items)
+		while True:
+			start_time = time.perf_counter() #Results may be generators that do their work while iterating.
+			try:
+				item = next(iterator)
+			except StopIteration:
+				return
+			finally:
+				metrics.seconds += time.perf_counter() - start_time
+			metrics.add(item)
+			if outbox is not None:
+				self._put(outbox, item)
+
+	def _fail(self, error):
+		"""
+		Cancels the pipeline because a stage failed.
+
+		Only the first error is stored, since any later errors are likely
+		caused by the first one.
+		:param error: The exception that the stage raised.
+		"""
+		if not isinstance(error, PipelineCancelledError):
+			with self._error_lock:
+				if self._error is None:
+					self._error = error
+		self._cancelled.set()
+
+	def _get(self, inbox):
+		"""
+		Takes the next item from a queue, waiting for it if necessary.
+		:param inbox: The queue to take the item from.
+		:return: The next item.
+		:raises PipelineCancelledError: The pipeline got cancelled while
+		waiting.
+		"""
+		while not self._cancelled.is_set():
+			try:
+				return inbox.get(timeout=_POLL_INTERVAL)
+			except queue.Empty:
+				continue
+		raise PipelineCancelledError("The pipeline was cancelled.")
+
+	def _put(self, outbox, item):
+		"""
+		Puts an item in a queue, waiting for room if the queue is full.
+		:param outbox: The queue to put the item in.
+		:param item: The item to put in the queue.
+		:raises PipelineCancelledError: The pipeline got cancelled while
+		waiting.
+		"""
+		while not self._cancelled.is_set():
+			try:
+				outbox.put(item, timeout=_POLL_INTERVAL)
+				return
+			except queue.Full:
+				continue
+		raise PipelineCancelledError("The pipeline was cancelled.")
+
+	def _run_source(self, outbox):
+		"""
+		Takes all items from the source and puts them in the queue to the first
+		stage.
+		:param outbox: The queue to the first stage, or ``None`` if there are
+		no stages.
+		"""
+		metrics = self._metrics[0]
+		iterator = None
+		try:
+			iterator = iter(self._source)
+			while True:
+				start_time = time.perf_counter()
+				try:
+					item = next(iterator)
+				except StopIteration:
+					break
+				finally:
+					metrics.seconds += time.perf_counter() - start_time
+				metrics.add(item)
+				if outbox is not None:
+					self._put(outbox, item)
+			if outbox is not None:
+				self._put(outbox, _END)
+		except BaseException as e: #pylint: disable=broad-except
+			self._fail(e)
+		finally:
+			if hasattr(iterator, "close"): #Generators, such as the ones given by ``read``, may hold resources until they are closed.
+				try:
+					iterator.close()
+				except BaseException as e: #pylint: disable=broad-except
+					self._fail(e)
+
+	def _run_stage(self, stage, metrics, inbox, outbox):
+		"""
+		Transforms all items that arrive in a stage's queue.
+		:param stage: The stage to run.
+		:param metrics: The metrics of the stage, to update while running.
+		:param inbox: The queue with the items for this stage.
+		:param outbox: The queue to the next stage, or ``None`` if this is the
+		last stage.
+		"""
+		executor = None
+		if stage.processes:
+			executor = concurrent.futures.ProcessPoolExecutor(max_workers=stage.workers, initializer=stage.initializer, initargs=stage.initargs)
+		elif stage.workers > 1:
+			executor = concurrent.futures.ThreadPoolExecutor(max_workers=stage.workers, thread_name_prefix="Pipeline worker " + stage.name)
+		in_flight = collections.deque() #Futures of items being transformed, in the order of the items.
+		try:
+			while True:
+				item = self._get(inbox)
+				if item is _END:
+					break
+				if executor is None:
+					self._deliver(stage, metrics, *_timed(stage.function, item), outbox)
+					continue
+				in_flight.append(executor.submit(_timed, stage.function, item))
+				while in_flight and (len(in_flight) >= stage.workers * 2 or in_flight[0].done()): #Limit the items in flight, but deliver finished items early.
+					self._deliver(stage, metrics, *in_flight.popleft().result(), outbox)
+			while in_flight:
+				self._deliver(stage, metrics, *in_flight.popleft().result(), outbox)
+			if stage.finish is not None:
+				result, seconds = _timed(stage.finish)
+				metrics.seconds += seconds
+				if result is not None:
+					self._deliver_each(metrics, result, outbox)
+			if outbox is not None:
+				self._put(outbox, _END)
+		except BaseException as e: #pylint: disable=broad-except
+			self._fail(e)
+		finally:
+			if executor is not None:
+				executor.shutdown(wait=True, cancel_futures=True)
+			if stage.close is not None: #Also when the pipeline failed or got cancelled, to release the resources of the stage.
+				try:
+					stage.close()
+				except BaseException as e: #pylint: disable=broad-except
+					self._fail(e)
+
+class Stage:
+	"""
+	A step of a pipeline, transforming every item that passes through it.
+	"""
+
+	def __init__(self, function, workers=1, processes=False, expand=False, finish=None, close=None, name=None, initializer=None, initargs=()):
+		"""
+		Creates a new stage.
+		:param function: The function that transforms one item. It takes the
+		item as its only parameter and returns the transformed item.
+		:param workers: How many items may be transformed at the same time. If
+		this is more than one, the function must be thread-safe, or the stage
+		must use processes.
+		:param processes: Whether to transform the items in separate processes
+		rather than threads. This allows CPU-heavy functions to use multiple
+		cores, but the function, the items and the results must be picklable.
+		:param expand: Whether the function returns an iterable of any number
+		of items rather than a single item. This allows stages to split items
+		into multiple items, or to drop items.
+		:param finish: A function without parameters that is called after the
+		last item has been transformed. It may return an iterable of items to
+		pass on to the next stage, such as data that a stage held back.
+		:param close: A function without parameters that is called when the
+		stage stops, whether the pipeline completed, failed or got cancelled.
+		This can release the resources that the stage holds, such as files.
+		:param name: A name for the stage in the metrics. If not provided, the
+		name of the function is used.
+		:param initializer: A function that is called in every worker process
+		when it starts, if the stage uses processes. Depending on how the
+		operating system starts processes, the workers may not inherit the
+		state of this process, so this can give them the state they need.
+		:param initargs: The parameters to call the initializer with.
+		:raises ValueError: The number of workers is not positive, or a stage
+		with state is combined with multiple workers.
+		"""
+		if workers < 1:
+			raise ValueError("A stage needs at least one worker, not {workers}.".format(workers=workers))
+		if finish is not None and (workers > 1 or processes):
+			raise ValueError("A stage with a finish function has state, so it can't use multiple workers or processes.")
+		self.function = function
+		self.workers = workers
+		self.processes = processes
+		self.expand = expand
+		self.finish = finish
+		self.close = close
+		self.name = name if name is not None else getattr(function, "__name__", type(function).__name__)
+		self.initializer = initializer
+		self.initargs = initargs
+
+class _Metrics:
+	"""
+	Statistics on how much a stage has processed.
+	"""
+
+	def __init__(self, name):
+		"""
+		Creates empty statistics for a stage.
+		:param name: The name of the stage.
+		"""
+		self.name = name
+		self.items = 0
+		self.bytes = 0
+		self.seconds = 0.0
+
+	def add(self, item):
+		"""
+		Counts an item that the stage produced.
+		:param item: The item.
+		"""
+		self.items += 1
+		if isinstance(item, str):
+			self.bytes += len(item)
+			return
+		try:
+			with memoryview(item) as view:
+				self.bytes += view.nbytes
+		except TypeError: #Not a bytes-like object, so it doesn't count towards the bytes.
+			pass
+
+def compress(codec="gzip", level=None):
+	"""
+	Creates a stage that compresses chunks of bytes.
+
+	The compressed data is not split along the same boundaries as the input.
+	Since the stage runs on a thread of its own, compressing overlaps with the
+	work of the other stages.
+	:param codec: The compression format, one of ``luna.stream.CODECS``.
+	:param level: The compression level. If not provided, the default level of
+	the format is used.
+	:return: A ``Stage`` that compresses chunks.
+	:raises ValueError: The compression format is unknown.
+	"""
+	compressor = luna.stream.compressor(codec, level)
+
+	def compress_chunk(chunk):
+		"""
+		Compresses a chunk.
+		:param chunk: A bytes-like object.
+		:return: A sequence of the compressed data, if the compressor didn't
+		hold it all back.
+		"""
+		compressed = compressor.compress(chunk)
+		return (compressed,) if compressed else ()
+
+	def finish():
+		"""
+		Ends the compressed data.
+		:return: A sequence with the last compressed data.
+		"""
+		return (compressor.flush(),)
+	return Stage(compress_chunk, expand=True, finish=finish, name="compress")
+
+def decompress(codec=None):
+	"""
+	Creates a stage that decompresses chunks of bytes.
+
+	Every chunk is decompressed in pieces, while the next stage consumes them,
+	so that data that was compressed very well doesn't need to fit in memory.
+	:param codec: The compression format, one of ``luna.stream.CODECS``. If not
+	provided, it is detected from the magic bytes at the start of the data.
+	:return: A ``Stage`` that decompresses chunks.
+	:raises ValueError: The compression format is unknown.
+	"""
+	decompressor = luna.stream.Decompressor(codec)
+	return Stage(decompressor.feed, expand=True, finish=decompressor.finish, name="decompress")
+
+def deserialise(data_type=None, workers=1, processes=False):
+	"""
+	Creates a stage that deserialises every item with the data API.
+	:param data_type: The data type to deserialise the items as. If not
+	provided, the type of every item is detected.
+	:param workers: How many items to deserialise at the same time.
+	:param processes: Whether to deserialise in separate processes. The worker
+	processes get a copy of the data plug-ins of this process when they start.
+	:return: A ``Stage`` that deserialises items.
+	"""
+	return Stage(functools.partial(luna.plugins.api("data").deserialise, data_type=data_type), workers=workers, processes=processes, name="deserialise", **_data_plugins_initializer(processes))
+
+def join(delimiter=b"\n"):
+	"""
+	Creates a stage that puts a delimiter between items, the opposite of
+	``split``.
+
+	The items are not copied. The delimiter is passed on as a separate item.
+	:param delimiter: The ``bytes`` to put between every two items.
+	:return: A ``Stage`` that puts delimiters between items.
+	"""
+	first = True
+
+	def delimit(item):
+		"""
+		Puts a delimiter before an item, unless it's the first item.
+		:param item: The item to pass on.
+		:return: A sequence of the delimiter and the item.
+		"""
+		nonlocal first
+		if first:
+			first = False
+			return (item,)
+		return (delimiter, item)
+	return Stage(delimit, expand=True, name="join")
+
+def read(uri, chunk_size=luna.stream.DEFAULT_BUFFER_SIZE):
+	"""
+	Reads a resource in chunks, to use as the source of a pipeline.
+
+	Local files are read one chunk at a time. Other resources can only be read
+	as a whole by the storage API, so those are read into memory first and then
+	given in chunks. The pipeline closes the file when it stops, also if it
+	failed or got cancelled.
+	:param uri: The URI or path of the resource to read.
+	:param chunk_size: The maximum number of bytes in every chunk.
+	:return: A sequence of ``bytes`` chunks that together form the resource.
+	"""
+	if _is_local(uri):
+		with luna.stream.BytesStreamReader(uri, buffer_size=chunk_size) as reader:
+			yield from reader.iter_chunks()
+		return
+	with memoryview(luna.plugins.api("storage").read(uri)) as view:
+		for start in range(0, len(view), chunk_size):
+			yield bytes(view[start:start + chunk_size])
+
+def serialise(data_type, workers=1, processes=False):
+	"""
+	Creates a stage that serialises every item with the data API.
+	:param data_type: The data type to serialise the items as.
+	:param workers: How many items to serialise at the same time.
+	:param processes: Whether to serialise in separate processes. The worker
+	processes get a copy of the data plug-ins of this process when they start.
+	:return: A ``Stage`` that serialises items.
+	"""
+	return Stage(functools.partial(luna.plugins.api("data").serialise, data_type=data_type), workers=workers, processes=processes, name="serialise", **_data_plugins_initializer(processes))
+
+def split(delimiter=b"\n", max_record_size=None):
+	"""
+	Creates a stage that splits chunks of bytes into records.
+
+	The records may span multiple chunks. The delimiters are not included in
+	the records. If the data ends with a delimiter, no empty record is produced
+	for the end.
+
+	The start of a record that continues in later chunks is collected in a
+	buffer. Only the new data is searched for delimiters, so a record that
+	spans many chunks costs as much as a record that arrived in one chunk.
+	:param delimiter: The ``bytes`` that separate the records.
+	:param max_record_size: The maximum number of bytes in a record, to limit
+	the memory that an unterminated record can take. If not provided, records
+	may be of any size.
+	:return: A ``Stage`` that splits chunks into records.
+	:raises ValueError: While running the pipeline, a record turned out to be
+	longer than the maximum record size.
+	"""
+	pending = bytearray() #The start of a record that continues in the next chunk.
+
+	def split_chunk(chunk):
+		"""
+		Splits a chunk into records.
+		:param chunk: A bytes-like object.
+		:return: A list of the records that end in this chunk.
+		"""
+		search_start = max(len(pending) - len(delimiter) + 1, 0) #The pending data has no delimiter, but one may straddle the edge of the chunk.
+		pending.extend(chunk)
+		ends = [] #Where every record ends and the next one starts.
+		position = pending.find(delimiter, search_start)
+		while position >= 0:
+			ends.append(position)
+			position = pending.find(delimiter, position + len(delimiter))
+		records = []
+		record_start = 0
+		with memoryview(pending) as view:
+			for end in ends:
+				records.append(bytes(view[record_start:end]))
+				record_start = end + len(delimiter)
+		del pending[:record_start]
+		if max_record_size is not None and len(pending) > max_record_size:
+			raise ValueError("A record is longer than the maximum of {max_record_size} bytes.".format(max_record_size=max_record_size))
+		return records
+
+	def finish():
+		"""
+		Gives the last record, if it wasn't terminated by a delimiter.
+		:return: A sequence of the last record, if any.
+		"""
+		return (bytes(pending),) if pending else ()
+	return Stage(split_chunk, expand=True, finish=finish, name="split")
+
+def write(uri):
+	"""
+	Creates a stage that writes all items to a resource, to use as the last
+	stage of a pipeline.
+
+	Local files are written in large blocks as the items arrive. The file is
+	only opened when the pipeline runs, so building a pipeline that never runs
+	leaves the file alone. Other resources can only be written as a whole by
+	the storage API, so for those all items are collected in memory first. A
+	local file is closed when the pipeline stops, also if it failed or got
+	cancelled.
+	:param uri: The URI or path of the resource to write to.
+	:return: A ``Stage`` that writes bytes-like items.
+	"""
+	if _is_local(uri):
+		writer = None
+
+		def open_writer():
+			"""
+			Opens the file, if it isn't open yet.
+			"""
+			nonlocal writer
+			if writer is None:
+				writer = luna.stream.BytesStreamWriter(uri)
+
+		def write_item(item):
+			"""
+			Writes an item to the file.
+			:param item: A bytes-like object to write.
+			"""
+			open_writer()
+			writer.write(item)
+
+		def close():
+			"""
+			Closes the file, if it got opened.
+			"""
+			if writer is not None:
+				writer.close()
+		return Stage(write_item, finish=open_writer, close=close, name="write") #Also opening the file when finishing, so that an empty file is made if there were no items.
+	collected = bytearray()
+
+	def finish():
+		"""
+		Writes all collected items to the resource.
+		"""
+		luna.plugins.api("storage").write(uri, bytes(collected))
+	return Stage(collected.extend, finish=finish, name="write")
+
+def _data_plugins_initializer(processes):
+	"""
+	Gives the parameters of a stage that install the data plug-ins of this
+	process in its worker processes.
+	:param processes: Whether the stage uses processes.
+	:return: A dictionary with the ``initializer`` and ``initargs`` of the
+	stage, or an empty dictionary if the stage doesn't use processes.
+	"""
+	if not processes:
+		return {}
+	data_plugins = {identity: {"data": metadata["data"]} for identity, metadata in luna.plugins.plugins_by_type.get("data", {}).items()}
+	return {"initializer": _install_data_plugins, "initargs": (data_plugins,)}
+
+def _install_data_plugins(data_plugins):
+	"""
+	Gives a worker process the data plug-ins of the process that started it.
+
+	This is a module-level function so that it can be sent to other processes.
+	:param data_plugins: For every data type, the metadata of its plug-in.
+	"""
+	luna.plugins.plugins_by_type["data"] = luna.listen.DictionaryModel(data_plugins)
+
+def _is_local(uri):
+	"""
+	Determines whether a URI or path points to a local file.
+	:param uri: The URI or path.
+	:return: ``True`` if it's a local file, or ``False`` if it must be
+	accessed through the storage API.
+	"""
+	scheme = urllib.parse.urlparse(uri).scheme
+	return scheme in ("", "file") or len(scheme) == 1 #Single-letter schemes are Windows drive letters.
+
+def _timed(function, *arguments):
+	"""
+	Calls a function and measures how long it takes.
+
+	This is a module-level function so that it can be sent to other processes.
+	:param function: The function to call.
+	:param arguments: The parameters to call the function with.
+	:return: A tuple of the result of the function and the number of seconds
+	it took.
+	"""
+	start_time = time.perf_counter()
+	result = function(*arguments)
+	return result, time.perf_counter() - start_time
\ No newline at end of file
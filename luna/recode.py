@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+#This software is distributed under the Creative Commons license (CC0) version 1.0. A copy of this license should have been distributed with this software.
+#The license can also be read online: <https://creativecommons.org/publicdomain/zero/1.0/>. If this online license differs from the license provided with this software, the license provided with this software should be applied.
+
+"""
+Converts text from one character encoding to another, in parallel.
+
+The input is split into large chunks. The chunks are only split at positions
+where no character can be cut in half, such as the start of a code point in
+UTF-8, or any position for character encodings that use a single byte for every
+character. These chunks can then be decoded and encoded again independently,
+by multiple processes at the same time. The results are written in the same
+order as the input.
+
+The state of byte order marks is carried over from the start of the input to
+the other chunks, so that the byte order that the start of the input indicates
+is used for all of the input, and only one byte order mark is written in the
+output.
+
+If no safe split positions are known for either of the character encodings,
+such as for multi-byte encodings with shift states, the text is converted from
+start to end with incremental codecs instead. This is slower, but still streams
+through constant memory.
+"""
+
+import codecs #To find and run the character encodings.
+import functools #To cache which encodings use a single byte per character.
+import os #To determine how many processes to use.
+import sys #To find the native byte order, which the state of UTF-16 decoders is relative to.
+
+import luna.pipeline #To stream the input through the conversion in stages.
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+"""
+The number of bytes in the chunks that are converted at once.
+
+Larger chunks cause less overhead from sending chunks to other processes, but
+cause more memory usage and a longer delay before the first output.
+"""
+
+_HEAD_SIZE = 8
+"""
+The number of bytes at the start of the input that are decoded to find out the
+state of the decoder after any byte order mark.
+"""
+
+_UNIT_SIZES = {
+	"utf-16": 2,
+	"utf-16-be": 2,
+	"utf-16-le": 2,
+	"utf-32": 4,
+	"utf-32-be": 4,
+	"utf-32-le": 4
+}
+"""
+For the encodings that use code units of more than one byte, the size of each
+code unit.
+"""
+
+_UTF8_NAMES = {"utf-8", "utf-8-sig"}
+"""
+The names of encodings that are UTF-8, where a chunk may start at any byte that
+is not a continuation byte.
+"""
+
+class _IncrementalRecoder:
+	"""
+	Converts a stream of text from start to end, for encodings that can't be
+	split into independent chunks.
+	"""
+
+	def __init__(self, source_encoding, target_encoding, errors):
+		"""
+		Creates the incremental codecs for the conversion.
+		:param source_encoding: The name of the encoding of the input.
+		:param target_encoding: The name of the encoding to convert to.
+		:param errors: How to handle errors in decoding and encoding.
+		"""
+		self._decoder = codecs.getincrementaldecoder(source_encoding)(errors)
+		self._encoder = codecs.getincrementalencoder(target_encoding)(errors)
+
+	def __call__(self, chunk):
+		"""
+		Converts the next chunk of the input.
+
+		Any incomplete character at the end of the chunk is kept until the next
+		chunk arrives.
+		:param chunk: A chunk of encoded ``bytes``.
+		:return: The converted ``bytes``.
+		"""
+		return self._encoder.encode(self._decoder.decode(chunk))
+
+	def finish(self):
+		"""
+		Converts what remains after the last chunk.
+		:return: A sequence with the last converted ``bytes``, if any.
+		"""
+		rest = self._encoder.encode(self._decoder.decode(b"", final=True), final=True)
+		return (rest,) if rest else ()
+
+class _Splitter:
+	"""
+	Collects chunks of encoded text and splits them again at positions where
+	they can be decoded independently.
+	"""
+
+	def __init__(self, source_encoding, target_encoding, errors, chunk_size):
+		"""
+		Prepares to split text of a certain encoding.
+		:param source_encoding: The normalised name of the encoding of the
+		input.
+		:param target_encoding: The normalised name of the encoding to convert
+		to.
+		:param errors: How to handle errors in decoding and encoding.
+		:param chunk_size: The approximate number of bytes in every chunk.
+		"""
+		self._source_encoding = source_encoding
+		self._target_encoding = target_encoding
+		self._errors = errors
+		self._chunk_size = max(chunk_size, 8)
+		self._pending = bytearray() #Input that hasn't been split off yet.
+		self._first = True #Whether the first chunk hasn't been split off yet.
+		self._decoder_state = None #The state to decode every chunk but the first with. Found from the start of the input.
+		self._encoder_state = _encoder_continuation_state(target_encoding)
+		self._little_endian = True #For UTF-16, whether the input is in little-endian byte order.
+
+	def __call__(self, chunk):
+		"""
+		Adds a chunk of the input, and splits off any complete chunks.
+		:param chunk: A chunk of encoded ``bytes`` of any size.
+		:return: A list of conversion tasks for the complete chunks.
+		"""
+		self._pending += chunk
+		tasks = []
+		while len(self._pending) > self._chunk_size: #Look at the byte after the chunk to see if it starts a character.
+			end = self._boundary(self._chunk_size)
+			tasks.append(self._task(bytes(self._pending[:end])))
+			del self._pending[:end]
+		return tasks
+
+	def finish(self):
+		"""
+		Splits off the rest of the input.
+		:return: A sequence of conversion tasks for the rest of the input.
+		"""
+		if not self._pending and not self._first:
+			return ()
+		return (self._task(bytes(self._pending)),)
+
+	def _boundary(self, end):
+		"""
+		Finds a position to split the pending input at, where no character is
+		cut in half.
+		:param end: The preferred position to split at.
+		:return: The position closest before the preferred position where the
+		input can be split.
+		"""
+		if self._decoder_state is None: #Find out the byte order before splitting.
+			self._decoder_state = _decoder_continuation_state(self._source_encoding, bytes(self._pending[:_HEAD_SIZE]))
+			self._little_endian = self._source_encoding == "utf-16-le" or (self._source_encoding == "utf-16" and (sys.byteorder == "little") == (self._decoder_state[1] == 0)) #The state is 0 for the native byte order and 1 for the other one.
+		if self._source_encoding in _UTF8_NAMES:
+			start = end
+			while start > end - 4 and self._pending[start] & 0b11000000 == 0b10000000: #Continuation bytes.
+				start -= 1
+			return start if start > end - 4 else end #Not valid UTF-8 anyway, so the decoder will report it.
+		unit_size = _UNIT_SIZES.get(self._source_encoding, 1)
+		end -= end % unit_size
+		if unit_size == 2:
+			high_byte = self._pending[end - 1] if self._little_endian else self._pending[end - 2]
+			if 0xD8 <= high_byte <= 0xDB: #The last unit is the first half of a surrogate pair.
+				end -= 2
+		return end
+
+	def _task(self, data):
+		"""
+		Creates a task to convert a chunk of the input.
+
+		The first chunk is decoded from the initial state, so that it may start
+		with a byte order mark. The other chunks continue from the state after
+		the start of the input.
+		:param data: The encoded chunk.
+		:return: The arguments to ``_recode_chunk``.
+		"""
+		if self._first:
+			self._first = False
+			return (data, self._source_encoding, self._target_encoding, self._errors, None, None)
+		return (data, self._source_encoding, self._target_encoding, self._errors, self._decoder_state, self._encoder_state)
+
+def can_split(encoding):
+	"""
+	Determines whether text in a character encoding can be split into chunks
+	that can be decoded independently.
+	:param encoding: The name of the encoding.
+	:return: ``True`` if safe positions to split the encoded text are known for
+	this encoding, or ``False`` if it must be decoded from start to end.
+	:raises LookupError: The encoding is unknown.
+	"""
+	name = codecs.lookup(encoding).name
+	return name in _UTF8_NAMES or name in _UNIT_SIZES or _is_single_byte(name)
+
+def recode(source, destination, source_encoding, target_encoding, errors="strict", chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+	"""
+	Converts text from one character encoding to another.
+	:param source: Where to read the text from. This may be the URI or path of
+	a resource, ``bytes``, or an iterable of chunks of ``bytes``.
+	:param destination: Where to write the converted text to. This may be the
+	URI or path of a resource, or a callable object that takes every chunk of
+	converted ``bytes`` in order.
+	:param source_encoding: The name of the character encoding of the source.
+	:param target_encoding: The name of the character encoding to convert to.
+	:param errors: How to handle errors in decoding and encoding, as in
+	``bytes.decode``.
+	:param chunk_size: The approximate number of bytes to convert at once.
+	:param workers: The number of processes to convert with. If not provided,
+	one process per CPU is used.
+	:return: The metrics of the pipeline that performed the conversion, as
+	given by ``luna.pipeline.Pipeline.metrics``.
+	:raises LookupError: One of the encodings is unknown.
+	:raises UnicodeError: The text could not be converted, and the errors
+	are handled strictly.
+	"""
+	if isinstance(source, str):
+		source = luna.pipeline.read(source)
+	elif isinstance(source, (bytes, bytearray, memoryview)):
+		source = (source,)
+	if isinstance(destination, str):
+		sink = luna.pipeline.write(destination)
+	else:
+		sink = luna.pipeline.Stage(destination, name="write")
+	pipeline = luna.pipeline.Pipeline(source, stages(source_encoding, target_encoding, errors, chunk_size, workers) + [sink])
+	pipeline.run()
+	return pipeline.metrics()
+
+def stages(source_encoding, target_encoding, errors="strict", chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+	"""
+	Creates the pipeline stages that convert text from one character encoding
+	to another.
+
+	The stages take chunks of ``bytes`` of any size, and produce chunks of
+	converted ``bytes``.
+	:param source_encoding: The name of the character encoding of the input.
+	:param target_encoding: The name of the character encoding to convert to.
+	:param errors: How to handle errors in decoding and encoding, as in
+	``bytes.decode``.
+	:param chunk_size: The approximate number of bytes to convert at once.
+	:param workers: The number of processes to convert with. If not provided,
+	one process per CPU is used.
+	:return: A list of ``luna.pipeline.Stage`` instances.
+	:raises LookupError: One of the encodings is unknown.
+	"""
+	source_encoding = codecs.lookup(source_encoding).name
+	target_encoding = codecs.lookup(target_encoding).name
+	if not can_split(source_encoding) or not can_split(target_encoding): #Encoders with shift states would give different output when restarted for every chunk.
+		recoder = _IncrementalRecoder(source_encoding, target_encoding, errors)
+		return [luna.pipeline.Stage(recoder, finish=recoder.finish, name="recode")]
+	splitter = _Splitter(source_encoding, target_encoding, errors, chunk_size)
+	if workers is None:
+		workers = os.cpu_count() or 1
+	return [
+		luna.pipeline.Stage(splitter, expand=True, finish=splitter.finish, name="split text"),
+		luna.pipeline.Stage(_recode_chunk, workers=workers, processes=workers > 1, name="recode")
+	]
+
+def _decoder_continuation_state(encoding, head):
+	"""
+	Finds the state that a decoder is in after decoding the start of the
+	input.
+	:param encoding: The encoding of the input.
+	:param head: The first few bytes of the input.
+	:return: A decoder state that can be given to ``setstate`` of an
+	incremental decoder.
+	"""
+	decoder = codecs.getincrementaldecoder(encoding)("ignore")
+	try:
+		decoder.decode(head)
+	except UnicodeError: #Multi-byte encodings with an optional byte order mark, without byte order mark.
+		return (b"", 0) #Python falls back to the native byte order for those.
+	return (b"", decoder.getstate()[1])
+
+def _encoder_continuation_state(encoding):
+	"""
+	Finds the state that an encoder is in after having encoded some text.
+
+	This prevents byte order marks from being written at the start of every
+	chunk.
+	:param encoding: The encoding to convert to.
+	:return: An encoder state that can be given to ``setstate`` of an
+	incremental encoder.
+	"""
+	encoder = codecs.getincrementalencoder(encoding)("ignore")
+	encoder.encode("a")
+	return encoder.getstate()
+
+@functools.lru_cache(maxsize=None)
+def _is_single_byte(encoding):
+	"""
+	Determines whether an encoding encodes every character as a single byte,
+	without state.
+
+	This is the case if every byte decodes to one character on its own, and
+	every pair of bytes decodes to the same two characters.
+	:param encoding: The normalised name of the encoding.
+	:return: ``True`` if the encoding uses a single byte per character, or
+	``False`` otherwise.
+	"""
+	try:
+		characters = [bytes((byte,)).decode(encoding, "replace") for byte in range(256)]
+		if any(len(character) != 1 for character in characters):
+			return False
+		pairs = bytes(byte for first in range(256) for second in range(256) for byte in (first, second))
+		expected = "".join(first + second for first in characters for second in characters)
+		return pairs.decode(encoding, "replace") == expected
+	except (LookupError, TypeError, UnicodeError): #Not a text encoding, such as base64_codec.
+		return False
+
+def _recode_chunk(task):
+	"""
+	Converts a chunk of text from one encoding to another.
+
+	This is a module-level function so that it can be sent to other processes.
+	:param task: A tuple of the encoded chunk, the name of its encoding, the
+	name of the encoding to convert to, how to handle errors, the state to
+	start decoding with and the state to start encoding with. The states are
+	``None`` for the first chunk.
+	:return: The converted ``bytes``.
+	"""
+	data, source_encoding, target_encoding, errors, decoder_state, encoder_state = task
+	if decoder_state is None:
+		text = codecs.decode(data, source_encoding, errors)
+	else:
+		decoder = codecs.getincrementaldecoder(source_encoding)(errors)
+		decoder.setstate(decoder_state)
+		text = decoder.decode(data, final=True)
+	encoder = codecs.getincrementalencoder(target_encoding)(errors)
+	if encoder_state is not None:
+		encoder.setstate(encoder_state)
+	return encoder.encode(text, final=True)
\ No newline at end of file
@@ -9,30 +9,327 @@
 inter-component communication.
 """
 
+import asyncio #To read and write streams asynchronously.
+import bz2 #To (de)compress streams in the bzip2 format.
 import io #To use the standard I/O streams as helper.
+import lzma #To (de)compress streams in the xz format.
+import mmap #To map files into memory.
+import os #To get the size of files.
+import queue #To hand data over to the compressing thread.
+import threading #To compress on a worker thread.
+import urllib.parse #To convert URIs to paths.
+import urllib.request #To convert URIs to paths.
+import zlib #To (de)compress streams in the gzip format.
+
+DEFAULT_BUFFER_SIZE = 256 * 1024
+"""
+The default number of bytes to read from the wrapped streams at once.
+
+This is large enough that the overhead per read is negligible, while small
+enough to easily fit in the processor's cache.
+"""
+
+CODECS = ("bz2", "gzip", "xz")
+"""
+The compression formats that streams can be compressed and decompressed with.
+"""
+
+_MAGIC = {
+	b"\x1f\x8b": "gzip",
+	b"BZh": "bz2",
+	b"\xfd7zXZ\x00": "xz"
+}
+"""
+The magic bytes at the start of compressed data, and the compression formats
+that they indicate.
+"""
+
+_MAGIC_LENGTH = max(len(magic) for magic in _MAGIC)
+"""
+The number of bytes needed to detect any of the compression formats.
+"""
+
+class AsyncBytesStreamReader:
+	"""
+	A stream that reads from a synchronous stream in the background, for use
+	with ``asyncio``.
+
+	The blocking reads of the wrapped stream are done by an executor, so that
+	the event loop can do other work, such as converting data that was read
+	earlier. When iterating over the chunks of the stream with ``async for``,
+	the next chunk is already being read while the current chunk is being
+	processed. If the iteration is stopped early, the chunk that was read ahead
+	is given by the next reads.
+	"""
+
+	def __init__(self, wrapped, buffer_size=DEFAULT_BUFFER_SIZE, executor=None):
+		"""
+		Creates the ``AsyncBytesStreamReader``, wrapping it around the original
+		stream.
+		:param wrapped: The stream to wrap around. This may also be ``bytes``,
+		or the path or file URI of a local file to read from.
+		:param buffer_size: The number of bytes to read at once when iterating.
+		:param executor: The ``concurrent.futures.Executor`` to read with. If
+		not provided, the default executor of the event loop is used.
+		"""
+		if type(wrapped) == bytes:
+			wrapped = io.BytesIO(wrapped)
+		elif isinstance(wrapped, str):
+			wrapped = open(_to_path(wrapped), "rb")
+		self._wrapped = wrapped
+		self.buffer_size = buffer_size
+		self._executor = executor
+		self._buffer = b"" #Data that was read ahead, but not given out yet.
+		self._read_ahead = None #The future of the chunk that is being read ahead, if any.
+
+	async def __aenter__(self):
+		"""
+		Starts reading from the stream.
+		:return: This AsyncBytesStreamReader instance.
+		"""
+		return self
+
+	async def __aexit__(self, exception_type, exception_value, traceback):
+		"""
+		Stops reading from the stream, closing the wrapped stream.
+		:param exception_type: The type of any exception thrown during the
+		``async with`` block, or ``None`` if no exception was thrown.
+		:param exception_value: An instance of the exception that was thrown
+		during the ``async with`` block, or ``None`` if no exception was thrown.
+		:param traceback: The traceback of any exception that was thrown during
+		the ``async with`` block, or ``None`` if no exception was thrown.
+		"""
+		await self.close()
+
+	async def __aiter__(self):
+		"""
+		Iterates over chunks of the stream.
+
+		While a chunk is being processed, the next chunk is read in the
+		background.
+		:return: An asynchronous sequence of ``bytes`` objects that together
+		form the rest of the stream.
+		"""
+		loop = asyncio.get_running_loop()
+		while True:
+			if self._read_ahead is not None:
+				await self._finish_read_ahead()
+			elif not self._buffer:
+				self._buffer = await loop.run_in_executor(self._executor, self._wrapped.read, self.buffer_size)
+			chunk, self._buffer = self._buffer, b""
+			if not chunk:
+				return
+			self._read_ahead = loop.run_in_executor(self._executor, self._wrapped.read, self.buffer_size) #Read ahead while the chunk is processed.
+			yield chunk
+
+	async def close(self):
+		"""
+		Closes the wrapped stream.
+		"""
+		try:
+			if self._read_ahead is not None: #Don't close the stream while it's being read.
+				await self._finish_read_ahead()
+		finally:
+			await asyncio.get_running_loop().run_in_executor(self._executor, self._wrapped.close) #Also if reading ahead failed, so that the stream doesn't stay open.
+
+	async def read(self, size=-1):
+		"""
+		Reads bytes from the stream.
+		:param size: The maximum number of bytes to read. If negative, the rest
+		of the stream is read.
+		:return: The ``bytes`` that were read. This is empty at the end of the
+		stream.
+		"""
+		if self._read_ahead is not None:
+			await self._finish_read_ahead()
+		if self._buffer: #Give the data that was read ahead first.
+			if size < 0:
+				result = self._buffer + await asyncio.get_running_loop().run_in_executor(self._executor, self._wrapped.read, size)
+				self._buffer = b""
+				return result
+			result = self._buffer[:size]
+			self._buffer = self._buffer[size:]
+			return result
+		return await asyncio.get_running_loop().run_in_executor(self._executor, self._wrapped.read, size)
+
+	async def readexactly(self, size):
+		"""
+		Reads exactly the specified number of bytes from the stream.
+		:param size: The number of bytes to read.
+		:return: The ``bytes`` that were read.
+		:raises asyncio.IncompleteReadError: The stream ended before the
+		specified number of bytes could be read. The bytes that were read are
+		stored in the exception.
+		"""
+		result = bytearray()
+		while len(result) < size:
+			data = await self.read(size - len(result))
+			if not data:
+				raise asyncio.IncompleteReadError(bytes(result), size)
+			result += data
+		return bytes(result)
+
+	async def _finish_read_ahead(self):
+		"""
+		Waits for the chunk that is being read ahead, and buffers it for the
+		next reads.
+
+		If an iteration over the chunks is stopped early, the chunk that was
+		read ahead is not lost this way.
+		"""
+		reading, self._read_ahead = self._read_ahead, None
+		self._buffer += await reading
+
+class AsyncBytesStreamWriter:
+	"""
+	A stream that writes to a synchronous stream in the background, for use
+	with ``asyncio``.
+
+	Writing to the stream only collects the data in a buffer. When the buffer
+	exceeds its high-water mark, the data is written to the wrapped stream by
+	an executor, while the event loop continues. Producers must call ``drain``
+	regularly to apply back-pressure: it waits until the previous background
+	write is complete, so that the amount of memory in use remains bounded.
+	"""
+
+	def __init__(self, wrapped, high_water=4 * DEFAULT_BUFFER_SIZE, executor=None):
+		"""
+		Creates the ``AsyncBytesStreamWriter``, wrapping it around the original
+		stream.
+		:param wrapped: The stream to wrap around. This may also be the path or
+		file URI of a local file to write to.
+		:param high_water: The number of bytes that may be buffered before
+		they are written to the wrapped stream.
+		:param executor: The ``concurrent.futures.Executor`` to write with. If
+		not provided, the default executor of the event loop is used.
+		"""
+		if isinstance(wrapped, str):
+			wrapped = open(_to_path(wrapped), "wb")
+		self._wrapped = wrapped
+		self.high_water = high_water
+		self._executor = executor
+		self._buffer = bytearray()
+		self._writing = None #The future of the background write, if any.
+
+	async def __aenter__(self):
+		"""
+		Starts writing to the stream.
+		:return: This AsyncBytesStreamWriter instance.
+		"""
+		return self
+
+	async def __aexit__(self, exception_type, exception_value, traceback):
+		"""
+		Stops writing to the stream, writing all buffered data and closing the
+		wrapped stream.
+		:param exception_type: The type of any exception thrown during the
+		``async with`` block, or ``None`` if no exception was thrown.
+		:param exception_value: An instance of the exception that was thrown
+		during the ``async with`` block, or ``None`` if no exception was thrown.
+		:param traceback: The traceback of any exception that was thrown during
+		the ``async with`` block, or ``None`` if no exception was thrown.
+		"""
+		await self.close()
+
+	async def close(self):
+		"""
+		Writes all buffered data and closes the wrapped stream.
+		"""
+		try:
+			await self.flush()
+		finally:
+			await asyncio.get_running_loop().run_in_executor(self._executor, self._wrapped.close) #Also if writing failed, so that the stream doesn't stay open.
+
+	async def drain(self):
+		"""
+		Waits until it is appropriate to continue writing.
+
+		This waits for the previous background write to complete. If the
+		buffer has exceeded the high-water mark, a new background write is
+		started for its contents.
+		:raises IOError: A background write failed.
+		"""
+		if self._writing is not None:
+			writing = self._writing
+			self._writing = None
+			await writing #Raises any exception of the write.
+		if len(self._buffer) >= self.high_water:
+			self._start_write()
+
+	async def flush(self):
+		"""
+		Writes all buffered data to the wrapped stream and flushes it.
+		:raises IOError: Writing failed.
+		"""
+		await self.drain()
+		if self._buffer:
+			self._start_write()
+			await self.drain()
+		if hasattr(self._wrapped, "flush"):
+			await asyncio.get_running_loop().run_in_executor(self._executor, self._wrapped.flush)
+
+	def write(self, data):
+		"""
+		Adds data to the buffer to be written.
+
+		This doesn't block. Call ``drain`` afterwards to limit the amount of
+		memory in use.
+		:param data: A bytes-like object to write.
+		"""
+		self._buffer += data
+
+	def writelines(self, data):
+		"""
+		Adds a sequence of data to the buffer to be written.
+		:param data: A sequence of bytes-like objects to write.
+		"""
+		for chunk in data:
+			self._buffer += chunk
+
+	def _start_write(self):
+		"""
+		Starts writing the contents of the buffer in the background.
+
+		The buffer is replaced by a new one, so that the data that is being
+		written doesn't change during the write.
+		"""
+		data = self._buffer
+		self._buffer = bytearray()
+		self._writing = asyncio.get_running_loop().run_in_executor(self._executor, self._wrapped.write, data)
 
 class BytesStreamReader:
 	"""
 	A stream that wraps around a ``BufferedReader`` instance and allows
-	iterating byte-by-byte.
+	iterating byte-by-byte or chunk-by-chunk.
 
 	For the rest, the reader behaves exactly the same as ``BufferedReader``.
 	Only iterating over it yields separate bytes.
 
 	The built-in ``BufferedReader`` can read binary streams, but iterating over
 	them still yields the data line-by-line. This is undesirable since lines
-	typically have no meaning for binary files.
+	typically have no meaning for binary files, and a binary file without line
+	breaks would be read entirely as a single line.
+
+	Iterating byte-by-byte creates an integer for every byte though. To process
+	large streams efficiently, iterate over chunks with ``iter_chunks``, or
+	over views on a reusable buffer with ``iter_views``.
 	"""
 
-	def __init__(self, wrapped):
+	def __init__(self, wrapped, buffer_size=DEFAULT_BUFFER_SIZE):
 		"""
 		Creates the ``BytesStreamReader``, wrapping it around the original
 		stream.
-		:param wrapped: The ``BufferedReader`` stream to wrap around.
+		:param wrapped: The ``BufferedReader`` stream to wrap around. This may
+		also be ``bytes``, or the path or file URI of a local file to read from.
+		:param buffer_size: The number of bytes to read from the wrapped stream
+		at once, if not specified otherwise when iterating.
 		"""
 		if type(wrapped) == bytes:
 			wrapped = io.BytesIO(wrapped)
+		elif isinstance(wrapped, str):
+			wrapped = open(_to_path(wrapped), "rb")
 		self._wrapped = wrapped
+		self.buffer_size = buffer_size
 
 	def __enter__(self):
 		"""
@@ -54,7 +351,7 @@ def __exit__(self, exception_type, exception_value, traceback):
 		:param traceback: The traceback of any exception that was thrown during
 		the ``with`` block, or ``None`` if no exception was thrown.
 		"""
-		self._wrapped.__exit__()
+		self._wrapped.__exit__(exception_type, exception_value, traceback)
 
 	def __getattr__(self, item):
 		"""
@@ -74,5 +371,910 @@ def __iter__(self):
 		This turns the ``BytesStreamReader`` into a ``bytes``-like class.
 		:return: A sequence of bytes in the stream.
 		"""
-		for line in self._wrapped:
-			yield from line
\ No newline at end of file
+		return self.iter_bytes()
+
+	def iter_bytes(self):
+		"""
+		Creates an iterator that iterates over the bytes in this stream.
+
+		The stream is read in blocks of the buffer size, regardless of any line
+		breaks in the data.
+		:return: A sequence of bytes in the stream, as integers.
+		"""
+		for chunk in self.iter_chunks():
+			yield from chunk
+
+	def iter_chunks(self, size=None):
+		"""
+		Creates an iterator that iterates over chunks of the stream.
+
+		Every chunk is a new ``bytes`` object, so it may be kept after the
+		iteration continues. Only the last chunk may be smaller than the
+		requested size.
+		:param size: The maximum number of bytes in each chunk. If not
+		provided, the buffer size of the reader is used.
+		:return: A sequence of ``bytes`` objects that together form the rest of
+		the stream.
+		"""
+		if size is None:
+			size = self.buffer_size
+		while True:
+			chunk = self.read(size)
+			if not chunk:
+				return
+			yield chunk
+
+	def iter_views(self, size=None):
+		"""
+		Creates an iterator that iterates over chunks of the stream without
+		allocating new memory for every chunk.
+
+		The chunks are ``memoryview`` slices of a single buffer that is reused
+		for every chunk. A chunk is therefore only valid until the iteration
+		continues. If the data must be kept, copy it with ``bytes(chunk)``.
+		:param size: The maximum number of bytes in each chunk. If not
+		provided, the buffer size of the reader is used.
+		:return: A sequence of ``memoryview`` objects that together form the
+		rest of the stream.
+		"""
+		if size is None:
+			size = self.buffer_size
+		buffer = bytearray(size)
+		view = memoryview(buffer)
+		try:
+			while True:
+				num_read = self.readinto(view)
+				if not num_read:
+					return
+				yield view[:num_read]
+		finally:
+			view.release()
+
+	def readinto(self, buffer):
+		"""
+		Reads bytes from the stream into a pre-allocated buffer.
+
+		If the wrapped stream supports it, the data is read directly into the
+		buffer, without creating intermediary ``bytes`` objects.
+		:param buffer: A writable bytes-like object, such as a ``bytearray`` or
+		a ``memoryview`` of one.
+		:return: The number of bytes that were read, which is 0 at the end of
+		the stream.
+		"""
+		if hasattr(self._wrapped, "readinto"):
+			return self._wrapped.readinto(buffer)
+		data = self._wrapped.read(len(buffer))
+		buffer[:len(data)] = data
+		return len(data)
+
+class PeekableStream(BytesStreamReader):
+	"""
+	A stream that allows looking ahead at the data without consuming it.
+
+	This is intended to find out what type of data a stream contains before
+	deciding how to read it. The data that is looked at is kept in a buffer, so
+	that the stream can be handed to whatever needs to read it afterwards
+	without having to read the data a second time from the original source.
+
+	The amount of data that can be looked ahead at is limited, so that looking
+	ahead uses a bounded amount of memory.
+	"""
+
+	def __init__(self, wrapped, look_ahead=DEFAULT_BUFFER_SIZE, buffer_size=DEFAULT_BUFFER_SIZE):
+		"""
+		Creates the ``PeekableStream``, wrapping it around the original stream.
+		:param wrapped: The ``BufferedReader`` stream to wrap around.
+		:param look_ahead: The maximum number of bytes that can be looked ahead
+		at.
+		:param buffer_size: The number of bytes to read from the wrapped stream
+		at once when iterating, if not specified otherwise.
+		"""
+		super().__init__(wrapped, buffer_size)
+		self.look_ahead = look_ahead
+		self._peeked = bytearray() #Data that was read from the wrapped stream, but not yet consumed.
+		self._ended = False #Whether the wrapped stream was read until the end while peeking.
+
+	def peek(self, size=None):
+		"""
+		Gives the next bytes of the stream without consuming them.
+
+		If fewer bytes are returned than requested, the stream contains no more
+		bytes than that.
+		:param size: The number of bytes to look ahead at. If not provided, the
+		maximum look-ahead is used.
+		:return: The next bytes of the stream.
+		:raises ValueError: The requested number of bytes is more than the
+		maximum look-ahead.
+		"""
+		if size is None:
+			size = self.look_ahead
+		if size > self.look_ahead:
+			raise ValueError("Can't look ahead {size} bytes, only {look_ahead}.".format(size=size, look_ahead=self.look_ahead))
+		while len(self._peeked) < size and not self._ended:
+			data = self._wrapped.read(size - len(self._peeked))
+			if not data:
+				self._ended = True
+			self._peeked += data
+		return bytes(self._peeked[:size])
+
+	def read(self, size=-1):
+		"""
+		Reads and consumes the next bytes of the stream.
+
+		Bytes that were looked ahead at are returned first. If there are fewer
+		of those than requested, the rest is read from the wrapped stream, so
+		fewer bytes than requested are only returned at the end of the stream.
+		:param size: The maximum number of bytes to read. If negative or
+		``None``, the rest of the stream is read.
+		:return: The ``bytes`` that were read.
+		"""
+		if size is None or size < 0:
+			result = bytes(self._peeked) + self._wrapped.read()
+			self._peeked.clear()
+			return result
+		if not self._peeked:
+			return self._wrapped.read(size)
+		result = bytes(self._peeked[:size])
+		del self._peeked[:size]
+		if len(result) < size and not self._ended:
+			result += self._wrapped.read(size - len(result))
+		return result
+
+	def readinto(self, buffer):
+		"""
+		Reads and consumes the next bytes of the stream into a pre-allocated
+		buffer.
+
+		Bytes that were looked ahead at are returned first.
+		:param buffer: A writable bytes-like object.
+		:return: The number of bytes that were read, which is 0 at the end of
+		the stream.
+		"""
+		if not self._peeked:
+			return super().readinto(buffer)
+		num_read = min(len(buffer), len(self._peeked))
+		buffer[:num_read] = self._peeked[:num_read]
+		del self._peeked[:num_read]
+		return num_read
+
+class DecompressingStreamReader(BytesStreamReader):
+	"""
+	A stream that decompresses the data of the stream it wraps.
+
+	The compression format is detected from the magic bytes at the start of
+	the wrapped stream, unless it is specified. The data is decompressed
+	incrementally while it is read, never more than one buffer ahead, so the
+	memory in use stays constant regardless of how well the data was
+	compressed.
+	"""
+
+	def __init__(self, wrapped, codec=None, buffer_size=DEFAULT_BUFFER_SIZE):
+		"""
+		Creates the ``DecompressingStreamReader``, wrapping it around the
+		compressed stream.
+		:param wrapped: The compressed stream to wrap around. This may also be
+		``bytes``, or the path or file URI of a local file to read from.
+		:param codec: The compression format of the wrapped stream, one of
+		``CODECS``. If not provided, it is detected from the magic bytes.
+		:param buffer_size: The number of bytes to read from the wrapped stream
+		at once, and the maximum number of bytes to decompress ahead.
+		"""
+		super().__init__(wrapped, buffer_size)
+		self._decompressor = Decompressor(codec, buffer_size)
+		self._output = bytearray() #Decompressed data that hasn't been read yet.
+		self._pieces = iter(()) #The decompressed pieces of the last compressed chunk, as far as they haven't been decompressed yet.
+		self._ended = False #Whether the wrapped stream was read until the end.
+
+	def read(self, size=-1):
+		"""
+		Reads and decompresses the next bytes of the stream.
+		:param size: The maximum number of bytes to read. If negative or
+		``None``, the rest of the stream is read.
+		:return: The decompressed ``bytes`` that were read.
+		:raises EOFError: The wrapped stream ended before the end of the
+		compressed data.
+		"""
+		if size is None or size < 0:
+			while self._decompress_more():
+				pass
+			size = len(self._output)
+		while len(self._output) < size and self._decompress_more():
+			pass
+		result = bytes(self._output[:size])
+		del self._output[:size]
+		return result
+
+	def readinto(self, buffer):
+		"""
+		Reads and decompresses the next bytes of the stream into a
+		pre-allocated buffer.
+		:param buffer: A writable bytes-like object.
+		:return: The number of bytes that were read, which is 0 at the end of
+		the stream.
+		:raises EOFError: The wrapped stream ended before the end of the
+		compressed data.
+		"""
+		while not self._output and self._decompress_more():
+			pass
+		num_read = min(len(buffer), len(self._output))
+		buffer[:num_read] = self._output[:num_read]
+		del self._output[:num_read]
+		return num_read
+
+	def _decompress_more(self):
+		"""
+		Decompresses the next piece of data.
+		:return: ``True`` if more data may follow, or ``False`` if the end of
+		the stream was reached.
+		"""
+		for piece in self._pieces:
+			self._output += piece
+			return True
+		if self._ended:
+			return False
+		data = self._wrapped.read(self.buffer_size)
+		if data:
+			self._pieces = self._decompressor.feed(data)
+		else:
+			self._pieces = iter(self._decompressor.finish())
+			self._ended = True
+		return True
+
+class BytesStreamWriter:
+	"""
+	A stream that collects written data in a buffer and writes it to a sink in
+	large blocks.
+
+	This is the output-side counterpart of the ``BytesStreamReader``. Instead of
+	building a complete output as a single ``bytes`` object, converters can
+	write their output piece by piece. Many small writes are then combined into
+	few large writes to the sink, which is much more efficient for most sinks.
+
+	The buffer is reused for every block. As soon as the buffer reaches the
+	high-water mark, it is written to the sink before the write returns. This
+	bounds the amount of memory in use.
+	"""
+
+	def __init__(self, sink, high_water=DEFAULT_BUFFER_SIZE):
+		"""
+		Creates the ``BytesStreamWriter``, writing to the specified sink.
+		:param sink: Where to write the data to. This may be a stream with a
+		``write`` method, a callable object that takes the data as argument, or
+		the path or file URI of a local file. The data given to the sink is
+		only valid during the call, since the buffer gets reused.
+		:param high_water: The number of bytes to collect before writing them
+		to the sink.
+		"""
+		if isinstance(sink, str):
+			sink = open(_to_path(sink), "wb")
+		self._sink = sink
+		self._write_to_sink = sink.write if hasattr(sink, "write") else sink
+		self.high_water = high_water
+		self._buffer = bytearray(high_water) #Allocated once, and reused for every block.
+		self._length = 0 #How much of the buffer is in use.
+		self._closed = False
+
+	def __enter__(self):
+		"""
+		Starts writing to the stream.
+		:return: This BytesStreamWriter instance.
+		"""
+		return self
+
+	def __exit__(self, exception_type, exception_value, traceback):
+		"""
+		Stops writing to the stream, writing all buffered data and closing the
+		sink.
+		:param exception_type: The type of any exception thrown during the
+		``with`` block, or ``None`` if no exception was thrown.
+		:param exception_value: An instance of the exception that was thrown
+		during the ``with`` block, or ``None`` if no exception was thrown.
+		:param traceback: The traceback of any exception that was thrown during
+		the ``with`` block, or ``None`` if no exception was thrown.
+		"""
+		self.close()
+
+	def close(self):
+		"""
+		Writes all buffered data to the sink and closes the sink, if it can be
+		closed.
+
+		Closing a stream that is already closed has no effect.
+		"""
+		if self._closed:
+			return
+		try:
+			self.flush()
+		finally:
+			self._closed = True
+			if hasattr(self._sink, "close"): #Also if writing failed, so that the sink doesn't stay open.
+				self._sink.close()
+
+	def flush(self):
+		"""
+		Writes all buffered data to the sink.
+
+		If the sink can be flushed itself, it is flushed too.
+		:raises ValueError: The stream is closed.
+		"""
+		_check_open(self._closed)
+		self._write_buffer()
+		if hasattr(self._sink, "flush"):
+			self._sink.flush()
+
+	def write(self, data):
+		"""
+		Writes data to the stream.
+
+		Pieces of data that are larger than the buffer are passed on to the
+		sink directly, without copying them into the buffer.
+		:param data: A bytes-like object to write.
+		:return: The number of bytes written.
+		:raises ValueError: The stream is closed.
+		"""
+		_check_open(self._closed)
+		with memoryview(data) as view:
+			length = view.nbytes
+			if self._length + length > self.high_water: #Doesn't fit any more.
+				self._write_buffer()
+				if length >= self.high_water: #Wouldn't fit at all.
+					self._write_to_sink(view)
+					return length
+			self._buffer[self._length:self._length + length] = view.cast("B") if view.format != "B" else view
+			self._length += length
+		return length
+
+	def writelines(self, data):
+		"""
+		Writes a sequence of data to the stream.
+		:param data: A sequence of bytes-like objects, such as ``memoryview``
+		slices, to write.
+		"""
+		for chunk in data:
+			self.write(chunk)
+
+	def _write_buffer(self):
+		"""
+		Writes the data in the buffer to the sink and empties the buffer.
+		"""
+		if self._length == 0:
+			return
+		with memoryview(self._buffer) as view:
+			with view[:self._length] as block:
+				self._write_to_sink(block)
+		self._length = 0
+
+class CompressingStreamWriter:
+	"""
+	A stream that compresses the data written to it before writing it to a
+	sink.
+
+	The compression runs on a worker thread, so that a converter can produce
+	the next data while the previous data is being compressed. The data waiting
+	to be compressed is limited to a few buffers. If the worker falls behind,
+	writes wait for it, which keeps the memory in use constant.
+	"""
+
+	def __init__(self, sink, codec="gzip", level=None, high_water=DEFAULT_BUFFER_SIZE, queue_size=4):
+		"""
+		Creates the ``CompressingStreamWriter``, writing to the specified sink.
+		:param sink: Where to write the compressed data to. This may be
+		anything that a ``BytesStreamWriter`` can write to.
+		:param codec: The compression format to write, one of ``CODECS``.
+		:param level: The compression level. If not provided, the default level
+		of the format is used.
+		:param high_water: The number of bytes to collect before handing them
+		to the worker thread.
+		:param queue_size: The maximum number of blocks waiting to be
+		compressed.
+		"""
+		self._compressor = compressor(codec, level)
+		self._writer = BytesStreamWriter(sink, high_water)
+		self.high_water = high_water
+		self._buffer = bytearray() #Data that is collected before handing it to the worker.
+		self._queue = queue.Queue(maxsize=queue_size)
+		self._error = None #An exception raised in the worker thread, to raise again in the writing thread.
+		self._closed = False
+		self._worker = threading.Thread(target=self._compress_blocks, name="Compressing stream writer", daemon=True)
+		self._worker.start()
+
+	def __enter__(self):
+		"""
+		Starts writing to the stream.
+		:return: This CompressingStreamWriter instance.
+		"""
+		return self
+
+	def __exit__(self, exception_type, exception_value, traceback):
+		"""
+		Stops writing to the stream, compressing and writing all remaining data
+		and closing the sink.
+		:param exception_type: The type of any exception thrown during the
+		``with`` block, or ``None`` if no exception was thrown.
+		:param exception_value: An instance of the exception that was thrown
+		during the ``with`` block, or ``None`` if no exception was thrown.
+		:param traceback: The traceback of any exception that was thrown during
+		the ``with`` block, or ``None`` if no exception was thrown.
+		"""
+		self.close()
+
+	def close(self):
+		"""
+		Compresses all remaining data, ends the compressed data and closes the
+		sink.
+
+		Closing a stream that is already closed has no effect.
+		:raises Exception: Compressing or writing in the worker thread failed.
+		"""
+		if self._closed:
+			return
+		self._closed = True
+		try:
+			if self._worker.is_alive():
+				self._hand_over()
+				self._queue.put(None)
+				self._worker.join()
+				self._raise_error()
+				self._writer.write(self._compressor.flush())
+		finally:
+			self._writer.close() #Also after an error, so that the sink doesn't stay open.
+
+	def flush(self):
+		"""
+		Waits until all data written so far is compressed, and writes it to the
+		sink.
+
+		Compressors hold back some data to compress it better, so not all data
+		may have reached the sink until the stream is closed.
+		:raises ValueError: The stream is closed.
+		:raises Exception: Compressing or writing in the worker thread failed.
+		"""
+		_check_open(self._closed)
+		self._hand_over()
+		self._queue.join()
+		self._raise_error()
+		self._writer.flush()
+
+	def write(self, data):
+		"""
+		Writes data to the stream, to be compressed.
+		:param data: A bytes-like object to write.
+		:return: The number of bytes written.
+		:raises ValueError: The stream is closed.
+		:raises Exception: Compressing or writing in the worker thread failed.
+		"""
+		_check_open(self._closed)
+		self._raise_error()
+		with memoryview(data) as view:
+			self._buffer += view.cast("B") if view.format != "B" else view
+			length = view.nbytes
+		if len(self._buffer) >= self.high_water:
+			self._hand_over()
+		return length
+
+	def writelines(self, data):
+		"""
+		Writes a sequence of data to the stream, to be compressed.
+		:param data: A sequence of bytes-like objects to write.
+		"""
+		for chunk in data:
+			self.write(chunk)
+
+	def _compress_blocks(self):
+		"""
+		Compresses blocks of data from the queue and writes them to the sink,
+		until the stream is closed.
+
+		This runs on the worker thread. After an error, the remaining blocks are
+		discarded, so that writers never wait for a queue that is not emptied.
+		"""
+		while True:
+			block = self._queue.get()
+			try:
+				if block is None:
+					return
+				if self._error is None:
+					self._writer.write(self._compressor.compress(block))
+			except Exception as e: #pylint: disable=broad-except
+				self._error = e
+			finally:
+				self._queue.task_done()
+
+	def _hand_over(self):
+		"""
+		Hands the collected data over to the worker thread.
+		"""
+		if self._buffer:
+			self._queue.put(bytes(self._buffer))
+			self._buffer.clear()
+
+	def _raise_error(self):
+		"""
+		Raises the exception that occurred in the worker thread, if any.
+		:raises Exception: Compressing or writing in the worker thread failed.
+		"""
+		if self._error is not None:
+			raise self._error
+
+class Decompressor:
+	"""
+	Incrementally decompresses data that arrives in chunks.
+
+	The compression format may be detected from the magic bytes at the start of
+	the data. Multiple compressed streams that are concatenated, as ``gzip``
+	and ``bzip2`` allow, are decompressed one after another.
+	"""
+
+	def __init__(self, codec=None, piece_size=DEFAULT_BUFFER_SIZE):
+		"""
+		Prepares to decompress data.
+		:param codec: The compression format of the data, one of ``CODECS``. If
+		not provided, it is detected from the magic bytes.
+		:param piece_size: The maximum number of decompressed bytes to give at
+		once.
+		:raises ValueError: The compression format is unknown.
+		"""
+		if codec is not None and codec not in CODECS:
+			raise ValueError("Unknown compression format: {codec}".format(codec=codec))
+		self.codec = codec
+		self.piece_size = piece_size
+		self._decompressor = None #Created once the compression format is known.
+		self._pending = b"" #Compressed data that wasn't given to the decompressor yet.
+
+	def feed(self, data):
+		"""
+		Decompresses the next chunk of compressed data.
+
+		The decompressed data is given in pieces, which are only decompressed
+		while iterating, so that data that was compressed very well doesn't
+		need to be decompressed entirely into memory.
+		:param data: A chunk of compressed data.
+		:return: A sequence of pieces of decompressed ``bytes``.
+		:raises ValueError: The compression format could not be detected.
+		"""
+		self._pending += data
+		return self._decompress_pending()
+
+	def finish(self):
+		"""
+		Decompresses the rest of the data after the last chunk.
+		:return: A sequence of the last pieces of decompressed ``bytes``.
+		:raises EOFError: The compressed data ended before its end marker.
+		:raises ValueError: The compression format could not be detected.
+		"""
+		if self._decompressor is None:
+			if not self._pending: #No data at all.
+				return
+			self._start()
+		yield from self._decompress_pending()
+		if not self._decompressor.eof:
+			raise EOFError("The compressed data ended before the end-of-stream marker was reached.")
+
+	def _decompress_step(self):
+		"""
+		Decompresses one piece of data from the pending input.
+		:return: The decompressed piece, which may be empty.
+		"""
+		if self._decompressor.eof: #The previous compressed stream ended, so a next one starts.
+			self._decompressor = _decompressor(self.codec)
+		if self.codec == "gzip":
+			piece = self._decompressor.decompress(self._pending, self.piece_size)
+			self._pending = b"" if self._decompressor.eof else self._decompressor.unconsumed_tail #At the end of a stream, the rest of the input is in the unused data, and possibly also still in the unconsumed tail.
+		elif self._decompressor.needs_input:
+			piece = self._decompressor.decompress(self._pending, self.piece_size)
+			self._pending = b""
+		else: #Still has decompressed data of previous input.
+			piece = self._decompressor.decompress(b"", self.piece_size)
+		if self._decompressor.eof:
+			self._pending = self._decompressor.unused_data + self._pending
+		return piece
+
+	def _decompress_pending(self):
+		"""
+		Decompresses the pending input, piece by piece.
+		:return: A sequence of pieces of decompressed ``bytes``.
+		:raises ValueError: The compression format could not be detected.
+		"""
+		if self._decompressor is None:
+			if len(self._pending) < _MAGIC_LENGTH: #Wait for enough data to detect the format.
+				return
+			self._start()
+		while self._pending or not self._decompressor.eof:
+			piece = self._decompress_step()
+			if piece:
+				yield piece
+			elif not self._decompressor.eof: #Needs more input.
+				return
+
+	def _start(self):
+		"""
+		Creates the decompressor, detecting the compression format if
+		necessary.
+		:raises ValueError: The compression format could not be detected.
+		"""
+		if self.codec is None:
+			self.codec = detect_compression(self._pending)
+			if self.codec is None:
+				raise ValueError("The data is not compressed in any known format.")
+		self._decompressor = _decompressor(self.codec)
+
+class MappedStreamReader:
+	"""
+	A read-only stream over a local file that is mapped into memory.
+
+	Instead of copying the file through Python's buffers, the file is mapped
+	into the address space of the application. The data can then be accessed
+	directly from the operating system's page cache. Slices of the stream are
+	``memoryview`` objects that refer to the mapped file, so they don't copy
+	any data. This allows random access and searching in large files without
+	reading them completely.
+
+	The stream supports the same reading and iteration methods as the
+	``BytesStreamReader``. Views that are obtained from the stream are only
+	valid as long as the stream is open, and they must be released before the
+	stream can be closed.
+	"""
+
+	def __init__(self, location, buffer_size=DEFAULT_BUFFER_SIZE):
+		"""
+		Maps a file into memory to read from it.
+		:param location: The path to a local file, or a URI with the file
+		scheme.
+		:param buffer_size: The size of the chunks to iterate over, if not
+		specified otherwise when iterating.
+		:raises IOError: The file could not be opened.
+		"""
+		self.buffer_size = buffer_size
+		self._position = 0
+		self._file = open(_to_path(location), "rb")
+		try:
+			if os.fstat(self._file.fileno()).st_size == 0: #Empty files can't be mapped.
+				self._map = None
+				self._view = memoryview(b"")
+			else:
+				self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+				self._view = memoryview(self._map)
+		except Exception:
+			self._file.close()
+			raise
+
+	def __enter__(self):
+		"""
+		Starts reading from the stream.
+		:return: This MappedStreamReader instance.
+		"""
+		return self
+
+	def __exit__(self, exception_type, exception_value, traceback):
+		"""
+		Stops reading from the stream, closing the file.
+		:param exception_type: The type of any exception thrown during the
+		``with`` block, or ``None`` if no exception was thrown.
+		:param exception_value: An instance of the exception that was thrown
+		during the ``with`` block, or ``None`` if no exception was thrown.
+		:param traceback: The traceback of any exception that was thrown during
+		the ``with`` block, or ``None`` if no exception was thrown.
+		"""
+		self.close()
+
+	def __getitem__(self, index):
+		"""
+		Gets a byte or a range of bytes from the file, without copying.
+		:param index: The position of a byte, or a slice of positions.
+		:return: The byte at the specified position as integer, or a
+		``memoryview`` on the specified slice of the file.
+		"""
+		return self._view[index]
+
+	def __iter__(self):
+		"""
+		Creates an iterator that iterates over the bytes in the rest of this
+		stream.
+		:return: A sequence of bytes in the stream.
+		"""
+		return self.iter_bytes()
+
+	def __len__(self):
+		"""
+		Gives the size of the file.
+		:return: The number of bytes in the file.
+		"""
+		return len(self._view)
+
+	def close(self):
+		"""
+		Unmaps and closes the file.
+
+		The file itself is closed even if it can't be unmapped yet. Once the
+		views on the file have been released, closing again unmaps it.
+		:raises BufferError: There are still views on the file that have not
+		been released.
+		"""
+		self._view.release()
+		try:
+			if self._map is not None:
+				self._map.close()
+		finally:
+			self._file.close()
+
+	def find(self, sub, start=None, end=None):
+		"""
+		Finds the first occurrence of a byte sequence in the file.
+
+		This searches directly in the mapped memory, without reading the file
+		into Python buffers.
+		:param sub: The ``bytes`` to search for.
+		:param start: The position in the file to start searching. If not
+		provided, the current position of the stream is used.
+		:param end: The position in the file to stop searching. If not
+		provided, the search continues until the end of the file.
+		:return: The position of the first occurrence, or -1 if it doesn't
+		occur in the specified range.
+		"""
+		if start is None:
+			start = self._position
+		if self._map is None: #Empty file.
+			return b"".find(sub, start, end)
+		if end is None:
+			return self._map.find(sub, start)
+		return self._map.find(sub, start, end)
+
+	def iter_bytes(self):
+		"""
+		Creates an iterator that iterates over the bytes in the rest of this
+		stream.
+		:return: A sequence of bytes in the stream, as integers.
+		"""
+		for chunk in self.iter_views():
+			yield from chunk
+
+	def iter_chunks(self, size=None):
+		"""
+		Creates an iterator that iterates over copies of chunks of the rest of
+		the stream.
+		:param size: The maximum number of bytes in each chunk. If not
+		provided, the buffer size of the reader is used.
+		:return: A sequence of ``bytes`` objects that together form the rest of
+		the stream.
+		"""
+		for view in self.iter_views(size):
+			yield view.tobytes()
+
+	def iter_views(self, size=None):
+		"""
+		Creates an iterator that iterates over chunks of the rest of the
+		stream without copying them.
+		:param size: The maximum number of bytes in each chunk. If not
+		provided, the buffer size of the reader is used.
+		:return: A sequence of ``memoryview`` objects on the mapped file that
+		together form the rest of the stream.
+		"""
+		if size is None:
+			size = self.buffer_size
+		while self._position < len(self._view):
+			view = self.read_view(size)
+			yield view
+
+	def read(self, size=-1):
+		"""
+		Reads a copy of the next bytes of the stream.
+		:param size: The maximum number of bytes to read. If negative, the
+		rest of the stream is read.
+		:return: The ``bytes`` that were read.
+		"""
+		return self.read_view(size).tobytes()
+
+	def read_view(self, size=-1):
+		"""
+		Reads the next bytes of the stream without copying them.
+		:param size: The maximum number of bytes to read. If negative, the
+		rest of the stream is read.
+		:return: A ``memoryview`` on the bytes that were read.
+		"""
+		start = self._position
+		if start >= len(self._view): #At or beyond the end. Don't move the position back to the end.
+			return self._view[0:0]
+		self._position = len(self._view) if size < 0 else min(start + size, len(self._view))
+		return self._view[start:self._position]
+
+	def readinto(self, buffer):
+		"""
+		Reads the next bytes of the stream into a pre-allocated buffer.
+		:param buffer: A writable bytes-like object.
+		:return: The number of bytes that were read, which is 0 at the end of
+		the stream.
+		"""
+		view = self.read_view(len(buffer))
+		buffer[:len(view)] = view
+		return len(view)
+
+	def seek(self, offset, whence=io.SEEK_SET):
+		"""
+		Changes the position in the stream.
+		:param offset: The new position, relative to what ``whence``
+		indicates.
+		:param whence: ``io.SEEK_SET`` to seek relative to the start of the
+		file, ``io.SEEK_CUR`` to seek relative to the current position, or
+		``io.SEEK_END`` to seek relative to the end of the file.
+		:return: The new absolute position.
+		"""
+		if whence == io.SEEK_CUR:
+			offset += self._position
+		elif whence == io.SEEK_END:
+			offset += len(self._view)
+		self._position = max(0, offset)
+		return self._position
+
+	def tell(self):
+		"""
+		Gives the current position in the stream.
+		:return: The current position, in bytes from the start of the file.
+		"""
+		return self._position
+
+def compressor(codec, level=None):
+	"""
+	Creates an incremental compressor for a compression format.
+	:param codec: The compression format, one of ``CODECS``.
+	:param level: The compression level. If not provided, the default level of
+	the format is used.
+	:return: A compressor with a ``compress`` method to compress the next data
+	and a ``flush`` method to end the compressed data.
+	:raises ValueError: The compression format is unknown.
+	"""
+	if codec == "gzip":
+		return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+	if codec == "bz2":
+		return bz2.BZ2Compressor(9 if level is None else level)
+	if codec == "xz":
+		return lzma.LZMACompressor(format=lzma.FORMAT_XZ, preset=level)
+	raise ValueError("Unknown compression format: {codec}".format(codec=codec))
+
+def detect_compression(head):
+	"""
+	Detects the compression format of data from its magic bytes.
+	:param head: The first bytes of the data. At least 6 bytes are needed to
+	detect every format.
+	:return: The compression format, one of ``CODECS``, or ``None`` if the data
+	is not compressed in any known format.
+	"""
+	head = bytes(head[:_MAGIC_LENGTH])
+	for magic, codec in _MAGIC.items():
+		if head.startswith(magic):
+			return codec
+	return None
+
+def _check_open(closed):
+	"""
+	Checks that a stream is not closed before using it.
+	:param closed: Whether the stream is closed.
+	:raises ValueError: The stream is closed.
+	"""
+	if closed:
+		raise ValueError("I/O operation on closed stream.")
+
+def _decompressor(codec):
+	"""
+	Creates an incremental decompressor for a compression format.
+	:param codec: The compression format, one of ``CODECS``.
+	:return: A decompressor object of the ``zlib``, ``bz2`` or ``lzma``
+	module.
+	"""
+	if codec == "gzip":
+		return zlib.decompressobj(16 + zlib.MAX_WBITS)
+	if codec == "bz2":
+		return bz2.BZ2Decompressor()
+	return lzma.LZMADecompressor(format=lzma.FORMAT_XZ)
+
+def _to_path(location):
+	"""
+	Converts the location of a local file to a path that Python's file I/O
+	can open.
+	:param location: A path, or a URI with the file scheme, such as the
+	storage plug-ins use.
+	:return: A path to the file.
+	"""
+	if location.startswith("file:"):
+		parsed = urllib.parse.urlparse(location)
+		return urllib.request.url2pathname(("//" + parsed.netloc if parsed.netloc else "") + parsed.path)
+	return location
\ No newline at end of file
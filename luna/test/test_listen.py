@@ -8,6 +8,8 @@
 Tests the listening module that provides a way to listen for state changes.
 """
 
+import threading #To test adding listeners concurrently.
+import time #To let threads take turns, and to replace the clock of delayed listeners.
 import unittest #To define automatic tests.
 import unittest.mock #To track how often a listener function was called.
 import weakref #To check whether objects are properly garbage collected.
@@ -34,6 +36,62 @@ def tearDown(self):
 		"""
 		if hasattr(self, "field_float"):
 			delattr(self, "field_float")
+		luna.listen.disable_instrumentation()
+
+	def test_instrumentation_disabled(self):
+		"""
+		Tests that no statistics are gathered if instrumentation is disabled.
+		"""
+		luna.listen.listen(self.listener, self, "field_integer")
+		self.field_integer = 1
+		self.assertIsNone(luna.listen.instrumentation_snapshot(), "Instrumentation was never enabled.")
+
+	def test_instrumentation_fan_out(self):
+		"""
+		Tests counting how many listeners are called for changes of a model.
+		"""
+		other_listener = unittest.mock.MagicMock()
+		luna.listen.listen(self.listener, self, "field_integer")
+		luna.listen.listen(other_listener, self)
+		luna.listen.enable_instrumentation()
+		self.field_integer = 1
+		self.field_string = "Pluto is a planet."
+		models = luna.listen.instrumentation_snapshot()["models"]
+		self.assertEqual(len(models), 1, "Only this test case was changed.")
+		statistics = list(models.values())[0]
+		self.assertEqual(statistics["notifications"], 2, "The model was changed twice.")
+		self.assertEqual(statistics["listener_calls"], 3, "The first change called both listeners, the second only the instance listener.")
+		self.assertEqual(statistics["max_fan_out"], 2, "The first change called both listeners.")
+
+	def test_instrumentation_listener_calls(self):
+		"""
+		Tests counting the calls to a listener and measuring their latency.
+		"""
+		luna.listen.listen(self.listener, self)
+		luna.listen.enable_instrumentation()
+		self.field_integer = 1
+		self.field_integer = 2
+		listeners = luna.listen.instrumentation_snapshot()["listeners"]
+		self.assertEqual(len(listeners), 1, "Only one listener was called.")
+		statistics = list(listeners.values())[0]
+		self.assertEqual(statistics["calls"], 2, "The listener was called twice.")
+		self.assertGreaterEqual(statistics["total_time"], statistics["max_time"], "The total time includes the slowest call.")
+		self.assertGreater(statistics["max_time"], 0, "Calling a listener takes some time.")
+
+	@unittest.mock.patch("luna.plugins.api")
+	def test_instrumentation_slow_listener(self, api):
+		"""
+		Tests whether slow listeners are reported in the log.
+		:param api: A mock for the plug-in APIs, to capture the log.
+		"""
+		luna.listen.listen(self.listener, self, "field_integer")
+		luna.listen.enable_instrumentation(slow_threshold=-1) #Every listener is slow.
+		self.field_integer = 1
+		self.assertTrue(api("logger").warning.called, "The slow listener must be reported.")
+		api.reset_mock()
+		luna.listen.enable_instrumentation(slow_threshold=60)
+		self.field_integer = 2
+		api("logger").warning.assert_not_called()
 
 	def test_listen_all_fields(self):
 		"""
@@ -45,6 +103,160 @@ def test_listen_all_fields(self):
 		self.field_string = "I love you."
 		self.listener.assert_called_with("field_string", "I love you.")
 
+	def test_listen_concurrent(self):
+		"""
+		Stress tests adding listeners from other threads while the listeners of
+		the model are being called.
+
+		This would give errors or lose listeners if the listeners were modified
+		while iterating over them.
+		"""
+		dictionary = luna.listen.DictionaryModel()
+		listeners = [unittest.mock.MagicMock() for _ in range(200)]
+		errors = []
+
+		def change():
+			"""
+			Keeps changing the model until all listeners are added.
+			"""
+			try:
+				while not all_added.is_set():
+					dictionary["counter"] = dictionary.get("counter", 0) + 1
+			except Exception as e: #pylint: disable=broad-except
+				errors.append(e)
+
+		def add(listeners_to_add):
+			"""
+			Adds listeners to the model, some to the instance and some to the
+			item that is being changed.
+			:param listeners_to_add: The listeners to add.
+			"""
+			try:
+				for index, listener in enumerate(listeners_to_add):
+					luna.listen.listen(listener, dictionary, "counter" if index % 2 == 0 else None)
+			except Exception as e: #pylint: disable=broad-except
+				errors.append(e)
+
+		luna.listen.listen(self.listener, dictionary) #Make sure that the model is initialised before the changing thread starts.
+		all_added = threading.Event()
+		changer = threading.Thread(target=change)
+		adders = [threading.Thread(target=add, args=(listeners[start::4],)) for start in range(4)]
+		changer.start()
+		for adder in adders:
+			adder.start()
+		for adder in adders:
+			adder.join()
+		all_added.set()
+		changer.join()
+
+		self.assertEqual(errors, [], "Adding listeners concurrently must not cause errors.")
+		dictionary["counter"] = -1
+		for listener in listeners:
+			listener.assert_called_with("counter", -1) #None of the listeners may have been lost.
+
+	def test_listen_concurrent_replace(self):
+		"""
+		Tests calling the listeners of a model while other threads keep
+		replacing their own listeners by new ones.
+
+		The old listeners get garbage collected and must be removed by later
+		changes without disturbing the listeners that are being called.
+		"""
+		dictionary = luna.listen.DictionaryModel()
+		listeners = [unittest.mock.MagicMock() for _ in range(15)] #Keep them alive, since the model only references them weakly.
+		for listener in listeners:
+			luna.listen.listen(listener, dictionary, "counter")
+		done = threading.Event()
+		errors = []
+
+		def replace():
+			"""
+			Keeps replacing a listener until the changes are done.
+			"""
+			try:
+				while not done.is_set():
+					listener = lambda attribute, value: None #The previous listener gets garbage collected.
+					luna.listen.listen(listener, dictionary, "counter")
+					time.sleep(0) #Let the changing thread take its turn.
+			except Exception as e: #pylint: disable=broad-except
+				errors.append(e)
+
+		replacers = [threading.Thread(target=replace) for _ in range(4)]
+		for replacer in replacers:
+			replacer.start()
+		try:
+			for counter in range(1000):
+				dictionary["counter"] = counter
+		finally:
+			done.set()
+			for replacer in replacers:
+				replacer.join()
+
+		self.assertEqual(errors, [], "Replacing listeners concurrently must not cause errors.")
+		for listener in listeners:
+			self.assertEqual(listener.call_count, 1000, "Every listener must be called for every change.")
+
+	def test_listen_debounce(self):
+		"""
+		Tests whether a debounced listener is only called once after a burst of
+		changes, with the latest values.
+
+		The clock and the timer are replaced, so that the test doesn't depend
+		on how fast the changes are made.
+		"""
+		with unittest.mock.patch("luna.listen.time", wraps=time) as fake_time, unittest.mock.patch("luna.listen._timer.schedule") as schedule:
+			luna.listen.listen(self.listener, self, debounce=0.05)
+			for value in range(100):
+				fake_time.monotonic.return_value = 100 + value * 0.01 #Every change is within the debounce time of the previous one.
+				self.field_integer = value
+			fake_time.monotonic.return_value = 101
+			self.field_string = "Done."
+			schedule.assert_called_once() #Only the first change schedules a call. The others postpone it.
+			deadline, deliver = schedule.call_args[0]
+			fake_time.monotonic.return_value = deadline
+			deliver()
+			self.listener.assert_not_called() #The call was postponed by the later changes.
+			deadline, deliver = schedule.call_args[0]
+			self.assertAlmostEqual(deadline, 101.05, msg="The call must be postponed until the debounce time after the last change.")
+			fake_time.monotonic.return_value = deadline
+			deliver()
+		self.assertEqual(self.listener.call_args_list, [unittest.mock.call("field_integer", 99), unittest.mock.call("field_string", "Done.")], "Only the latest value of each attribute must be delivered.")
+
+	def test_listen_debounce_and_throttle(self):
+		"""
+		Tests that a listener can't be both debounced and throttled.
+		"""
+		with self.assertRaises(ValueError):
+			luna.listen.listen(self.listener, self, debounce=1, throttle=1)
+
+	def test_listen_debounce_memory_leak(self):
+		"""
+		Tests whether a debounced listener is removed once the listener it wraps
+		is garbage collected, so that it doesn't keep scheduling calls.
+		"""
+		class Receiver:
+			"""
+			An object with a method to listen with.
+			"""
+			def receive(self, attribute, value):
+				"""
+				A listener that must never be called.
+				:param attribute: The attribute that changed.
+				:param value: The new value of the attribute.
+				"""
+				raise AssertionError("The listener was garbage collected, so it must not be called.")
+
+		receiver = Receiver()
+		receiver_ref = weakref.ref(receiver)
+		luna.listen.listen(receiver.receive, self, "field_integer", debounce=0.05)
+		receiver = None #Should delete the receiver from memory.
+		self.assertIsNone(receiver, "Just a check to prevent code optimisers from removing the deallocation of the receiver.")
+		self.assertIsNone(receiver_ref(), "The receiver must have been deallocated.")
+		with unittest.mock.patch("luna.listen._timer.schedule") as schedule:
+			self.field_integer = 2
+		schedule.assert_not_called()
+		self.assertEqual(self._attribute_listeners.get("field_integer", set()), set(), "The debounced listener must have been removed.") #pylint: disable=no-member
+
 	def test_listen_dictionary_add(self):
 		"""
 		Tests listening for new items in a dictionary.
@@ -143,6 +355,33 @@ def test_listen_simple(self):
 		self.field_integer = 1 #Triggers a change.
 		self.listener.assert_called_once_with("field_integer", 1)
 
+	def test_listen_throttle(self):
+		"""
+		Tests whether a throttled listener is called at most the allowed number
+		of times during a burst of changes, ending with the latest value.
+
+		The clock and the timer are replaced, so that the test doesn't depend
+		on how fast the changes are made.
+		"""
+		with unittest.mock.patch("luna.listen.time", wraps=time) as fake_time, unittest.mock.patch("luna.listen._timer.schedule") as schedule:
+			luna.listen.listen(self.listener, self, "field_integer", throttle=5) #At most once every 0.2 seconds.
+			fake_time.monotonic.return_value = 100
+			self.field_integer = 1
+			deadline, deliver = schedule.call_args[0]
+			self.assertEqual(deadline, 100, "The first change must be delivered right away.")
+			deliver()
+			self.listener.assert_called_once_with("field_integer", 1)
+
+			fake_time.monotonic.return_value = 100.05
+			for value in range(2, 1000):
+				self.field_integer = value
+			self.assertEqual(schedule.call_count, 2, "The burst must schedule only one call.")
+			deadline, deliver = schedule.call_args[0]
+			self.assertAlmostEqual(deadline, 100.2, msg="The next call must wait until the interval after the previous call.")
+			fake_time.monotonic.return_value = deadline
+			deliver()
+		self.assertEqual(self.listener.call_args_list, [unittest.mock.call("field_integer", 1), unittest.mock.call("field_integer", 999)], "Only the latest value must be delivered after the interval.")
+
 	def test_listen_twice(self):
 		"""
 		Tests listening for two consecutive state changes.
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+#This software is distributed under the Creative Commons license (CC0) version 1.0. A copy of this license should have been distributed with this software.
+#The license can also be read online: <https://creativecommons.org/publicdomain/zero/1.0/>. If this online license differs from the license provided with this software, the license provided with this software should be applied.
+
+"""
+Tests the engine that converts data in multiple concurrent stages.
+"""
+
+import inspect #To check whether the source got closed.
+import os #To delete temporary files.
+import tempfile #To create files to read and write.
+import threading #To cancel pipelines from another thread.
+import time #To make stages take some time.
+import unittest.mock #To check whether the output file got closed.
+
+import luna.pipeline #The module we're testing.
+import luna.tests #For parametrised tests.
+
+def _square(number):
+	"""
+	Squares a number.
+
+	This is a module-level function so that it can be sent to other processes.
+	:param number: The number to square.
+	:return: The square of the number.
+	"""
+	return number * number
+
+class TestPipeline(luna.tests.TestCase):
+	"""
+	Tests running items through a pipeline.
+	"""
+
+	def test_bounded(self):
+		"""
+		Tests whether a fast source has to wait for a slow stage.
+		"""
+		produced = 0
+		consumed = []
+		most_in_flight = 0
+
+		def source():
+			"""
+			Produces items, keeping track of how many are in flight.
+			:return: A sequence of numbers.
+			"""
+			nonlocal produced, most_in_flight
+			for number in range(100):
+				produced += 1
+				most_in_flight = max(most_in_flight, produced - len(consumed))
+				yield number
+
+		def slow(item):
+			"""
+			Consumes an item slowly.
+			:param item: The item to consume.
+			"""
+			time.sleep(0.001)
+			consumed.append(item)
+		luna.pipeline.Pipeline(source(), [luna.pipeline.Stage(slow)], queue_size=4).run()
+		self.assertEqual(consumed, list(range(100)))
+		self.assertLessEqual(most_in_flight, 4 + 2, "Only the queue and the items being handed over may be in flight.")
+
+	def test_cancel(self):
+		"""
+		Tests cancelling a pipeline from another thread.
+		"""
+		def endless():
+			"""
+			Produces items forever.
+			:return: An endless sequence of zeroes.
+			"""
+			while True:
+				yield 0
+		pipeline = luna.pipeline.Pipeline(endless(), [luna.pipeline.Stage(lambda item: time.sleep(0.001))])
+		threading.Timer(0.05, pipeline.cancel).start()
+		with self.assertRaises(luna.pipeline.PipelineCancelledError):
+			pipeline.run()
+
+	@luna.tests.parametrise({
+		"gzip": {"codec": "gzip"},
+		"bz2":  {"codec": "bz2"},
+		"xz":   {"codec": "xz"}
+	})
+	def test_compression(self, codec):
+		"""
+		Tests compressing and decompressing chunks in a pipeline.
+		:param codec: The compression format to test with.
+		"""
+		chunks = [str(number).encode("ascii") * 100 for number in range(1000)]
+		output = []
+		stages = [luna.pipeline.compress(codec), luna.pipeline.decompress(), luna.pipeline.Stage(output.append)]
+		luna.pipeline.Pipeline(chunks, stages).run()
+		self.assertEqual(b"".join(output), b"".join(chunks))
+
+	def test_error(self):
+		"""
+		Tests whether an error in a stage stops the pipeline and is raised
+		again.
+		"""
+		def fail_on_five(item):
+			"""
+			Raises an error for the fifth item.
+			:param item: The item to check.
+			:return: The same item.
+			"""
+			if item == 5:
+				raise ZeroDivisionError("Five is not allowed.")
+			return item
+		processed = []
+		stages = [luna.pipeline.Stage(fail_on_five, workers=3), luna.pipeline.Stage(processed.append)]
+		with self.assertRaises(ZeroDivisionError):
+			luna.pipeline.Pipeline(range(1000000), stages).run()
+		self.assertLess(len(processed), 1000000, "The pipeline must stop after the error.")
+
+	def test_error_closes_files(self):
+		"""
+		Tests whether the files that a pipeline reads and writes are closed if
+		the pipeline fails.
+		"""
+		handle, source = tempfile.mkstemp()
+		os.close(handle)
+		try:
+			with open(source, "wb") as source_file:
+				source_file.write(b"Callisto" * 1000)
+			chunks = luna.pipeline.read(source, chunk_size=100)
+			with unittest.mock.patch("luna.stream.BytesStreamWriter") as writer_class:
+				writer_class.return_value.write.side_effect = OSError("The disk is full.")
+				with self.assertRaises(OSError):
+					luna.pipeline.Pipeline(chunks, [luna.pipeline.write("output.txt")]).run()
+			writer_class.return_value.close.assert_called_once_with()
+			self.assertEqual(inspect.getgeneratorstate(chunks), inspect.GEN_CLOSED, "The source file must be closed.")
+		finally:
+			os.remove(source)
+
+	def test_expand_finish(self):
+		"""
+		Tests stages that split items and hold back data until the end.
+		"""
+		output = []
+		stages = [luna.pipeline.split(b";"), luna.pipeline.Stage(output.append)]
+		luna.pipeline.Pipeline([b"Io;Eu", b"ro", b"pa;Gany", b"mede"], stages).run()
+		self.assertEqual(output, [b"Io", b"Europa", b"Ganymede"])
+
+	@luna.tests.parametrise({
+		"straddling": {"chunks": [b"Io<", b"|>Europa<|", b">Ganymede<", b"|>"], "records": [b"Io", b"Europa", b"Ganymede"]},
+		"long":       {"chunks": [b"Call"] + [b"isto"] * 1000 + [b"<|>Io"], "records": [b"Call" + b"isto" * 1000, b"Io"]},
+		"many":       {"chunks": [b"<|>".join([b"Io"] * 100)], "records": [b"Io"] * 100},
+		"empty":      {"chunks": [b"<|><|>Io<|>"], "records": [b"", b"", b"Io"]}
+	})
+	def test_split(self, chunks, records):
+		"""
+		Tests splitting chunks into records with a delimiter of multiple
+		bytes, which may be cut in half by the edges of the chunks.
+		:param chunks: The chunks to split.
+		:param records: The records that must come out.
+		"""
+		output = []
+		stages = [luna.pipeline.split(b"<|>"), luna.pipeline.Stage(output.append)]
+		luna.pipeline.Pipeline(chunks, stages).run()
+		self.assertEqual(output, records)
+
+	def test_split_max_record_size(self):
+		"""
+		Tests whether splitting fails if a record doesn't end in time.
+		"""
+		stages = [luna.pipeline.split(b"\n", max_record_size=10)]
+		luna.pipeline.Pipeline([b"Io\nEuropa\nGan", b"ymede\n"], stages).run() #Records up to the maximum are allowed.
+		with self.assertRaises(ValueError):
+			luna.pipeline.Pipeline([b"Io\nCall", b"isto", b"isto"], [luna.pipeline.split(b"\n", max_record_size=10)]).run()
+
+	def test_expand_finish(self):
+		"""
+		Tests stages that split items and hold back data until the end.
+		"""
+		output = []
+		stages = [luna.pipeline.split(b";"), luna.pipeline.Stage(output.append)]
+		luna.pipeline.Pipeline([b"Io;Eu", b"ro", b"pa;Gany", b"mede"], stages).run()
+		self.assertEqual(output, [b"Io", b"Europa", b"Ganymede"])
+
+	def test_files(self):
+		"""
+		Tests streaming a file through a pipeline to another file.
+		"""
+		handle, source = tempfile.mkstemp()
+		os.close(handle)
+		handle, destination = tempfile.mkstemp()
+		os.close(handle)
+		try:
+			with open(source, "wb") as source_file:
+				source_file.write(b"\n".join(str(number).encode("ascii") for number in range(10000)))
+			stages = [
+				luna.pipeline.split(b"\n"),
+				luna.pipeline.Stage(lambda record: str(int(record) * 2).encode("ascii"), workers=4),
+				luna.pipeline.join(b","),
+				luna.pipeline.write(destination)
+			]
+			luna.pipeline.Pipeline(luna.pipeline.read(source, chunk_size=1000), stages).run()
+			with open(destination, "rb") as destination_file:
+				self.assertEqual(destination_file.read(), b",".join(str(number * 2).encode("ascii") for number in range(10000)))
+		finally:
+			os.remove(source)
+			os.remove(destination)
+
+	def test_write_lazy(self):
+		"""
+		Tests whether the file that a pipeline writes to is only opened when
+		the pipeline runs.
+		"""
+		handle, destination = tempfile.mkstemp()
+		os.close(handle)
+		try:
+			with open(destination, "wb") as destination_file:
+				destination_file.write(b"Callisto")
+			luna.pipeline.write(destination) #Never runs.
+			with self.assertRaises(ZeroDivisionError):
+				luna.pipeline.Pipeline([b"Io"], [luna.pipeline.Stage(lambda chunk: 1 / 0), luna.pipeline.write(destination)]).run()
+			with open(destination, "rb") as destination_file:
+				self.assertEqual(destination_file.read(), b"Callisto", "The file must not be truncated if nothing got written.")
+			luna.pipeline.Pipeline([], [luna.pipeline.write(destination)]).run()
+			with open(destination, "rb") as destination_file:
+				self.assertEqual(destination_file.read(), b"", "A pipeline without items must still write an empty file.")
+		finally:
+			os.remove(destination)
+
+	def test_metrics(self):
+		"""
+		Tests counting the items and bytes that every stage produces.
+		"""
+		pipeline = luna.pipeline.Pipeline([b"abc", b"defg"], [luna.pipeline.Stage(lambda chunk: chunk * 2, name="double"), luna.pipeline.Stage(lambda chunk: None)])
+		pipeline.run()
+		metrics = pipeline.metrics()
+		self.assertEqual([entry["name"] for entry in metrics], ["source", "double", "<lambda>"])
+		self.assertEqual(metrics[0]["bytes"], 7)
+		self.assertEqual(metrics[1]["items"], 2)
+		self.assertEqual(metrics[1]["bytes"], 14)
+
+	@luna.tests.parametrise({
+		"single": {"workers": 1, "processes": False},
+		"threads": {"workers": 4, "processes": False},
+		"processes": {"workers": 2, "processes": True}
+	})
+	def test_order(self, workers, processes):
+		"""
+		Tests whether the order of the items is retained with multiple
+		workers.
+		:param workers: The number of workers of the stage.
+		:param processes: Whether the workers are processes.
+		"""
+		output = []
+		stages = [luna.pipeline.Stage(_square, workers=workers, processes=processes), luna.pipeline.Stage(output.append)]
+		luna.pipeline.Pipeline(range(200), stages).run()
+		self.assertEqual(output, [number * number for number in range(200)])
+
+	def test_stateful_workers(self):
+		"""
+		Tests whether stages with state refuse to use multiple workers.
+		"""
+		with self.assertRaises(ValueError):
+			luna.pipeline.Stage(_square, workers=2, finish=lambda: None)
\ No newline at end of file
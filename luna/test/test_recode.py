@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+#This software is distributed under the Creative Commons license (CC0) version 1.0. A copy of this license should have been distributed with this software.
+#The license can also be read online: <https://creativecommons.org/publicdomain/zero/1.0/>. If this online license differs from the license provided with this software, the license provided with this software should be applied.
+
+"""
+Tests converting text between character encodings in parallel chunks.
+"""
+
+import os #To delete temporary files.
+import tempfile #To create files to convert.
+import unittest.mock #To simulate a host with big-endian byte order.
+
+import luna.recode #The module we're testing.
+import luna.tests #For parametrised tests.
+
+_TEXT = "Sîne klâwen durh die wolken sint geslagen 😀 漢字\n" * 500
+"""
+Text with characters of every length in UTF-8 and UTF-16, long enough to be
+split into many chunks.
+"""
+
+class TestRecode(luna.tests.TestCase):
+	"""
+	Tests converting text between character encodings.
+	"""
+
+	@luna.tests.parametrise({
+		"utf8":        {"encoding": "utf-8", "expected": True},
+		"utf8_bom":    {"encoding": "utf-8-sig", "expected": True},
+		"utf16":       {"encoding": "UTF-16", "expected": True},
+		"utf32_be":    {"encoding": "utf_32_be", "expected": True},
+		"latin1":      {"encoding": "latin-1", "expected": True},
+		"windows1252": {"encoding": "cp1252", "expected": True},
+		"shift_jis":   {"encoding": "shift_jis", "expected": False},
+		"iso2022":     {"encoding": "iso2022_jp", "expected": False}
+	})
+	def test_can_split(self, encoding, expected):
+		"""
+		Tests determining whether encodings can be split into independent
+		chunks.
+		:param encoding: The encoding to test.
+		:param expected: Whether the encoding must be splittable.
+		"""
+		self.assertEqual(luna.recode.can_split(encoding), expected)
+
+	def test_decode_error(self):
+		"""
+		Tests converting invalid input with strict error handling.
+		"""
+		with self.assertRaises(UnicodeDecodeError):
+			luna.recode.recode(b"abc\xffdef" * 100, lambda chunk: None, "utf-8", "utf-16", chunk_size=64, workers=2)
+
+	def test_file(self):
+		"""
+		Tests converting a file to another file.
+		"""
+		handle, source = tempfile.mkstemp()
+		os.close(handle)
+		handle, destination = tempfile.mkstemp()
+		os.close(handle)
+		try:
+			with open(source, "wb") as source_file:
+				source_file.write(_TEXT.encode("utf-8"))
+			luna.recode.recode(source, destination, "utf-8", "utf-16-le", chunk_size=1000, workers=2)
+			with open(destination, "rb") as destination_file:
+				self.assertEqual(destination_file.read(), _TEXT.encode("utf-16-le"))
+		finally:
+			os.remove(source)
+			os.remove(destination)
+
+	@luna.tests.parametrise({
+		"utf8_utf16":       {"source_encoding": "utf-8", "target_encoding": "utf-16"},
+		"utf16_utf8":       {"source_encoding": "utf-16", "target_encoding": "utf-8"},
+		"utf16be_utf8_bom": {"source_encoding": "utf-16-be", "target_encoding": "utf-8-sig"},
+		"utf8_bom_utf32":   {"source_encoding": "utf-8-sig", "target_encoding": "utf-32"},
+		"utf32_utf16le":    {"source_encoding": "utf-32", "target_encoding": "utf-16-le"},
+		"latin1_utf8":      {"source_encoding": "latin-1", "target_encoding": "utf-8", "text": "Ðe wîse mân\n" * 500},
+		"shift_jis_utf8":   {"source_encoding": "shift_jis", "target_encoding": "utf-8", "text": "漢字とかな\n" * 500}
+	})
+	def test_recode(self, source_encoding, target_encoding, text=_TEXT):
+		"""
+		Tests converting text in small chunks, so that the chunk boundaries fall
+		inside of characters.
+		:param source_encoding: The encoding of the input.
+		:param target_encoding: The encoding to convert to.
+		:param text: The text to convert.
+		"""
+		data = text.encode(source_encoding)
+		output = []
+		luna.recode.recode([data[start:start + 777] for start in range(0, len(data), 777)], output.append, source_encoding, target_encoding, chunk_size=1001, workers=3)
+		self.assertEqual(b"".join(output), text.encode(target_encoding), "The output must be the same as when converting all at once.")
+
+	def test_utf16_big_endian_bom(self):
+		"""
+		Tests whether the byte order mark at the start of the input is used for
+		all chunks.
+		"""
+		data = b"\xfe\xff" + _TEXT.encode("utf-16-be")
+		output = []
+		luna.recode.recode(data, output.append, "utf-16", "utf-8", chunk_size=1001, workers=2)
+		self.assertEqual(b"".join(output), _TEXT.encode("utf-8"))
+	@unittest.mock.patch("sys.byteorder", "big")
+	def test_utf16_big_endian_host(self):
+		"""
+		Tests whether surrogate pairs in UTF-16 are kept together on a host
+		with big-endian byte order.
+
+		The decoder state is relative to the native byte order, so on such a
+		host, a state of 0 means big-endian input.
+		"""
+		data = ("a" * 499 + "😀").encode("utf-16-be") * 10 #The first half of a surrogate pair at the end of every chunk.
+		with unittest.mock.patch("luna.recode._decoder_continuation_state", lambda encoding, head: (b"", 0)): #What a big-endian host gives for big-endian input.
+			splitter = luna.recode._Splitter("utf-16", "utf-8", "strict", 1001) #pylint: disable=protected-access
+			tasks = splitter(data)
+		self.assertGreater(len(tasks), 1, "The input must be split.")
+		for task in tasks:
+			task[0].decode("utf-16-be") #Raises an error if a surrogate pair got split.
@@ -0,0 +1,586 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+#This software is distributed under the Creative Commons license (CC0) version 1.0. A copy of this license should have been distributed with this software.
+#The license can also be read online: <https://creativecommons.org/publicdomain/zero/1.0/>. If this online license differs from the license provided with this software, the license provided with this software should be applied.
+
+"""
+Tests the streams that help with streaming data between components.
+"""
+
+import asyncio #To test the asynchronous streams.
+import bz2 #To create compressed test data.
+import gzip #To create compressed test data.
+import io #To wrap streams around in-memory data.
+import lzma #To create compressed test data.
+import os #To delete temporary files.
+import pathlib #To create file URIs.
+import tempfile #To create files to map into memory.
+import unittest.mock #To check whether sinks get closed.
+
+import luna.stream #The module we're testing.
+import luna.tests #For parametrised tests.
+
+class TestAsyncBytesStreamReader(luna.tests.TestCase):
+	"""
+	Tests the reader that reads streams in the background for ``asyncio``.
+	"""
+
+	def test_iterate(self):
+		"""
+		Tests iterating over the chunks of a stream with ``async for``.
+		"""
+		data = bytes(range(256)) * 10
+
+		async def read_all():
+			"""
+			Reads all chunks of the stream.
+			:return: A list of the chunks.
+			"""
+			async with luna.stream.AsyncBytesStreamReader(data, buffer_size=100) as reader:
+				return [chunk async for chunk in reader]
+		chunks = asyncio.run(read_all())
+		self.assertEqual(b"".join(chunks), data, "Together the chunks must form the whole stream.")
+		self.assertEqual(len(chunks[0]), 100, "The chunks must be of the buffer size.")
+
+	def test_iterate_stop_early(self):
+		"""
+		Tests reading from the stream after stopping the iteration early.
+		"""
+		async def read_some():
+			"""
+			Reads the first chunk by iterating, then reads the rest.
+			:return: The first chunk and the rest.
+			"""
+			reader = luna.stream.AsyncBytesStreamReader(b"ABCDEFGHIJ", buffer_size=3)
+			iterator = reader.__aiter__()
+			first = await iterator.__anext__()
+			await iterator.aclose()
+			return first, await reader.read()
+		first, rest = asyncio.run(read_some())
+		self.assertEqual(first, b"ABC")
+		self.assertEqual(rest, b"DEFGHIJ", "The chunk that was read ahead must not be lost.")
+
+	def test_iterate_stop_early_partial(self):
+		"""
+		Tests reading parts of the chunk that was read ahead and iterating again
+		after stopping the iteration early.
+		"""
+		async def read_some():
+			"""
+			Breaks out of the iteration after the first chunk, then reads the
+			rest in different ways.
+			:return: All pieces that were read, in order.
+			"""
+			reader = luna.stream.AsyncBytesStreamReader(b"ABCDEFGHIJ", buffer_size=3)
+			pieces = []
+			async for chunk in reader:
+				pieces.append(chunk)
+				break
+			pieces.append(await reader.read(1))
+			pieces.append(await reader.readexactly(3))
+			async for chunk in reader:
+				pieces.append(chunk)
+			return pieces
+		pieces = asyncio.run(read_some())
+		self.assertEqual(pieces[:3], [b"ABC", b"D", b"EFG"])
+		self.assertEqual(b"".join(pieces), b"ABCDEFGHIJ", "Nothing may be lost or read twice.")
+
+	def test_close_after_error(self):
+		"""
+		Tests whether the wrapped stream gets closed if reading ahead failed.
+		"""
+		wrapped = unittest.mock.MagicMock()
+		wrapped.read.side_effect = [b"Tit", OSError("The disk is gone.")]
+
+		async def read():
+			"""
+			Reads the first chunk, which starts reading ahead, then closes the
+			reader.
+			"""
+			reader = luna.stream.AsyncBytesStreamReader(wrapped, buffer_size=3)
+			async for _ in reader:
+				break
+			await reader.close()
+		with self.assertRaises(OSError):
+			asyncio.run(read())
+		wrapped.close.assert_called_once_with()
+
+	def test_readexactly(self):
+		"""
+		Tests reading an exact number of bytes.
+		"""
+		async def read():
+			"""
+			Reads some bytes, then more than there are in the stream.
+			:return: The bytes that were read first.
+			"""
+			reader = luna.stream.AsyncBytesStreamReader(b"Saturn")
+			result = await reader.readexactly(3)
+			with self.assertRaises(asyncio.IncompleteReadError) as context:
+				await reader.readexactly(5)
+			self.assertEqual(context.exception.partial, b"urn", "The incomplete data must be in the exception.")
+			return result
+		self.assertEqual(asyncio.run(read()), b"Sat")
+
+class TestAsyncBytesStreamWriter(luna.tests.TestCase):
+	"""
+	Tests the writer that writes streams in the background for ``asyncio``.
+	"""
+
+	def test_close_after_error(self):
+		"""
+		Tests whether the wrapped stream gets closed if writing the last data
+		failed.
+		"""
+		wrapped = unittest.mock.MagicMock()
+		wrapped.write.side_effect = OSError("The disk is full.")
+
+		async def write():
+			"""
+			Writes a little data, which is only written when closing.
+			"""
+			async with luna.stream.AsyncBytesStreamWriter(wrapped, high_water=8) as writer:
+				writer.write(b"Io")
+		with self.assertRaises(OSError):
+			asyncio.run(write())
+		wrapped.close.assert_called_once_with()
+
+	def test_write(self):
+		"""
+		Tests writing data in multiple parts.
+		"""
+		sink = io.BytesIO()
+		sink.close = lambda: None #Keep the data available after the writer closes it.
+
+		async def write():
+			"""
+			Writes a lot of data to the sink.
+			"""
+			async with luna.stream.AsyncBytesStreamWriter(sink, high_water=100) as writer:
+				for index in range(100):
+					writer.write(bytes([index]) * 10)
+					await writer.drain()
+					self.assertLess(len(writer._buffer), 100, "After draining, the buffer must be below the high-water mark.") #pylint: disable=protected-access
+				writer.writelines([memoryview(b"Uranus"), b"Neptune"])
+		asyncio.run(write())
+		self.assertEqual(sink.getvalue(), b"".join(bytes([index]) * 10 for index in range(100)) + b"UranusNeptune")
+
+class TestBytesStreamReader(luna.tests.TestCase):
+	"""
+	Tests the reader that allows iterating over a stream in bytes and chunks.
+	"""
+
+	@luna.tests.parametrise({
+		"empty":       {"data": b""},
+		"single_byte": {"data": b"L"},
+		"lines":       {"data": b"Luna\nis\na\nmoon.\n"},
+		"binary":      {"data": bytes(range(256)) * 10}
+	})
+	def test_iter_bytes(self, data):
+		"""
+		Tests iterating over the individual bytes of a stream.
+		:param data: The data in the stream.
+		"""
+		reader = luna.stream.BytesStreamReader(data, buffer_size=7)
+		self.assertEqual(list(reader), list(data), "Iterating must give every byte of the stream, regardless of line breaks.")
+
+	@luna.tests.parametrise({
+		"empty":     {"data": b"", "size": 4},
+		"exact":     {"data": b"12345678", "size": 4},
+		"remainder": {"data": b"123456789", "size": 4},
+		"large":     {"data": b"123", "size": 4096}
+	})
+	def test_iter_chunks(self, data, size):
+		"""
+		Tests iterating over chunks of a stream.
+		:param data: The data in the stream.
+		:param size: The size of the chunks to iterate over.
+		"""
+		reader = luna.stream.BytesStreamReader(io.BytesIO(data))
+		chunks = list(reader.iter_chunks(size))
+		self.assertEqual(b"".join(chunks), data, "Together the chunks must form the whole stream.")
+		for chunk in chunks[:-1]:
+			self.assertEqual(len(chunk), size, "Only the last chunk may be smaller than the requested size.")
+
+	def test_iter_views(self):
+		"""
+		Tests iterating over views on a reusable buffer.
+		"""
+		data = bytes(range(100))
+		reader = luna.stream.BytesStreamReader(data, buffer_size=16)
+		result = bytearray()
+		views = []
+		for view in reader.iter_views():
+			result += view
+			views.append(view)
+		self.assertEqual(result, data, "Together the views must form the whole stream.")
+		self.assertEqual(views[0].obj, views[-1].obj, "All views must be on the same buffer.")
+
+	def test_readinto(self):
+		"""
+		Tests reading into a pre-allocated buffer.
+		"""
+		reader = luna.stream.BytesStreamReader(b"Ghostkeeper")
+		buffer = bytearray(5)
+		self.assertEqual(reader.readinto(buffer), 5)
+		self.assertEqual(buffer, b"Ghost")
+		self.assertEqual(reader.readinto(buffer), 5)
+		self.assertEqual(buffer, b"keepe")
+		self.assertEqual(reader.readinto(buffer), 1, "Only one byte is left.")
+		self.assertEqual(buffer[:1], b"r")
+		self.assertEqual(reader.readinto(buffer), 0, "The stream has ended.")
+
+class TestBytesStreamWriter(luna.tests.TestCase):
+	"""
+	Tests the writer that collects data and writes it in large blocks.
+	"""
+
+	def test_blocks(self):
+		"""
+		Tests whether small writes are combined into large blocks.
+		"""
+		blocks = []
+		with luna.stream.BytesStreamWriter(lambda block: blocks.append(bytes(block)), high_water=10) as writer:
+			for _ in range(7):
+				writer.write(b"abc")
+		self.assertEqual(b"".join(blocks), b"abc" * 7)
+		self.assertEqual(blocks, [b"abcabcabc", b"abcabcabc", b"abc"], "Writes must be combined until the buffer is full.")
+
+	def test_close_after_error(self):
+		"""
+		Tests whether the sink gets closed if writing the last data failed.
+		"""
+		sink = unittest.mock.MagicMock()
+		sink.write.side_effect = OSError("The disk is full.")
+		writer = luna.stream.BytesStreamWriter(sink, high_water=8)
+		writer.write(b"Io")
+		with self.assertRaises(OSError):
+			writer.close()
+		sink.close.assert_called_once_with()
+
+	def test_close_twice(self):
+		"""
+		Tests whether closing a stream a second time has no effect, and
+		whether the stream can't be used after closing.
+		"""
+		sink = io.BytesIO()
+		with luna.stream.BytesStreamWriter(sink) as writer:
+			writer.write(b"Io")
+			writer.close() #Closed explicitly and then again when leaving the ``with`` block.
+		self.assertTrue(sink.closed)
+		with self.assertRaises(ValueError):
+			writer.write(b"Europa")
+		with self.assertRaises(ValueError):
+			writer.flush()
+
+	def test_large_write(self):
+		"""
+		Tests writing data that is larger than the buffer.
+		"""
+		blocks = []
+		with luna.stream.BytesStreamWriter(lambda block: blocks.append(bytes(block)), high_water=4) as writer:
+			writer.write(b"Io")
+			writer.write(b"Callisto")
+			writer.write(b"!")
+		self.assertEqual(blocks, [b"Io", b"Callisto", b"!"], "The large write must be passed on directly after the buffered data.")
+
+	def test_writelines(self):
+		"""
+		Tests writing a sequence of memoryviews to a stream.
+		"""
+		sink = io.BytesIO()
+		data = memoryview(b"Ganymede and Europa")
+		writer = luna.stream.BytesStreamWriter(sink, high_water=8)
+		writer.writelines([data[0:8], data[8:13], data[13:]])
+		writer.flush()
+		self.assertEqual(sink.getvalue(), b"Ganymede and Europa")
+
+class TestCompression(luna.tests.TestCase):
+	"""
+	Tests compressing and decompressing streams.
+	"""
+
+	@luna.tests.parametrise({
+		"gzip": {"codec": "gzip", "compress": gzip.compress},
+		"bz2":  {"codec": "bz2", "compress": bz2.compress},
+		"xz":   {"codec": "xz", "compress": lzma.compress}
+	})
+	def test_detect(self, codec, compress):
+		"""
+		Tests detecting the compression format and decompressing data that was
+		compressed by the standard library.
+		:param codec: The compression format that must be detected.
+		:param compress: A function that compresses data in that format.
+		"""
+		data = bytes(range(256)) * 1000
+		compressed = compress(data)
+		self.assertEqual(luna.stream.detect_compression(compressed), codec)
+		with luna.stream.DecompressingStreamReader(compressed, buffer_size=1000) as reader:
+			self.assertEqual(b"".join(reader.iter_chunks()), data)
+
+	def test_bounded(self):
+		"""
+		Tests whether data that was compressed very well is decompressed only a
+		piece at a time.
+		"""
+		compressed = gzip.compress(bytes(100 * 1024 * 1024))
+		pieces = luna.stream.Decompressor(piece_size=1000).feed(compressed)
+		self.assertEqual(len(next(pieces)), 1000, "Only one piece may be decompressed at a time.")
+
+	def test_close_after_error(self):
+		"""
+		Tests whether the sink gets closed if compressing the data failed.
+		"""
+		def write(data):
+			"""
+			Fails to write the first time.
+			:param data: The data to write.
+			"""
+			if sink.write.call_count == 1:
+				raise OSError("The disk is full.")
+		sink = unittest.mock.MagicMock()
+		sink.write.side_effect = write
+		data = os.urandom(100000) #Doesn't compress, so it's written soon.
+		with self.assertRaises(OSError):
+			with luna.stream.CompressingStreamWriter(sink, high_water=1000) as writer:
+				for start in range(0, len(data), 1000):
+					writer.write(data[start:start + 1000])
+		sink.close.assert_called_once_with()
+
+	def test_close_twice(self):
+		"""
+		Tests whether closing a compressing stream a second time has no effect,
+		and whether the stream can't be used after closing.
+		"""
+		sink = io.BytesIO()
+		with luna.stream.CompressingStreamWriter(sink) as writer:
+			writer.write(b"Io")
+			writer.close() #Closed explicitly and then again when leaving the ``with`` block.
+		self.assertTrue(sink.closed)
+		with self.assertRaises(ValueError):
+			writer.write(b"Europa")
+		with self.assertRaises(ValueError):
+			writer.flush()
+
+	def test_concatenated(self):
+		"""
+		Tests decompressing multiple concatenated compressed streams.
+		"""
+		compressed = gzip.compress(b"Io, ") + gzip.compress(b"Europa")
+		self.assertEqual(luna.stream.DecompressingStreamReader(compressed).read(), b"Io, Europa")
+
+	@luna.tests.parametrise({
+		"gzip": {"compress": gzip.compress},
+		"bz2":  {"compress": bz2.compress},
+		"xz":   {"compress": lzma.compress}
+	})
+	def test_concatenated_large(self, compress):
+		"""
+		Tests decompressing concatenated compressed streams of which the first
+		one ends while the decompressed pieces are limited in size.
+		:param compress: A function that compresses data in the format to test
+		with.
+		"""
+		first = bytes(range(256)) * 2000
+		second = b"".join(str(number).encode("ascii") for number in range(100000))
+		compressed = compress(first) + compress(b"Io") + compress(second)
+		decompressor = luna.stream.Decompressor(piece_size=1000)
+		self.assertEqual(b"".join(decompressor.feed(compressed)) + b"".join(decompressor.finish()), first + b"Io" + second)
+
+	@luna.tests.parametrise({
+		"gzip": {"codec": "gzip"},
+		"bz2":  {"codec": "bz2"},
+		"xz":   {"codec": "xz"}
+	})
+	def test_round_trip(self, codec):
+		"""
+		Tests compressing a stream and decompressing it again.
+		:param codec: The compression format to test with.
+		"""
+		data = b"".join(str(number).encode("ascii") for number in range(100000))
+		sink = io.BytesIO()
+		sink.close = lambda: None #Keep the data readable after closing the writer.
+		with luna.stream.CompressingStreamWriter(sink, codec, high_water=1000) as writer:
+			for start in range(0, len(data), 777):
+				writer.write(data[start:start + 777])
+		self.assertEqual(luna.stream.DecompressingStreamReader(sink.getvalue(), codec=codec).read(), data)
+
+	def test_truncated(self):
+		"""
+		Tests decompressing data that ends before the end of the compressed
+		stream.
+		"""
+		compressed = gzip.compress(bytes(range(256)) * 100)
+		with self.assertRaises(EOFError):
+			luna.stream.DecompressingStreamReader(compressed[:-20]).read()
+
+	def test_unknown(self):
+		"""
+		Tests decompressing data that is not compressed.
+		"""
+		self.assertIsNone(luna.stream.detect_compression(b"Not compressed"))
+		with self.assertRaises(ValueError):
+			luna.stream.DecompressingStreamReader(b"Not compressed").read()
+
+class TestMappedStreamReader(luna.tests.TestCase):
+	"""
+	Tests the reader that maps files into memory.
+	"""
+
+	def setUp(self):
+		"""
+		Creates a file to read from.
+		"""
+		self.data = b"The quick brown fox jumps over the lazy dog."
+		with tempfile.NamedTemporaryFile(delete=False) as file_handle:
+			file_handle.write(self.data)
+			self.path = file_handle.name
+
+	def tearDown(self):
+		"""
+		Deletes the file that was read from.
+		"""
+		os.remove(self.path)
+
+	def test_close_with_views(self):
+		"""
+		Tests closing while a view on the file has not been released yet.
+		"""
+		reader = luna.stream.MappedStreamReader(self.path)
+		view = reader[4:9]
+		with self.assertRaises(BufferError):
+			reader.close()
+		self.assertTrue(reader._file.closed, "The file must be closed even if it can't be unmapped.") #pylint: disable=protected-access
+		view.release()
+		reader.close() #Now it can be unmapped.
+		self.assertTrue(reader._map.closed) #pylint: disable=protected-access
+
+	def test_empty(self):
+		"""
+		Tests reading from an empty file, which can't actually be mapped.
+		"""
+		with open(self.path, "wb"): #Truncate the file.
+			pass
+		with luna.stream.MappedStreamReader(self.path) as reader:
+			self.assertEqual(len(reader), 0)
+			self.assertEqual(reader.read(), b"")
+			self.assertEqual(reader.find(b"fox"), -1)
+			self.assertEqual(list(reader.iter_chunks()), [])
+
+	def test_find(self):
+		"""
+		Tests searching in the file.
+		"""
+		with luna.stream.MappedStreamReader(self.path) as reader:
+			self.assertEqual(reader.find(b"fox"), self.data.find(b"fox"))
+			self.assertEqual(reader.find(b"the", 5), self.data.find(b"the", 5), "Searching must start at the specified position.")
+			self.assertEqual(reader.find(b"dog", 0, 10), -1, "The dog is beyond the end of the search range.")
+			reader.seek(20)
+			self.assertEqual(reader.find(b"quick"), -1, "Searching must start from the current position by default.")
+
+	def test_iter_views(self):
+		"""
+		Tests iterating over chunks of the file.
+		"""
+		with luna.stream.MappedStreamReader(self.path, buffer_size=10) as reader:
+			views = list(reader.iter_views())
+			self.assertEqual(b"".join(views), self.data, "Together the views must form the whole file.")
+			self.assertEqual(len(views[0]), 10, "The chunks must be of the buffer size.")
+			for view in views:
+				view.release() #Must release all views before the file can be closed.
+
+	def test_random_access(self):
+		"""
+		Tests accessing parts of the file without changing the position.
+		"""
+		with luna.stream.MappedStreamReader(self.path) as reader:
+			self.assertEqual(len(reader), len(self.data))
+			self.assertEqual(reader[4], self.data[4])
+			with reader[4:9] as view:
+				self.assertIsInstance(view, memoryview, "Slices must not be copied.")
+				self.assertEqual(view, b"quick")
+			self.assertEqual(reader.tell(), 0, "Random access must not move the position.")
+
+	def test_read_seek(self):
+		"""
+		Tests reading sequentially and seeking to different positions.
+		"""
+		with luna.stream.MappedStreamReader(self.path) as reader:
+			self.assertEqual(reader.read(3), b"The")
+			self.assertEqual(reader.seek(4), 4)
+			self.assertEqual(reader.read(5), b"quick")
+			reader.seek(-4, io.SEEK_END)
+			self.assertEqual(reader.read(), b"dog.")
+			self.assertEqual(reader.read(), b"", "The end of the file was reached.")
+
+	def test_read_beyond_end(self):
+		"""
+		Tests reading after seeking beyond the end of the file.
+		"""
+		with luna.stream.MappedStreamReader(self.path) as reader:
+			reader.seek(len(self.data) + 10)
+			with reader.read_view(5) as view:
+				self.assertEqual(view, b"", "There is nothing to read beyond the end.")
+			self.assertEqual(reader.read(), b"")
+			self.assertEqual(reader.tell(), len(self.data) + 10, "Reading must not move the position back to the end.")
+
+	def test_uri(self):
+		"""
+		Tests opening a file by its URI, like the storage plug-ins use.
+		"""
+		with luna.stream.MappedStreamReader(pathlib.Path(self.path).as_uri()) as reader:
+			self.assertEqual(reader.read(), self.data)
+
+class TestPeekableStream(luna.tests.TestCase):
+	"""
+	Tests the stream that allows looking ahead without consuming the data.
+	"""
+
+	def test_peek(self):
+		"""
+		Tests looking ahead and then reading the same data.
+		"""
+		stream = luna.stream.PeekableStream(b"Ghostkeeper", look_ahead=8)
+		self.assertEqual(stream.peek(5), b"Ghost")
+		self.assertEqual(stream.peek(), b"Ghostkee", "Without size, the maximum look-ahead is used.")
+		self.assertEqual(stream.read(3), b"Gho", "Peeking must not consume the data.")
+		self.assertEqual(stream.peek(3), b"stk")
+		self.assertEqual(stream.read(), b"stkeeper", "Reading must return the peeked data followed by the rest of the stream.")
+
+	def test_peek_end(self):
+		"""
+		Tests looking ahead beyond the end of the stream.
+		"""
+		stream = luna.stream.PeekableStream(b"moon", look_ahead=8)
+		self.assertEqual(stream.peek(), b"moon", "Looking ahead beyond the end gives only what's in the stream.")
+		self.assertEqual(list(stream.iter_chunks(3)), [b"moo", b"n"])
+
+	def test_peek_too_far(self):
+		"""
+		Tests that looking ahead is bounded.
+		"""
+		stream = luna.stream.PeekableStream(b"Mercury, Venus, Earth, Mars", look_ahead=4)
+		with self.assertRaises(ValueError):
+			stream.peek(5)
+
+	def test_read_beyond_peeked(self):
+		"""
+		Tests reading more bytes than were looked ahead at.
+		"""
+		stream = luna.stream.PeekableStream(b"Jupiter")
+		stream.peek(3)
+		self.assertEqual(stream.read(5), b"Jupit", "The rest must be read from the stream, rather than returning only the peeked bytes.")
+		self.assertEqual(stream.read(5), b"er", "Only at the end of the stream may fewer bytes be returned.")
+
+	def test_readinto(self):
+		"""
+		Tests reading into a buffer after looking ahead.
+		"""
+		stream = luna.stream.PeekableStream(b"Jupiter")
+		stream.peek(3)
+		buffer = bytearray(5)
+		self.assertEqual(stream.readinto(buffer), 3, "First the peeked bytes are returned.")
+		self.assertEqual(buffer[:3], b"Jup")
+		self.assertEqual(stream.readinto(buffer), 4)
+		self.assertEqual(buffer[:4], b"iter")
\ No newline at end of file
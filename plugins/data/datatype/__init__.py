@@ -48,7 +48,14 @@ def validate_metadata(data_metadata):
 	Data metadata must have a ``deserialise``, ``is_instance``,
 	``is_serialised`` and a ``serialise`` field, which must all contain callable
 	objects, such as functions. The metadata may also not contain a partial
-	implementation of MIME types.
+	implementation of MIME types. The batch variants ``deserialise_many`` and
+	``serialise_many`` and the streaming variants ``deserialise_stream`` and
+	``serialise_stream`` are optional, but must be callable if present. If the
+	metadata declares ``instance_types``, it must be a sequence of classes.
+	If it declares ``magic`` prefixes, they must be a sequence of non-empty
+	``bytes``. A ``sniff_length`` must be a positive integer and a
+	``pre_filter`` must be callable. Direct ``converters`` to other data types
+	must be a dictionary from data types to callables.
 	:param data_metadata: The metadata to validate.
 	:raises luna.plugins.MetadataValidationError: The metadata was invalid.
 	"""
@@ -64,6 +71,10 @@ def validate_metadata(data_metadata):
 				raise luna.plugins.MetadataValidationError("The {entry} entry is not callable.".format(entry=required_function))
 	except (AttributeError, TypeError):
 		raise luna.plugins.MetadataValidationError("The data metadata entry is not a dictionary.")
+	optional_functions = {"deserialise_many", "deserialise_stream", "serialise_many", "serialise_stream"} #Batch and streaming variants of the required functions.
+	for optional_function in optional_functions & data_metadata["data"].keys():
+		if not callable(data_metadata["data"][optional_function]):
+			raise luna.plugins.MetadataValidationError("The {entry} entry is not callable.".format(entry=optional_function))
 
 	mime_type_entries = {"mime_type", "name"} #If one of these is present, the others must be too.
 	optional_mime_type_entries = {"extensions"} #If one of these is present, the required MIME type entries must be too.
@@ -76,4 +87,32 @@ def validate_metadata(data_metadata):
 			if not hasattr(data_metadata["data"]["extensions"], "__iter__"): #Must be a sequence.
 				raise luna.plugins.MetadataValidationError("The extensions for the MIME type in the data plug-in are not a sequence.")
 			if isinstance(data_metadata["data"]["extensions"], str): #We want to disallow strings, since iterating over them gives single characters instead of proper extensions, without giving errors at runtime.
-				raise luna.plugins.MetadataValidationError("The extensions for the MIME type in the data plug-in are a single string, not a sequence.")
\ No newline at end of file
+				raise luna.plugins.MetadataValidationError("The extensions for the MIME type in the data plug-in are a single string, not a sequence.")
+
+	if "instance_types" in data_metadata["data"]: #Optional declaration of the Python classes that belong to this data type.
+		instance_types = data_metadata["data"]["instance_types"]
+		if isinstance(instance_types, (str, type)) or not hasattr(instance_types, "__iter__"):
+			raise luna.plugins.MetadataValidationError("The instance types of the data plug-in are not a sequence of classes.")
+		for instance_type in instance_types:
+			if not isinstance(instance_type, type):
+				raise luna.plugins.MetadataValidationError("The instance type {instance_type} of the data plug-in is not a class.".format(instance_type=str(instance_type)))
+	if "magic" in data_metadata["data"]: #Optional prefixes that all serialised instances start with.
+		magic = data_metadata["data"]["magic"]
+		if isinstance(magic, (str, bytes)) or not hasattr(magic, "__iter__"):
+			raise luna.plugins.MetadataValidationError("The magic prefixes of the data plug-in are not a sequence of bytes.")
+		for prefix in magic:
+			if not isinstance(prefix, bytes) or not prefix:
+				raise luna.plugins.MetadataValidationError("The magic prefix {prefix} of the data plug-in is not a non-empty bytes object.".format(prefix=str(prefix)))
+	if "sniff_length" in data_metadata["data"]: #Optional number of bytes that is_serialised needs to see.
+		sniff_length = data_metadata["data"]["sniff_length"]
+		if isinstance(sniff_length, bool) or not isinstance(sniff_length, int) or sniff_length <= 0:
+			raise luna.plugins.MetadataValidationError("The sniff length of the data plug-in is not a positive integer.")
+	if "pre_filter" in data_metadata["data"] and not callable(data_metadata["data"]["pre_filter"]): #Optional cheap check before is_serialised.
+		raise luna.plugins.MetadataValidationError("The pre-filter of the data plug-in is not callable.")
+	if "converters" in data_metadata["data"]: #Optional direct conversions to other data types.
+		converters = data_metadata["data"]["converters"]
+		if not isinstance(converters, dict):
+			raise luna.plugins.MetadataValidationError("The converters of the data plug-in are not a dictionary.")
+		for target_type, converter in converters.items():
+			if not isinstance(target_type, str) or not callable(converter):
+				raise luna.plugins.MetadataValidationError("The converter to {target_type} of the data plug-in is not a callable for a data type.".format(target_type=str(target_type)))
\ No newline at end of file
@@ -8,7 +8,79 @@
 An API for finding the available data types and (de)serialising them.
 """
 
+import concurrent.futures #To deserialise large batches in multiple processes.
+import heapq #To find the cheapest conversions between data types.
+import os #To find the number of processor cores.
+import pickle #To estimate the cost of sending batches to other processes.
+import time #To estimate whether it's worth deserialising in multiple processes, and to measure the cost of conversions.
+
+import luna.listen #To clear the indices of the data plug-ins when they change.
 import luna.plugins #To find the data types that are available.
+import luna.stream #To detect the data type of streams without consuming them.
+
+_CONVERTER_COST = 0.000001
+"""
+The estimated time in seconds it takes to convert an object with a converter
+that a data plug-in declared, until it has been measured.
+"""
+
+_COST_SMOOTHING = 0.1
+"""
+How much every new measurement of the time that a conversion takes changes the
+cost of that conversion, between 0 and 1.
+
+Lower values make the costs less sensitive to outliers, but slower to adapt.
+"""
+
+_PARALLEL_SAMPLE_SIZE = 1000
+"""
+The number of serialised objects to deserialise in-process to estimate whether
+it's worth deserialising the rest of a batch in multiple processes.
+"""
+
+_POOL_START_TIME = 0.1
+"""
+The approximate time in seconds it takes to start a pool of processes and give
+them the data plug-ins.
+
+Deserialising a batch in multiple processes must save at least this much time.
+"""
+
+_REPLAN_FACTOR = 2
+"""
+By how much the measured cost of a conversion may differ from the cost that a
+conversion plan assumed for it, before the plans are made again.
+"""
+
+_RESERIALISE_COST = 0.00001
+"""
+The estimated time in seconds it takes to convert an object by serialising it
+and deserialising it as a different data type, until it has been measured.
+"""
+
+_SHARDS_PER_WORKER = 4
+"""
+How many shards every worker gets when a batch is deserialised in multiple
+processes.
+
+More shards balance the work better if some shards are slower to deserialise
+than others, but every shard costs some overhead.
+"""
+
+_index = None
+"""
+The lookup structures made from the metadata of the data plug-ins.
+
+This is ``None`` if the index must be made again because the data plug-ins
+changed.
+"""
+
+_indexed_plugins = None
+"""
+The data plug-ins that the index was made from.
+
+If the data plug-ins are replaced entirely, the index is made again.
+"""
 
 class SerialisationException(Exception):
 	"""
@@ -17,6 +89,190 @@ class SerialisationException(Exception):
 	"""
 	pass
 
+class _PluginIndex:
+	"""
+	Lookup structures made from the metadata of the data plug-ins, to find
+	data types without asking every data plug-in.
+	"""
+
+	def __init__(self, data_plugins):
+		"""
+		Makes the lookup structures for a set of data plug-ins.
+		:param data_plugins: The data plug-ins to index, by their identity.
+		"""
+		self.data_types = list(data_plugins.keys()) #In the order of the registry, so that ties between plans are always broken the same way.
+		self.types = {} #For each Python class, a tuple of the data type of its instances and whether the plug-in declared the class. Undeclared classes are added when found.
+		self.magic = {} #A trie of the magic prefixes. Each node maps bytes to child nodes, and None to the data types whose prefix ends there.
+		self.magic_plugins = set() #The data types that declared magic prefixes.
+		self.magic_length = 0 #The length of the longest magic prefix.
+		self.converters = {} #For each data type, the functions that convert its instances directly to other data types, by target data type.
+		self.costs = {} #For each pair of source and target data types, the measured time in seconds that converting between them takes.
+		self.plans = {} #For each pair of source and target data types, the cheapest conversions from one to the other, with the cost that was assumed for each.
+		for identity, metadata in data_plugins.items():
+			self.converters[identity] = {target_type: converter for target_type, converter in metadata["data"].get("converters", {}).items() if target_type in self.data_types and target_type != identity}
+			for instance_type in metadata["data"].get("instance_types", ()):
+				self.types.setdefault(instance_type, (identity, True)) #The first plug-in that declares a class gets it.
+			for magic in metadata["data"].get("magic", ()):
+				node = self.magic
+				for byte in magic:
+					node = node.setdefault(byte, {})
+				node.setdefault(None, set()).add(identity)
+				self.magic_plugins.add(identity)
+				self.magic_length = max(self.magic_length, len(magic))
+
+	def cost(self, source_type, target_type):
+		"""
+		Gives the cost of converting objects from one data type directly to
+		another.
+
+		This is the measured time it took earlier, or an estimate if it hasn't
+		been measured yet.
+		:param source_type: The data type to convert from.
+		:param target_type: The data type to convert to.
+		:return: The cost of the conversion, in seconds.
+		"""
+		cost = self.costs.get((source_type, target_type))
+		if cost is not None:
+			return cost
+		return _CONVERTER_COST if target_type in self.converters[source_type] else _RESERIALISE_COST
+
+	def matching_magic(self, serialised):
+		"""
+		Finds the data types of which a magic prefix matches the start of some
+		serialised data.
+		:param serialised: The serialised data.
+		:return: A set of data types.
+		"""
+		matches = set()
+		node = self.magic
+		for byte in serialised[:self.magic_length]:
+			node = node.get(byte)
+			if node is None:
+				break
+			matches.update(node.get(None, ()))
+		return matches
+
+	def measure(self, source_type, target_type, seconds, planned_cost):
+		"""
+		Records the time that a direct conversion took.
+
+		If the conversion turns out to be much cheaper or more expensive than
+		was assumed when the plans were made, the plans are made again.
+		:param source_type: The data type that was converted from.
+		:param target_type: The data type that was converted to.
+		:param seconds: The time that the conversion took.
+		:param planned_cost: The cost of the conversion that the plan assumed.
+		"""
+		previous = self.costs.get((source_type, target_type))
+		cost = seconds if previous is None else previous + (seconds - previous) * _COST_SMOOTHING
+		self.costs[(source_type, target_type)] = cost
+		if cost > planned_cost * _REPLAN_FACTOR or cost * _REPLAN_FACTOR < planned_cost:
+			self.plans.clear()
+
+	def plan(self, source_type, target_type):
+		"""
+		Finds the cheapest way to convert objects from one data type to
+		another.
+
+		Data plug-ins may declare converters that convert their instances
+		directly to other data types. Chains of these converters are weighed
+		against converting directly by serialising and deserialising the result
+		as the target data type. Serialising is not done along the way, since
+		that may give a different result than converting directly. The cheapest
+		plan is found with Dijkstra's algorithm and cached.
+		:param source_type: The data type to convert from.
+		:param target_type: The data type to convert to.
+		:return: A list of tuples for every conversion to perform in order, each
+		with the source data type, the target data type and the cost that was
+		assumed for that conversion.
+		:raises KeyError: One of the data types is not available.
+		"""
+		plan = self.plans.get((source_type, target_type))
+		if plan is not None:
+			return plan
+		for data_type in (source_type, target_type):
+			if data_type not in self.data_types:
+				raise KeyError("There is no activated data plug-in with data type {data_type} to convert with.".format(data_type=data_type))
+		distances = {source_type: 0.0}
+		previous = {} #For every data type that was reached, the data type it was reached from in the cheapest way.
+		finished = set()
+		queue = [(0.0, source_type)]
+		while queue:
+			distance, data_type = heapq.heappop(queue)
+			if data_type in finished:
+				continue
+			if data_type == target_type:
+				break
+			finished.add(data_type)
+			for next_type in self.data_types:
+				if next_type == data_type or next_type in finished:
+					continue
+				if next_type not in self.converters[data_type] and (data_type != source_type or next_type != target_type): #Serialising is only allowed from the source to the target directly.
+					continue
+				next_distance = distance + self.cost(data_type, next_type)
+				if next_type not in distances or next_distance < distances[next_type]:
+					distances[next_type] = next_distance
+					previous[next_type] = data_type
+					heapq.heappush(queue, (next_distance, next_type))
+		plan = []
+		data_type = target_type
+		while data_type != source_type:
+			plan.append((previous[data_type], data_type, self.cost(previous[data_type], data_type)))
+			data_type = previous[data_type]
+		plan.reverse()
+		self.plans[(source_type, target_type)] = plan
+		return plan
+
+def conversion_path(source_type, target_type):
+	"""
+	Finds the cheapest way to convert objects from one data type to another.
+
+	See ``convert`` for how the conversions are chosen.
+	:param source_type: The data type to convert from.
+	:param target_type: The data type to convert to.
+	:return: A list of the data types that objects are converted through,
+	starting with the source data type and ending with the target data type.
+	:raises KeyError: One of the data types is not available.
+	"""
+	plan = _get_index(luna.plugins.plugins_by_type["data"]).plan(source_type, target_type)
+	return [source_type] + [step_target for _, step_target, _ in plan]
+
+def convert(data, target_type, source_type=None):
+	"""
+	Converts an object to a different data type.
+
+	Data plug-ins may declare ``converters`` that convert their instances
+	directly to other data types, which must give the same result as serialising
+	the instances and deserialising them as the other data type. The cheapest
+	chain of declared converters, or else serialising and deserialising
+	directly, is planned once for every pair of data types. The time that every
+	conversion takes is measured, and if it turns out to be very different from
+	what was assumed, a new plan is made. The plans and measurements are
+	discarded when the data plug-ins change.
+	:param data: The object to convert.
+	:param target_type: The data type to convert to.
+	:param source_type: The data type of the object. If no data type is
+	provided, the data type is found automatically.
+	:return: An instance of the target data type that represents the object.
+	:raises SerialisationException: The data type of the object could not be
+	determined, or the object can't be converted to the target data type.
+	:raises KeyError: One of the data types is not available.
+	"""
+	if source_type is None:
+		source_type = type_of(data)
+		if source_type is None:
+			raise SerialisationException("The data type of object {instance} could not automatically be determined.".format(instance=str(data)))
+	index = _get_index(luna.plugins.plugins_by_type["data"])
+	for step_source, step_target, planned_cost in index.plan(source_type, target_type):
+		converter = index.converters[step_source].get(step_target)
+		start_time = time.perf_counter()
+		if converter is not None:
+			data = converter(data)
+		else:
+			data = deserialise(serialise(data, step_source), step_target)
+		index.measure(step_source, step_target, time.perf_counter() - start_time, planned_cost)
+	return data
+
 def data_types():
 	"""
 	Gives a set of all data types available.
@@ -28,13 +284,20 @@ def deserialise(serialised, data_type=None):
 	"""
 	Deserialises the given bytes, turning it into an instance of the specified
 	data type.
+
+	The serialised data may also be provided as a stream, in which case it is
+	deserialised with ``deserialise_stream``. If the data type must be found
+	automatically, it is detected from the start of the stream. See
+	``type_of_serialised`` for details.
 	:param serialised: A serialised form of data representing an instance of the
-	specified data type, in the form of bytes.
+	specified data type, in the form of bytes or a stream of bytes.
 	:param data_type: The type of data the serialised ``bytes`` should be
 	interpreted as. If no data type is provided, the data type is found
 	automatically.
 	:return: An instance of the specified data type.
 	"""
+	if hasattr(serialised, "read"): #It's a stream.
+		return deserialise_stream(serialised, data_type)
 	if data_type is None:
 		data_type = type_of_serialised(serialised)
 		if data_type is None:
@@ -44,6 +307,91 @@ def deserialise(serialised, data_type=None):
 	except KeyError as e: #Plug-in with specified data type is not available.
 		raise KeyError("There is no activated data plug-in with data type {data_type} to serialise with.".format(data_type=data_type)) from e
 
+def deserialise_many(serialised, data_type=None, delimiter=None, workers=1):
+	"""
+	Deserialises many serialised objects at once.
+
+	The serialised objects are grouped by their data type, and the plug-in of
+	every data type is looked up only once. If the plug-in can deserialise
+	batches, it gets all serialised objects of its data type at once.
+	Otherwise they are deserialised one by one.
+
+	With multiple workers, the batch is divided into shards that are
+	deserialised in a pool of processes. This is only done if a sample of the
+	batch shows that it saves time, taking into account the cost of starting
+	the processes and of sending the shards and results between processes.
+	Small or cheap batches are deserialised in this process. The modules of the
+	data plug-ins must be importable in the worker processes.
+	:param serialised: A sequence of ``bytes`` objects to deserialise. If a
+	delimiter is provided, this is instead a single bytes-like object that
+	contains the serialised objects separated by the delimiter.
+	:param data_type: The data type of all of the serialised objects. If no
+	data type is provided, the data type of every object is found
+	automatically.
+	:param delimiter: The ``bytes`` that separate the serialised objects, if
+	they are provided as a single buffer. The delimiter must not occur in the
+	serialised objects themselves. An empty buffer contains no objects.
+	:param workers: The maximum number of processes to deserialise with. No
+	more processes are used than there are processor cores.
+	:return: A list of the deserialised objects, in the same order.
+	:raises SerialisationException: The data type of one of the serialised
+	objects could not be determined.
+	"""
+	if delimiter is not None:
+		serialised = bytes(serialised)
+	elif not isinstance(serialised, (list, tuple)):
+		serialised = list(serialised) #May need to be iterated multiple times.
+	results = []
+	workers = min(workers, os.cpu_count() or 1)
+	if workers > 1:
+		results, serialised, shards = _parallel_shards(serialised, data_type, delimiter, workers)
+		if shards is not None:
+			return results + _deserialise_parallel(shards, data_type, delimiter, workers)
+	if delimiter is not None:
+		serialised = serialised.split(delimiter) if serialised or results else [] #After a sample, the rest of the buffer contains at least one object, even if it's empty.
+	groups = _group_by_type(serialised, data_type, type_of_serialised)
+	if None in groups:
+		raise SerialisationException("The data type could not automatically be determined.")
+	return results + _convert_groups(serialised, groups, "deserialise")
+
+def deserialise_stream(serialised, data_type=None):
+	"""
+	Deserialises a stream of bytes, turning it into an instance of the
+	specified data type.
+
+	If the plug-in of the data type can deserialise streams, the stream is
+	given to the plug-in as a ``BytesStreamReader``, which reads it piece by
+	piece. Otherwise the stream is read entirely and deserialised as a whole.
+	:param serialised: A stream to read the serialised data from. This may also
+	be ``bytes``, or the path or file URI of a local file. Files given by their
+	path are closed afterwards. Other streams are left open.
+	:param data_type: The type of data the serialised data should be
+	interpreted as. If no data type is provided, the data type is found
+	automatically from the start of the stream.
+	:return: An instance of the specified data type.
+	"""
+	opened = isinstance(serialised, str) #If we open the file, we must close it.
+	if data_type is None:
+		if not isinstance(serialised, luna.stream.PeekableStream):
+			serialised = luna.stream.PeekableStream(serialised) #Allow detecting the type without consuming the stream.
+	elif not isinstance(serialised, luna.stream.BytesStreamReader):
+		serialised = luna.stream.BytesStreamReader(serialised)
+	try:
+		if data_type is None:
+			data_type = type_of_serialised(serialised)
+			if data_type is None:
+				raise SerialisationException("The data type could not automatically be determined.")
+		try:
+			data_metadata = luna.plugins.plugins_by_type["data"][data_type]["data"]
+		except KeyError as e: #Plug-in with specified data type is not available.
+			raise KeyError("There is no activated data plug-in with data type {data_type} to deserialise with.".format(data_type=data_type)) from e
+		if "deserialise_stream" in data_metadata:
+			return data_metadata["deserialise_stream"](serialised)
+		return data_metadata["deserialise"](serialised.read()) #Fall back to deserialising everything at once.
+	finally:
+		if opened:
+			serialised.close()
+
 def extensions(data_type):
 	"""
 	Gets the known file extensions of a specified data type, if it has them.
@@ -75,16 +423,25 @@ def is_serialised(data_type, serialised):
 	"""
 	Checks whether the given ``bytes`` represents an instance of the specified
 	data type.
+
+	If a ``PeekableStream`` is provided, only the start of the stream is
+	checked. The stream is not consumed.
 	:param data_type: The data type to check for.
-	:param serialised: A ``bytes`` object to check the data type of.
+	:param serialised: A ``bytes`` object or a ``PeekableStream`` to check the
+	data type of.
 	:return: ``True`` if the stream of bytes represents an instance of the
 	specified data type, or ``False`` if it doesn't.
 	"""
+	if isinstance(serialised, luna.stream.PeekableStream):
+		serialised = serialised.peek()
 	try:
-		return luna.plugins.plugins_by_type["data"][data_type]["data"]["is_serialised"](serialised)
+		data_metadata = luna.plugins.plugins_by_type["data"][data_type]["data"]
 	except KeyError: #Plug-in with specified data type is not available.
 		luna.plugins.api("logger").warning("Checking against non-existent data type {data_type}.", data_type=data_type)
 		return False
+	if "magic" in data_metadata and not any(serialised[:len(magic)] == magic for magic in data_metadata["magic"]):
+		return False
+	return _check_serialised(data_metadata, serialised)
 
 def mime_type(data_type):
 	"""
@@ -97,7 +454,7 @@ def mime_type(data_type):
 	"""
 	return luna.plugins.plugins_by_type["data"][data_type]["data"].get("mime_type", None)
 
-def serialise(data, data_type=None):
+def serialise(data, data_type=None, **options):
 	"""
 	Serialises the specified data.
 
@@ -106,6 +463,9 @@ def serialise(data, data_type=None):
 	:param data: The data that must be serialised.
 	:param data_type: The type of data that will be provided. If no data type is
 	provided, the data type is found automatically.
+	:param options: Options for the serialisation, which are passed on to the
+	plug-in. Which options are supported depends on the data type, such as the
+	``hexadecimal`` option of real numbers.
 	:return: A ``bytes`` object representing exactly the state of the data.
 	"""
 	if data_type is None:
@@ -113,9 +473,79 @@ def serialise(data, data_type=None):
 		if data_type is None:
 			raise SerialisationException("The data type of object {instance} could not automatically be determined.".format(instance=str(data)))
 	try:
-		return luna.plugins.plugins_by_type["data"][data_type]["data"]["serialise"](data)
+		return luna.plugins.plugins_by_type["data"][data_type]["data"]["serialise"](data, **options)
+	except KeyError as e: #Plug-in with specified data type is not available.
+		raise KeyError("There is no activated data plug-in with data type {data_type} to serialise with.".format(data_type=data_type)) from e
+
+def serialise_many(data, data_type=None, delimiter=None):
+	"""
+	Serialises many objects at once.
+
+	The objects are grouped by their data type, and the plug-in of every data
+	type is looked up only once. If the plug-in can serialise batches, it gets
+	all objects of its data type at once. Otherwise they are serialised one by
+	one.
+	:param data: A sequence of objects to serialise.
+	:param data_type: The data type of all of the objects. If no data type is
+	provided, the data type of every object is found automatically.
+	:param delimiter: If provided, the serialised objects are joined into a
+	single ``bytes`` object, separated by this delimiter. The delimiter should
+	not occur in the serialised objects themselves, or they can't be separated
+	again.
+	:return: A list of ``bytes`` objects representing the objects in the same
+	order, or a single ``bytes`` object if a delimiter was provided.
+	:raises SerialisationException: The data type of one of the objects could
+	not be determined.
+	"""
+	if not isinstance(data, (list, tuple)):
+		data = list(data)
+	groups = _group_by_type(data, data_type, type_of)
+	if None in groups:
+		raise SerialisationException("The data type of object {instance} could not automatically be determined.".format(instance=str(data[groups[None][0]])))
+	serialised = _convert_groups(data, groups, "serialise")
+	if delimiter is not None:
+		return delimiter.join(serialised)
+	return serialised
+
+def serialise_stream(data, sink, data_type=None):
+	"""
+	Serialises the specified data to a stream.
+
+	If the plug-in of the data type can serialise to streams, it writes its
+	output piece by piece to a ``BytesStreamWriter``, so that the serialised
+	form never needs to be in memory at once. Otherwise the data is serialised
+	as a whole and then written to the sink.
+	:param data: The data that must be serialised.
+	:param sink: Where to write the serialised data to. This may be a
+	``BytesStreamWriter`` or ``CompressingStreamWriter``, a stream with a
+	``write`` method, a callable object that takes the data as argument, or the
+	path or file URI of a local file. Files given by their path are closed
+	afterwards. Other sinks are flushed, but left open.
+	:param data_type: The type of data that will be provided. If no data type is
+	provided, the data type is found automatically.
+	"""
+	if data_type is None:
+		data_type = type_of(data)
+		if data_type is None:
+			raise SerialisationException("The data type of object {instance} could not automatically be determined.".format(instance=str(data)))
+	try:
+		data_metadata = luna.plugins.plugins_by_type["data"][data_type]["data"]
 	except KeyError as e: #Plug-in with specified data type is not available.
 		raise KeyError("There is no activated data plug-in with data type {data_type} to serialise with.".format(data_type=data_type)) from e
+	if isinstance(sink, (luna.stream.BytesStreamWriter, luna.stream.CompressingStreamWriter)):
+		writer = sink
+	else:
+		writer = luna.stream.BytesStreamWriter(sink)
+	try:
+		if "serialise_stream" in data_metadata:
+			data_metadata["serialise_stream"](data, writer)
+		else:
+			writer.write(data_metadata["serialise"](data)) #Fall back to serialising everything at once.
+	finally:
+		if isinstance(sink, str): #We opened the file, so we must close it.
+			writer.close()
+		else:
+			writer.flush()
 
 def type_of(data):
 	"""
@@ -124,12 +554,29 @@ def type_of(data):
 	This goes by all data types in turn and asks if any of them thinks the
 	object is theirs. The first one that reports it is an instance of its data
 	type will be returned, even if multiple data types would match.
+
+	To make this fast, the data type is looked up by the class of the object
+	first. Data plug-ins may declare the classes of their instances in their
+	metadata, in which case the lookup is certain. Otherwise, the data type
+	that was found for an earlier instance of the same class is tried first.
 	:param data: An object to find the data type of.
 	:return: The data type of the object, or ``None`` if it has no known data
 	type.
 	"""
-	for identity, data_plugin in luna.plugins.plugins_by_type["data"].items():
+	data_plugins = luna.plugins.plugins_by_type["data"]
+	type_index = _get_index(data_plugins).types
+	entry = type_index.get(type(data))
+	if entry is not None:
+		identity, declared = entry
+		if declared:
+			return identity
+		data_plugin = data_plugins.get(identity)
+		if data_plugin is not None and data_plugin["data"]["is_instance"](data): #The data type may also depend on the value, so check.
+			return identity
+
+	for identity, data_plugin in data_plugins.items():
 		if data_plugin["data"]["is_instance"](data):
+			type_index.setdefault(type(data), (identity, False))
 			return identity
 	return None #No data type found.
 
@@ -141,11 +588,249 @@ def type_of_serialised(serialised):
 	represent an instance of their data type. The first one that reports it is a
 	representation belonging to its data type is returned, even if multiple data
 	types would match.
-	:param serialised: The ``bytes`` to find the data type of.
+
+	Data types that declare magic prefixes in their metadata are only asked if
+	the bytes start with one of their prefixes. These prefixes are looked up
+	all at once in a trie. Data types of which a prefix matched are asked
+	before the data types without magic prefixes, so that a heuristic of a data
+	type earlier in the registry can't claim data with a declared prefix. Data
+	types may also declare a cheap pre-filter that is asked before the full
+	check, and the number of bytes that the full check needs to look at.
+
+	If a ``PeekableStream`` is provided, only the data within its look-ahead is
+	checked. The stream is not consumed, so it can be deserialised afterwards
+	without reading the data again. If the stream is longer than the
+	look-ahead, the detection is based on the start of the stream only.
+	:param serialised: The ``bytes`` or ``PeekableStream`` to find the data
+	type of.
 	:return: The data type that the bytes represent, or ``None`` if it has no
 	known data type.
 	"""
-	for identity, metadata in luna.plugins.plugins_by_type["data"].items():
-		if metadata["data"]["is_serialised"](serialised):
+	if isinstance(serialised, luna.stream.PeekableStream):
+		serialised = serialised.peek()
+	data_plugins = luna.plugins.plugins_by_type["data"]
+	index = _get_index(data_plugins)
+	matching_magic = index.matching_magic(serialised)
+	if matching_magic: #A declared prefix is stronger evidence than any heuristic, so these are asked first.
+		for identity, metadata in data_plugins.items():
+			if identity in matching_magic and _check_serialised(metadata["data"], serialised):
+				return identity
+	for identity, metadata in data_plugins.items():
+		if identity not in index.magic_plugins and _check_serialised(metadata["data"], serialised):
 			return identity
-	return None #No data type found.
\ No newline at end of file
+	return None #No data type found.
+
+def _check_serialised(data_metadata, serialised):
+	"""
+	Asks a data plug-in whether some bytes represent an instance of its data
+	type, after any magic prefixes have been checked.
+
+	The pre-filter of the plug-in is asked first, if it has one. The full
+	check only gets as many bytes as the plug-in says it needs.
+	:param data_metadata: The data part of the metadata of the plug-in.
+	:param serialised: The ``bytes`` to check.
+	:return: ``True`` if the bytes represent an instance of the data type, or
+	``False`` if they don't.
+	"""
+	if "pre_filter" in data_metadata and not data_metadata["pre_filter"](serialised):
+		return False
+	if "sniff_length" in data_metadata:
+		serialised = serialised[:data_metadata["sniff_length"]]
+	return data_metadata["is_serialised"](serialised)
+
+def _clear_index(_attribute, _value):
+	"""
+	Clears the index of the data plug-ins, so that it is made again when it is
+	needed.
+
+	This is called when the data plug-ins change.
+	:param _attribute: The data type that changed.
+	:param _value: The new metadata of the data type.
+	"""
+	global _index #pylint: disable=global-statement
+	_index = None
+
+def _convert_groups(items, groups, function):
+	"""
+	(De)serialises groups of items of the same data type.
+
+	Every plug-in is looked up once. Its batch function is used if it has one.
+	Otherwise its function for single items is called in a loop.
+	:param items: The items to (de)serialise.
+	:param groups: For every data type, the positions of the items that have
+	that data type.
+	:param function: Which function of the plug-ins to use, either
+	``"serialise"`` or ``"deserialise"``.
+	:return: A list of the (de)serialised items, in the same order as the
+	items.
+	"""
+	data_plugins = luna.plugins.plugins_by_type["data"]
+	results = None if len(groups) == 1 else [None] * len(items)
+	for data_type, positions in groups.items():
+		try:
+			data_metadata = data_plugins[data_type]["data"]
+		except KeyError as e: #Plug-in with specified data type is not available.
+			raise KeyError("There is no activated data plug-in with data type {data_type} to {function} with.".format(data_type=data_type, function=function)) from e
+		group = items if results is None else [items[position] for position in positions] #With a single group, the items don't need to be gathered.
+		if function + "_many" in data_metadata:
+			converted = data_metadata[function + "_many"](group)
+		else:
+			convert = data_metadata[function]
+			converted = [convert(item) for item in group]
+		if results is None:
+			return list(converted)
+		for position, result in zip(positions, converted):
+			results[position] = result
+	return results
+
+def _deserialise_parallel(shards, data_type, delimiter, workers):
+	"""
+	Deserialises shards of a batch in a pool of processes.
+
+	The worker processes get a copy of the data plug-ins of this process when
+	they start.
+	:param shards: The shards to deserialise, each of which is a sequence of
+	serialised objects or a delimited buffer.
+	:param data_type: The data type of all of the serialised objects, or
+	``None`` to find the data type of every object automatically.
+	:param delimiter: The delimiter that separates the serialised objects in
+	the shards, or ``None`` if the shards are sequences.
+	:param workers: The number of processes to deserialise with.
+	:return: A list of the deserialised objects, in the same order as in the
+	shards.
+	"""
+	data_plugins = {identity: {"data": metadata["data"]} for identity, metadata in luna.plugins.plugins_by_type["data"].items()}
+	results = []
+	with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_install_data_plugins, initargs=(data_plugins,)) as executor:
+		for shard_results in executor.map(_deserialise_shard, shards, [data_type] * len(shards), [delimiter] * len(shards)):
+			results.extend(shard_results)
+	return results
+
+def _deserialise_shard(shard, data_type, delimiter):
+	"""
+	Deserialises a shard of a batch in a worker process.
+
+	This is a module-level function so that it can be sent to other processes.
+	:param shard: A sequence of serialised objects or a delimited buffer.
+	:param data_type: The data type of all of the serialised objects, or
+	``None`` to find the data type of every object automatically.
+	:param delimiter: The delimiter that separates the serialised objects in
+	the shard, or ``None`` if the shard is a sequence.
+	:return: A list of the deserialised objects.
+	"""
+	return deserialise_many(shard, data_type, delimiter)
+
+def _get_index(data_plugins):
+	"""
+	Gets the index of the data plug-ins, making it if necessary.
+
+	The index is cleared again when the data plug-ins change.
+	:param data_plugins: The currently registered data plug-ins.
+	:return: The ``_PluginIndex`` of those plug-ins.
+	"""
+	global _index, _indexed_plugins #pylint: disable=global-statement
+	index = _index
+	if index is not None and data_plugins is _indexed_plugins:
+		return index
+	index = _PluginIndex(data_plugins)
+	if data_plugins is not _indexed_plugins:
+		luna.listen.listen(_clear_index, data_plugins)
+		_indexed_plugins = data_plugins
+	_index = index
+	return index
+
+def _group_by_type(items, data_type, find_type):
+	"""
+	Divides items into groups of the same data type.
+	:param items: A sequence of items to divide.
+	:param data_type: The data type of all items, if known.
+	:param find_type: A function that finds the data type of an item, used if
+	the data type is not known.
+	:return: A dictionary that maps every data type to the positions of the
+	items with that data type. Items of which the data type could not be found
+	are grouped under ``None``.
+	"""
+	if data_type is not None:
+		return {data_type: range(len(items))} if items else {}
+	groups = {}
+	for position, item in enumerate(items):
+		item_type = find_type(item)
+		if item_type in groups:
+			groups[item_type].append(position)
+		else:
+			groups[item_type] = [position]
+	return groups
+
+def _install_data_plugins(data_plugins):
+	"""
+	Gives a worker process the data plug-ins of the process that started it.
+
+	This is a module-level function so that it can be sent to other processes.
+	:param data_plugins: For every data type, the metadata of its plug-in.
+	"""
+	luna.plugins.plugins_by_type["data"] = luna.listen.DictionaryModel(data_plugins)
+
+def _parallel_shards(serialised, data_type, delimiter, workers):
+	"""
+	Decides whether to deserialise a batch in multiple processes, and if so,
+	divides it into shards.
+
+	A sample at the start of the batch is deserialised in this process to
+	measure how long every object takes. This is compared to how long it takes
+	to send the objects and the results to other processes, and to start those
+	processes. Only the rest of the batch is divided into shards.
+	:param serialised: A list or tuple of serialised objects, or a delimited
+	``bytes`` buffer.
+	:param data_type: The data type of all of the serialised objects, or
+	``None`` to find the data type of every object automatically.
+	:param delimiter: The delimiter that separates the serialised objects in
+	the buffer, or ``None`` if a sequence is given.
+	:param workers: The number of processes that would deserialise the batch.
+	:return: A tuple of the deserialised objects of the sample, the rest of the
+	batch in the same form as the batch, and a list of shards of the rest, each
+	of which is a sequence of serialised objects or a delimited buffer. If it's
+	not worth deserialising in multiple processes, the shards are ``None``. If
+	the batch is not larger than the sample, nothing is deserialised and the
+	rest is the whole batch.
+	"""
+	if delimiter is not None:
+		count = serialised.count(delimiter) + 1 if serialised else 0
+		if count <= _PARALLEL_SAMPLE_SIZE: #Not even larger than the sample.
+			return [], serialised, None
+		sample = serialised.split(delimiter, _PARALLEL_SAMPLE_SIZE)
+		rest = sample.pop()
+	else:
+		count = len(serialised)
+		if count <= _PARALLEL_SAMPLE_SIZE: #Not even larger than the sample.
+			return [], serialised, None
+		sample = serialised[:_PARALLEL_SAMPLE_SIZE]
+		rest = serialised[_PARALLEL_SAMPLE_SIZE:]
+
+	start_time = time.perf_counter()
+	sample_results = deserialise_many(sample, data_type)
+	deserialise_time = (time.perf_counter() - start_time) / len(sample)
+	start_time = time.perf_counter()
+	if delimiter is None: #A delimited buffer is sent as a single block, which costs next to nothing.
+		pickle.dumps(sample)
+	pickle.dumps(sample_results)
+	transfer_time = 2 * (time.perf_counter() - start_time) / len(sample) #Once to pickle, once to unpickle.
+	count -= len(sample)
+	saved_time = count * (deserialise_time * (1 - 1 / workers) - transfer_time)
+	if saved_time < _POOL_START_TIME or not rest: #An empty rest of a buffer is a single empty object, which is not worth sending anywhere.
+		return sample_results, rest, None
+
+	serialised = rest
+	num_shards = workers * _SHARDS_PER_WORKER
+	if delimiter is None:
+		shard_size = -(-count // num_shards) #Round up.
+		return sample_results, rest, [serialised[start:start + shard_size] for start in range(0, count, shard_size)]
+	shards = []
+	start = 0
+	for shard_index in range(1, num_shards):
+		end = serialised.find(delimiter, max(start + 1, len(serialised) * shard_index // num_shards)) #Shards may not be empty, or they'd contain no objects instead of one empty object.
+		if end == -1 or end + len(delimiter) >= len(serialised):
+			break
+		shards.append(serialised[start:end])
+		start = end + len(delimiter)
+	shards.append(serialised[start:])
+	return sample_results, rest, shards
\ No newline at end of file
@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+#This software is distributed under the Creative Commons license (CC0) version 1.0. A copy of this license should have been distributed with this software.
+#The license can also be read online: <https://creativecommons.org/publicdomain/zero/1.0/>. If this online license differs from the license provided with this software, the license provided with this software should be applied.
+
+"""
+Tests the API for finding data types and (de)serialising them.
+"""
+
+import concurrent.futures #To replace the process pool with threads.
+import io #To collect the output of streams.
+import unittest.mock #To replace the data plug-ins with fake ones.
+
+import datatype.data #The module we're testing.
+import luna.listen #To create fake plug-in registries.
+import luna.stream #To check the streams that plug-ins receive.
+import luna.tests #For parametrised tests.
+
+def _data_plugin(is_instance=luna.tests.arbitrary_function, is_serialised=luna.tests.arbitrary_function, serialise=luna.tests.arbitrary_function, deserialise=luna.tests.arbitrary_function, **optional):
+	"""
+	Creates the metadata of a fake data plug-in.
+	:param is_instance: The ``is_instance`` function of the plug-in.
+	:param is_serialised: The ``is_serialised`` function of the plug-in.
+	:param serialise: The ``serialise`` function of the plug-in.
+	:param deserialise: The ``deserialise`` function of the plug-in.
+	:param optional: Optional entries of the metadata, such as the classes or
+	magic prefixes that the plug-in declares.
+	:return: The metadata of the plug-in.
+	"""
+	data = {
+		"deserialise": deserialise,
+		"is_instance": is_instance,
+		"is_serialised": is_serialised,
+		"serialise": serialise
+	}
+	data.update(optional)
+	return {"data": data}
+
+class TestData(luna.tests.TestCase):
+	"""
+	Tests the functions of the data API.
+	"""
+
+	def setUp(self):
+		"""
+		Replaces the data plug-ins with fake ones.
+		"""
+		self.data_plugins = luna.listen.DictionaryModel()
+		plugins_by_type = luna.listen.DictionaryModel(data=self.data_plugins)
+		patcher = unittest.mock.patch("luna.plugins.plugins_by_type", plugins_by_type)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def test_conversion_path_cheapest(self):
+		"""
+		Tests whether a chain of declared converters is preferred over
+		serialising, as long as it's cheaper.
+		"""
+		self.data_plugins["integer"] = _data_plugin(converters={"real": float})
+		self.data_plugins["real"] = _data_plugin(converters={"complex": complex})
+		self.data_plugins["complex"] = _data_plugin()
+		self.assertEqual(datatype.data.conversion_path("integer", "complex"), ["integer", "real", "complex"])
+		self.assertEqual(datatype.data.conversion_path("complex", "integer"), ["complex", "integer"], "Without converters, serialising is the only way.")
+		self.assertEqual(datatype.data.conversion_path("real", "real"), ["real"])
+		with self.assertRaises(KeyError):
+			datatype.data.conversion_path("integer", "quaternion")
+
+	def test_conversion_path_invalidate(self):
+		"""
+		Tests whether the plans are made again after the data plug-ins change.
+		"""
+		self.data_plugins["integer"] = _data_plugin()
+		self.data_plugins["real"] = _data_plugin()
+		self.data_plugins["complex"] = _data_plugin()
+		self.assertEqual(datatype.data.conversion_path("integer", "complex"), ["integer", "complex"])
+		self.data_plugins["integer"] = _data_plugin(converters={"real": float})
+		self.data_plugins["real"] = _data_plugin(converters={"complex": complex})
+		self.assertEqual(datatype.data.conversion_path("integer", "complex"), ["integer", "real", "complex"], "The new converters must be used.")
+
+	def test_conversion_path_measured(self):
+		"""
+		Tests whether conversions that turn out to be slower than assumed are
+		avoided afterwards.
+		"""
+		self.data_plugins["integer"] = _data_plugin(serialise=lambda instance: str(instance).encode("ascii"), converters={"real": float})
+		self.data_plugins["real"] = _data_plugin(converters={"complex": complex})
+		self.data_plugins["complex"] = _data_plugin(deserialise=lambda serialised: complex(serialised.decode("ascii")))
+		self.assertEqual(datatype.data.conversion_path("integer", "complex"), ["integer", "real", "complex"])
+		with unittest.mock.patch("time.perf_counter", unittest.mock.MagicMock(side_effect=[0.0, 1.0, 1.0, 1.0])): #The conversion from integer to real takes a second.
+			self.assertEqual(datatype.data.convert(42, "complex", "integer"), 42 + 0j)
+		self.assertEqual(datatype.data.conversion_path("integer", "complex"), ["integer", "complex"], "The slow converter must be avoided.")
+
+	def test_convert(self):
+		"""
+		Tests converting objects with declared converters and by serialising
+		them.
+		"""
+		serialise = unittest.mock.MagicMock(side_effect=lambda instance: str(instance).encode("ascii"))
+		self.data_plugins["integer"] = _data_plugin(is_instance=lambda instance: isinstance(instance, int), serialise=serialise, converters={"real": float})
+		self.data_plugins["real"] = _data_plugin(is_instance=lambda instance: False)
+		self.data_plugins["word"] = _data_plugin(is_instance=lambda instance: False, deserialise=lambda serialised: serialised.decode("ascii"))
+		self.assertEqual(datatype.data.convert(42, "real"), 42.0)
+		serialise.assert_not_called()
+		self.assertEqual(datatype.data.convert(42, "word"), "42")
+		self.assertEqual(datatype.data.convert(42, "integer"), 42, "Converting to the same data type must give the object itself.")
+		with self.assertRaises(datatype.data.SerialisationException):
+			datatype.data.convert("42", "real")
+
+	def test_deserialise_many(self):
+		"""
+		Tests deserialising a mix of data types, with and without batch
+		functions, from a delimited buffer.
+		"""
+		deserialise_many = unittest.mock.MagicMock(side_effect=lambda serialised: [int(item) for item in serialised])
+		self.data_plugins["number"] = _data_plugin(is_serialised=lambda serialised: serialised.isdigit(), deserialise_many=deserialise_many)
+		self.data_plugins["word"] = _data_plugin(is_serialised=lambda serialised: serialised.isalpha(), deserialise=lambda serialised: serialised.decode("ascii"))
+		self.assertEqual(datatype.data.deserialise_many(b"1,ghost,2,keeper", delimiter=b","), [1, "ghost", 2, "keeper"])
+		deserialise_many.assert_called_once_with([b"1", b"2"])
+		self.assertEqual(datatype.data.deserialise_many(b"", delimiter=b","), [], "An empty buffer contains no objects.")
+		with self.assertRaises(datatype.data.SerialisationException):
+			datatype.data.deserialise_many([b"1", b"?"])
+
+	@luna.tests.parametrise({
+		"sequence":        {"serialised": [b"%d" % number for number in range(5000)], "delimiter": None},
+		"buffer":          {"serialised": b",".join(b"%d" % number for number in range(5000)), "delimiter": b","},
+		"long_delimiter":  {"serialised": b"<>".join(b"%d" % number for number in range(5000)), "delimiter": b"<>"},
+		"empty_objects":   {"serialised": b"1" + b"," * 5000 + b"2", "delimiter": b","},
+		"trailing_empty":  {"serialised": b"1," * 5000, "delimiter": b","},
+		"empty_rest":      {"serialised": b"1," * 1000, "delimiter": b","}
+	})
+	@unittest.mock.patch("concurrent.futures.ProcessPoolExecutor", concurrent.futures.ThreadPoolExecutor) #Same division of work, but without the need to pickle the fake plug-ins.
+	@unittest.mock.patch("datatype.data._POOL_START_TIME", float("-inf")) #Always worth it.
+	@unittest.mock.patch("os.cpu_count", lambda: 3)
+	def test_deserialise_many_parallel(self, serialised, delimiter):
+		"""
+		Tests whether deserialising in shards gives the same results as
+		deserialising everything at once.
+		:param serialised: The batch to deserialise.
+		:param delimiter: The delimiter between the serialised objects, if any.
+		"""
+		self.data_plugins["number"] = _data_plugin(deserialise=lambda serialised: int(serialised) if serialised else None)
+		expected = datatype.data.deserialise_many(serialised, "number", delimiter)
+		self.assertEqual(datatype.data.deserialise_many(serialised, "number", delimiter, workers=3), expected)
+
+	@luna.tests.parametrise({
+		"smaller_than_sample": {"count": 10, "pool_start_time": float("-inf")},
+		"not_worth_it":        {"count": 1500, "pool_start_time": float("inf")},
+		"worth_it":            {"count": 1500, "pool_start_time": float("-inf")}
+	})
+	@unittest.mock.patch("concurrent.futures.ProcessPoolExecutor", concurrent.futures.ThreadPoolExecutor) #Same division of work, but without the need to pickle the fake plug-ins.
+	@unittest.mock.patch("os.cpu_count", lambda: 4)
+	def test_deserialise_many_parallel_generator(self, count, pool_start_time):
+		"""
+		Tests deserialising a generator with multiple workers, which can only be
+		iterated over once.
+		:param count: The number of objects to generate.
+		:param pool_start_time: How long it is assumed to take to start the
+		worker processes, to decide whether it's worth it.
+		"""
+		deserialise = unittest.mock.MagicMock(side_effect=int)
+		self.data_plugins["number"] = _data_plugin(deserialise=deserialise)
+		with unittest.mock.patch("datatype.data._POOL_START_TIME", pool_start_time):
+			result = datatype.data.deserialise_many((b"%d" % number for number in range(count)), "number", workers=2)
+		self.assertEqual(result, list(range(count)))
+		self.assertEqual(deserialise.call_count, count, "The sample must not be deserialised again.")
+
+	def test_deserialise_stream(self):
+		"""
+		Tests whether plug-ins that can deserialise streams get the stream.
+		"""
+		deserialise = unittest.mock.MagicMock()
+		self.data_plugins["word"] = _data_plugin(deserialise=deserialise, deserialise_stream=lambda reader: reader.read(4))
+		self.assertEqual(datatype.data.deserialise(io.BytesIO(b"ghostkeeper"), "word"), b"ghos", "The plug-in must read only what it needs.")
+		deserialise.assert_not_called()
+
+	def test_deserialise_stream_detect(self):
+		"""
+		Tests detecting the data type of a stream before deserialising it.
+		"""
+		self.data_plugins["word"] = _data_plugin(is_serialised=lambda serialised: serialised.isalpha(), deserialise_stream=lambda reader: reader.read())
+		self.assertEqual(datatype.data.deserialise_stream(b"ghostkeeper"), b"ghostkeeper", "The bytes used for detection must not be consumed.")
+		with self.assertRaises(datatype.data.SerialisationException):
+			datatype.data.deserialise_stream(b"42")
+
+	def test_deserialise_stream_fallback(self):
+		"""
+		Tests deserialising a stream with a plug-in that can only deserialise
+		complete ``bytes``.
+		"""
+		self.data_plugins["word"] = _data_plugin(deserialise=lambda serialised: serialised.decode("ascii"))
+		self.assertEqual(datatype.data.deserialise_stream(io.BytesIO(b"ghostkeeper"), "word"), "ghostkeeper")
+
+	def test_serialise_many(self):
+		"""
+		Tests serialising a mix of data types, with and without batch
+		functions.
+		"""
+		serialise_many = unittest.mock.MagicMock(side_effect=lambda instances: [str(instance).encode("ascii") for instance in instances])
+		self.data_plugins["number"] = _data_plugin(is_instance=lambda instance: isinstance(instance, int), serialise_many=serialise_many)
+		self.data_plugins["word"] = _data_plugin(is_instance=lambda instance: isinstance(instance, str), serialise=lambda instance: instance.encode("ascii"))
+		self.assertEqual(datatype.data.serialise_many([1, "ghost", 2, "keeper"]), [b"1", b"ghost", b"2", b"keeper"])
+		serialise_many.assert_called_once_with([1, 2])
+		self.assertEqual(datatype.data.serialise_many(iter([3, 4]), "number", delimiter=b","), b"3,4")
+		self.assertEqual(datatype.data.serialise_many([], delimiter=b","), b"")
+		with self.assertRaises(datatype.data.SerialisationException):
+			datatype.data.serialise_many([1, 2.5])
+
+	def test_serialise_options(self):
+		"""
+		Tests whether options for the serialisation are passed on to the
+		plug-in.
+		"""
+		serialise = unittest.mock.MagicMock(return_value=b"0x1.0p+0")
+		self.data_plugins["real"] = _data_plugin(serialise=serialise)
+		self.assertEqual(datatype.data.serialise(1.0, "real", hexadecimal=True), b"0x1.0p+0")
+		serialise.assert_called_once_with(1.0, hexadecimal=True)
+
+	def test_serialise_stream(self):
+		"""
+		Tests whether plug-ins that can serialise to streams get a writer.
+		"""
+		serialise = unittest.mock.MagicMock()
+		def serialise_stream(instance, writer):
+			"""
+			Writes a word in pieces.
+			:param instance: The word to write.
+			:param writer: The stream to write to.
+			"""
+			self.assertIsInstance(writer, luna.stream.BytesStreamWriter)
+			for character in instance:
+				writer.write(character.encode("ascii"))
+		self.data_plugins["word"] = _data_plugin(serialise=serialise, serialise_stream=serialise_stream)
+		output = io.BytesIO()
+		datatype.data.serialise_stream("ghostkeeper", output, "word")
+		self.assertEqual(output.getvalue(), b"ghostkeeper")
+		serialise.assert_not_called()
+		self.assertFalse(output.closed, "Streams that were provided must be left open.")
+
+	def test_serialise_stream_fallback(self):
+		"""
+		Tests serialising to a stream with a plug-in that can only serialise to
+		complete ``bytes``.
+		"""
+		self.data_plugins["word"] = _data_plugin(is_instance=lambda instance: isinstance(instance, str), serialise=lambda instance: instance.encode("ascii"))
+		output = []
+		datatype.data.serialise_stream("ghostkeeper", lambda data: output.append(bytes(data)))
+		self.assertEqual(b"".join(output), b"ghostkeeper")
+
+	def test_type_of_declared(self):
+		"""
+		Tests finding the data type of instances of a declared class without
+		asking the plug-in.
+		"""
+		is_instance = unittest.mock.MagicMock(return_value=True)
+		self.data_plugins["integer"] = _data_plugin(is_instance, instance_types=[int])
+		self.assertEqual(datatype.data.type_of(42), "integer")
+		is_instance.assert_not_called()
+
+	def test_type_of_invalidate(self):
+		"""
+		Tests whether the data types are looked up again after the data
+		plug-ins change.
+		"""
+		self.data_plugins["first"] = _data_plugin(lambda instance: isinstance(instance, int))
+		self.assertEqual(datatype.data.type_of(42), "first")
+		del self.data_plugins["first"]
+		self.data_plugins["second"] = _data_plugin(lambda instance: False, instance_types=[int])
+		self.assertEqual(datatype.data.type_of(42), "second", "The index must be made again after plug-ins changed.")
+
+	def test_type_of_remembered(self):
+		"""
+		Tests whether the data type of an earlier instance of the same class is
+		tried first.
+		"""
+		first = unittest.mock.MagicMock(return_value=False)
+		second = unittest.mock.MagicMock(side_effect=lambda instance: instance != 0)
+		self.data_plugins["first"] = _data_plugin(first)
+		self.data_plugins["second"] = _data_plugin(second)
+		self.assertEqual(datatype.data.type_of(42), "second")
+		first.reset_mock()
+		self.assertEqual(datatype.data.type_of(43), "second")
+		first.assert_not_called()
+		self.assertIsNone(datatype.data.type_of(0), "The remembered data type must still check the value.")
+
+	def test_type_of_unknown(self):
+		"""
+		Tests finding the data type of an object that has none.
+		"""
+		self.data_plugins["integer"] = _data_plugin(lambda instance: False, instance_types=[int])
+		self.assertIsNone(datatype.data.type_of("not an integer"))
+
+	def test_type_of_serialised_magic(self):
+		"""
+		Tests whether data types with magic prefixes are only asked about bytes
+		that start with one of their prefixes.
+		"""
+		image = unittest.mock.MagicMock(return_value=True)
+		number = unittest.mock.MagicMock(return_value=True)
+		self.data_plugins["image"] = _data_plugin(is_serialised=image, magic=[b"\x89PNG", b"GIF8"])
+		self.data_plugins["number"] = _data_plugin(is_serialised=number, magic=[b"-", b"4"])
+		self.assertEqual(datatype.data.type_of_serialised(b"42"), "number")
+		image.assert_not_called()
+		number.reset_mock()
+		self.assertEqual(datatype.data.type_of_serialised(b"GIF89a"), "image")
+		number.assert_not_called()
+		self.assertIsNone(datatype.data.type_of_serialised(b"GIF"), "The prefix must match entirely.")
+		self.assertFalse(datatype.data.is_serialised("number", b"GIF89a"), "A plug-in must not be asked about bytes without its prefix.")
+
+	def test_type_of_serialised_order(self):
+		"""
+		Tests whether data types with a matching magic prefix take precedence
+		over data types without magic prefixes, and whether data types without
+		magic prefixes are still asked otherwise.
+		"""
+		self.data_plugins["anything"] = _data_plugin(is_serialised=lambda serialised: True)
+		self.data_plugins["number"] = _data_plugin(is_serialised=lambda serialised: True, magic=[b"4"])
+		self.data_plugins["rejecting"] = _data_plugin(is_serialised=lambda serialised: False, magic=[b"1"])
+		self.assertEqual(datatype.data.type_of_serialised(b"42"), "number", "A matching magic prefix must win over an earlier data type without magic.")
+		self.assertEqual(datatype.data.type_of_serialised(b"13"), "anything", "If the data type with matching magic rejects the bytes, the other data types must still be asked.")
+		self.assertEqual(datatype.data.type_of_serialised(b"ghostkeeper"), "anything")
+
+	def test_type_of_serialised_pre_filter(self):
+		"""
+		Tests whether the full check is skipped if the pre-filter rejects the
+		bytes, and whether the full check gets only the sniffed bytes.
+		"""
+		is_serialised = unittest.mock.MagicMock(return_value=True)
+		self.data_plugins["word"] = _data_plugin(is_serialised=is_serialised, pre_filter=lambda serialised: serialised[:1].isalpha(), sniff_length=4)
+		self.assertIsNone(datatype.data.type_of_serialised(b"42"))
+		is_serialised.assert_not_called()
+		self.assertEqual(datatype.data.type_of_serialised(b"ghostkeeper"), "word")
+		is_serialised.assert_called_once_with(b"ghos")
\ No newline at end of file
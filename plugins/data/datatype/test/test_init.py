@@ -79,6 +79,65 @@ class TestDataType(luna.tests.TestCase):
 				}
 			}
 		},
+		"instance_types": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"instance_types": [int, luna.tests.CallableObject]
+				}
+			}
+		},
+		"batch": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"deserialise_many": luna.tests.arbitrary_function,
+					"serialise_many": luna.tests.arbitrary_function
+				}
+			}
+		},
+		"streaming": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"deserialise_stream": luna.tests.arbitrary_function,
+					"serialise_stream": luna.tests.arbitrary_function
+				}
+			}
+		},
+		"sniffing": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"magic": [b"\x89PNG", b"GIF"],
+					"sniff_length": 64,
+					"pre_filter": luna.tests.arbitrary_function
+				}
+			}
+		},
+		"converters": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"converters": {"real": float, "text": luna.tests.arbitrary_function}
+				}
+			}
+		},
 		"mime_type_specialchars": {
 			"metadata": {
 				"data": {
@@ -226,6 +285,138 @@ def test_validate_metadata_correct(self, metadata):
 					"extensions": "doc" #Must be a sequence, not a single extension.
 				}
 			}
+		},
+		"instance_types_single": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"instance_types": int #Must be a sequence, not a single class.
+				}
+			}
+		},
+		"deserialise_many_not_callable": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"deserialise_many": [luna.tests.arbitrary_function]
+				}
+			}
+		},
+		"serialise_stream_not_callable": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"serialise_stream": "Not a function"
+				}
+			}
+		},
+		"magic_single": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"magic": b"GIF" #Must be a sequence, not a single prefix.
+				}
+			}
+		},
+		"magic_not_bytes": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"magic": ["GIF"]
+				}
+			}
+		},
+		"magic_empty": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"magic": [b""]
+				}
+			}
+		},
+		"sniff_length_zero": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"sniff_length": 0
+				}
+			}
+		},
+		"sniff_length_bool": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"sniff_length": True
+				}
+			}
+		},
+		"pre_filter_not_callable": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"pre_filter": 42
+				}
+			}
+		},
+		"converters_not_dictionary": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"converters": [float]
+				}
+			}
+		},
+		"converter_not_callable": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"converters": {"real": 42}
+				}
+			}
+		},
+		"instance_types_not_classes": {
+			"metadata": {
+				"data": {
+					"deserialise": luna.tests.arbitrary_function,
+					"is_instance": luna.tests.arbitrary_function,
+					"is_serialised": luna.tests.arbitrary_function,
+					"serialise": luna.tests.arbitrary_function,
+					"instance_types": [42]
+				}
+			}
 		}
 	})
 	def test_validate_metadata_incorrect(self, metadata):
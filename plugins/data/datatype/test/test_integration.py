@@ -8,10 +8,18 @@
 Tests for each data plug-in whether it properly implements the data interface.
 """
 
+import array #For an example array of real numbers.
+import concurrent.futures #To deserialise in spawned processes.
+import functools #To deserialise in spawned processes.
+import io #To provide streams to deserialise.
+import multiprocessing #To deserialise in spawned processes.
 import os.path #To generate the plug-in directory.
 import sys #To find any plug-in directories in the Python Path.
 import plistlib #For an example enumerated type.
+import random #To generate realistic arrays of real numbers.
+import unittest.mock #To always deserialise in multiple processes.
 
+import luna.pipeline #To test deserialising in a pipeline.
 import luna.plugins #To get the plug-ins to test with.
 import luna.stream #To provide byte streams as serialised input.
 import luna.tests #To create parametrised tests.
@@ -22,18 +30,125 @@
 		luna.plugins.add_plugin_location(os.path.join(root_path, "plugins"))
 luna.plugins.discover()
 
+def _real_array(distribution):
+	"""
+	Creates an array of real numbers with a realistic distribution, rather than
+	a handful of hand-picked values.
+	:param distribution: A function that draws a number from a given
+	``random.Random`` generator.
+	:return: An array of 100 real numbers drawn from that distribution.
+	"""
+	generator = random.Random(1337) #Fixed seed, so that the tests are reproducible.
+	return array.array("d", (distribution(generator) for _ in range(100)))
+
 class TestIntegration(luna.tests.TestCase):
 	"""
 	Tests for each data plug-in whether it properly implements the data
 	interface.
 	"""
 
+	def test_convert(self):
+		"""
+		Tests converting between the data types of the real plug-ins.
+		"""
+		data = luna.plugins.api("data")
+		self.assertEqual(data.conversion_path("integer", "real"), ["integer", "real"])
+		self.assertEqual(data.convert(42, "real"), 42.0)
+		self.assertEqual(data.convert(3.5, "text"), "3.5")
+
+	@unittest.mock.patch("os.cpu_count", lambda: 2)
+	def test_deserialise_many_parallel(self):
+		"""
+		Tests deserialising a batch of different data types in multiple
+		processes.
+		"""
+		serialised = b"\n".join(b"%d" % number if number % 3 else b"%d.5" % number for number in range(3000)) + b"\nplistlib.PlistFormat.FMT_XML"
+		expected = [number if number % 3 else number + 0.5 for number in range(3000)] + [plistlib.PlistFormat.FMT_XML]
+		with unittest.mock.patch.object(luna.plugins.api("data"), "_POOL_START_TIME", float("-inf")): #Always worth it.
+			self.assertEqual(luna.plugins.api("data").deserialise_many(serialised, delimiter=b"\n", workers=2), expected)
+
+	def test_deserialise_pipeline(self):
+		"""
+		Tests detecting the types of records and deserialising them in a
+		pipeline.
+		"""
+		output = []
+		stages = [luna.pipeline.split(b"\n"), luna.pipeline.deserialise(workers=2), luna.pipeline.Stage(output.append)]
+		luna.pipeline.Pipeline([b"12\n-3.", b"5\n7"], stages).run()
+		self.assertEqual(output, [12, -3.5, 7])
+
+	def test_deserialise_pipeline_spawn(self):
+		"""
+		Tests deserialising in worker processes that don't inherit the data
+		plug-ins, because they are spawned rather than forked.
+		"""
+		spawning_executor = functools.partial(concurrent.futures.ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn"))
+		output = []
+		stages = [luna.pipeline.split(b"\n"), luna.pipeline.deserialise(workers=2, processes=True), luna.pipeline.Stage(output.append)]
+		with unittest.mock.patch("concurrent.futures.ProcessPoolExecutor", spawning_executor):
+			luna.pipeline.Pipeline([b"12\n-3.", b"5\n7"], stages).run()
+		self.assertEqual(output, [12, -3.5, 7])
+
+	def test_deserialise_stream_big_integer(self):
+		"""
+		Tests detecting and deserialising a stream with an integer in binary
+		form that is longer than the look-ahead of the stream.
+		"""
+		instance = 7 ** 1000000
+		serialised = luna.plugins.api("data").serialise(instance, "integer")
+		self.assertGreater(len(serialised), luna.stream.DEFAULT_BUFFER_SIZE, "The integer must not fit in the look-ahead.")
+		self.assertEqual(luna.plugins.api("data").type_of_serialised(luna.stream.PeekableStream(serialised)), "integer")
+		self.assertEqual(luna.plugins.api("data").deserialise_stream(io.BytesIO(serialised)), instance)
+
+	@luna.tests.parametrise({
+		"integer": {"serialised": b"42", "data_type": "integer", "instance": 42},
+		"real":    {"serialised": b"3.1416", "data_type": "real", "instance": 3.1416},
+		"enum":    {"serialised": b"plistlib.PlistFormat.FMT_XML", "data_type": "enumerated", "instance": plistlib.PlistFormat.FMT_XML},
+		"reals":   {"serialised": b"\x89LRA\r\n\x1a\n" + (1).to_bytes(8, "little") + array.array("d", [2.5]).tobytes(), "data_type": "realarray", "instance": array.array("d", [2.5])},
+		"uniform": {"serialised": b"\x89LRA\r\n\x1a\n" + (100).to_bytes(8, "little") + _real_array(lambda generator: generator.random()).tobytes(), "data_type": "realarray", "instance": _real_array(lambda generator: generator.random())},
+		"prices":  {"serialised": b"\x89LRA\r\n\x1a\n" + (100).to_bytes(8, "little") + _real_array(lambda generator: round(generator.uniform(1, 500), 2)).tobytes(), "data_type": "realarray", "instance": _real_array(lambda generator: round(generator.uniform(1, 500), 2))}
+	})
+	def test_deserialise_stream(self, serialised, data_type, instance):
+		"""
+		Tests detecting the type of a stream and then deserialising the same
+		stream.
+		:param serialised: The serialised data in the stream.
+		:param data_type: The data type that must be detected.
+		:param instance: The instance that must be deserialised.
+		"""
+		stream = luna.stream.PeekableStream(serialised)
+		self.assertEqual(luna.plugins.api("data").type_of_serialised(stream), data_type)
+		self.assertEqual(luna.plugins.api("data").deserialise(stream), instance, "Detecting the type must not consume the stream.")
+
+	@luna.tests.parametrise({
+		"integer": {"instance": 42, "data_type": "integer"},
+		"big_int": {"instance": 7 ** 5000, "data_type": "integer"},
+		"text":    {"instance": "Communism jokes are not funny unless everyone gets them.", "data_type": "text"},
+		"uniform": {"instance": _real_array(lambda generator: generator.random()), "data_type": "realarray"},
+		"gauss":   {"instance": _real_array(lambda generator: generator.gauss(0, 1)), "data_type": "realarray"},
+		"prices":  {"instance": _real_array(lambda generator: round(generator.uniform(1, 500), 2)), "data_type": "realarray"},
+		"counts":  {"instance": _real_array(lambda generator: float(generator.randrange(1000))), "data_type": "realarray"}
+	})
+	def test_serialise_deserialise(self, instance, data_type):
+		"""
+		Tests whether serialised data is detected as the correct data type and
+		deserialises to the original instance, with all data plug-ins present.
+		:param instance: The instance to serialise and deserialise.
+		:param data_type: The data type that the serialised form must be
+		detected as.
+		"""
+		data = luna.plugins.api("data")
+		serialised = data.serialise(instance)
+		self.assertEqual(data.type_of_serialised(serialised), data_type)
+		self.assertEqual(data.deserialise(serialised), instance)
+
 	@luna.tests.parametrise({
 		"none":    {"instance": None},
 		"integer": {"instance": 42},
 		"float":   {"instance": 3.14},
 		"string":  {"instance": "Communism jokes are not funny unless everyone gets them."},
 		"enum":    {"instance": plistlib.PlistFormat.FMT_XML}, #Some built-in enumerated type.
+		"reals":   {"instance": array.array("d", [1.0, 2.0])},
 		"object":  {"instance": object()}
 	})
 	def test_is_instance_unique(self, instance):
@@ -57,7 +172,10 @@ def test_is_instance_unique(self, instance):
 		"empty":   {"serialised": b""},
 		"integer": {"serialised": b"42"},
 		"float":   {"serialised": b"3.1416"},
+		"hex":     {"serialised": b"0x1.921ff2e48e8a7p+1"},
+		"big_int": {"serialised": b"\x89LBI\r\n\x1a\n" + (2).to_bytes(8, "little") + (1000).to_bytes(2, "little")},
 		"letters": {"serialised": b"ghostkeeper"},
+		"reals":   {"serialised": b"\x89LRA\r\n\x1a\n" + (2).to_bytes(8, "little") + array.array("d", [1.0, 2.0]).tobytes()}
 	})
 	def test_is_serialised_unique(self, serialised):
 		"""
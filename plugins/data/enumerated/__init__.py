@@ -39,7 +39,9 @@ def metadata():
 		"data": {
 			"serialise": enumerated.enumerated_type.serialise,
 			"deserialise": enumerated.enumerated_type.deserialise,
+			"deserialise_many": enumerated.enumerated_type.deserialise_many,
 			"is_instance": enumerated.enumerated_type.is_instance,
-			"is_serialised": enumerated.enumerated_type.is_serialised
+			"is_serialised": enumerated.enumerated_type.is_serialised,
+			"pre_filter": enumerated.enumerated_type.may_be_serialised
 		}
 	}
\ No newline at end of file
@@ -9,35 +9,64 @@
 """
 
 import enum #To check types against the Enum class.
-import io #To decode streams of UTF-8 data lazily.
+import functools #To cache the results of checking references and resolving them.
 import sys #To find pre-loaded enums in their original modules.
+import types #To find the modules that references are resolved through.
 import unicodedata #To see if the serialisation of enums has only allowed characters.
 
 import luna.plugins #To raise a SerialisationException.
 import luna.stream #To return streams of serialised enumerated types.
 
+_CACHED_LENGTH = 1024
+"""
+The maximum length of references of which the result of checking them is
+cached. Longer sequences are hardly ever references, and would take up a lot of
+memory in the cache.
+"""
+
 def deserialise(serialised):
 	"""
 	Deserialises a serialisation of an enumerated type.
+
+	The instances that references resolve to are cached. If any of the modules
+	that a cached reference was resolved through has since been replaced in
+	``sys.modules``, for instance by reloading it, the cache is cleared and the
+	reference is resolved again.
 	:param serialised: The bytes that represent an enumerated type.
 	:return: An instance of the enumerated type the sequence represents.
 	:raises SerialisationException: The serialisation does not represent an
 	enumerated type.
 	"""
-	try:
-		serialised_string = serialised.decode(encoding="utf_8")
-	except UnicodeDecodeError as e:
-		raise luna.plugins.api("data").SerialisationException("The serialised data is not UTF-8 encoded.") from e
-	path_segments = serialised_string.split(".")
-	if path_segments[0] not in sys.modules:
-		raise luna.plugins.api("data").SerialisationException("The serialised data does not represent an enumerated type or is not imported: {serialised}".format(serialised=serialised_string))
-	enum_instance = sys.modules[path_segments[0]]
-	for path_segment in path_segments[1:]: #Continue iterating where we left off.
+	serialised = bytes(serialised)
+	modules, instance = _resolve(serialised)
+	if any(sys.modules.get(name) is not module for name, module in modules): #Out of date.
+		_resolve.cache_clear()
+		_, instance = _resolve(serialised)
+	return instance
+
+def deserialise_many(serialised):
+	"""
+	Deserialises many serialisations of enumerated types.
+
+	Every distinct reference is resolved only once, so long sequences with few
+	distinct references are deserialised with a dictionary lookup per item.
+	:param serialised: A sequence of ``bytes`` objects that represent
+	enumerated types.
+	:return: A list of the instances that the sequences represent.
+	:raises SerialisationException: One of the serialisations does not
+	represent an enumerated type.
+	"""
+	interned = {}
+	result = []
+	for item in serialised:
+		item = bytes(item)
 		try:
-			enum_instance = getattr(enum_instance, path_segment) #Walk down the path with getattr.
-		except AttributeError as e:
-			raise luna.plugins.api("data").SerialisationException("The serialised data requests an enumerated type {qualname} that doesn't exist.".format(qualname=serialised_string)) from e
-	return enum_instance
+			result.append(interned[item])
+		except KeyError:
+			instance = deserialise(item)
+			interned[item] = instance
+			result.append(instance)
+	return result
 
 def is_instance(instance):
 	"""
@@ -51,28 +80,39 @@ def is_instance(instance):
 def is_serialised(serialised):
 	"""
 	Detects whether some bytes represent an enumerated type.
+
+	References in plain ASCII are checked with ``str.isidentifier``, which
+	follows the same rules for ASCII characters. References with other
+	characters are checked character by character against the Unicode
+	categories, and the results of those checks are cached.
 	:param serialised: The bytes of which the represented type is unknown.
 	:return: ``True`` if the bytes represent an enumerated type, or ``False``
 	if it doesn't.
 	"""
-	try:
-		unicode_string = io.TextIOWrapper(io.BytesIO(serialised), encoding="utf_8").readline() #Only need at most one line.
-	except UnicodeDecodeError:
-		return False #If it's not UTF-8 encoded, it's not an enum.
-	num_pieces = 1 #How many period-delimited pieces we find. We want at least 3: A module, a class and an instance.
-	next_should_continue = False #Whether the next character should be a continuation character (True) or a start character (False)
-	for character in unicode_string:
-		if next_should_continue: #Should be a continuation character.
-			if not _is_id_continue(character) and character != ".": #Also allow periods since Enums are serialised as fully qualified names.
-				return False
-			if character == ".":
-				next_should_continue = False
-				num_pieces += 1
-		else: #Should be a start character.
-			if not _is_id_start(character):
-				return False
-			next_should_continue = True
-	return next_should_continue and num_pieces >= 3 #All characters are correct, but we mustn't end with an empty piece.
+	serialised = bytes(serialised)
+	if serialised.isascii():
+		pieces = serialised.decode(encoding="ascii").split(".")
+		return len(pieces) >= 3 and all(piece.isidentifier() for piece in pieces) #At least a module, a class and an instance.
+	if len(serialised) > _CACHED_LENGTH:
+		return _is_unicode_reference.__wrapped__(serialised)
+	return _is_unicode_reference(serialised)
+
+def may_be_serialised(serialised):
+	"""
+	Quickly detects whether some bytes could represent an enumerated type.
+
+	Only the first byte is inspected. It must be able to start an identifier:
+	an ASCII letter, an underscore or the start of a non-ASCII character. This
+	is used to skip the full check for most bytes that are not enumerated
+	types.
+	:param serialised: The bytes of which the represented type is unknown.
+	:return: ``False`` if the bytes certainly don't represent an enumerated
+	type, or ``True`` if they might.
+	"""
+	if not serialised:
+		return False
+	first_byte = serialised[0]
+	return first_byte >= 0x80 or first_byte == b"_"[0] or (b"a"[0] <= first_byte | 0x20 <= b"z"[0])
 
 def serialise(instance):
 	"""
@@ -126,4 +166,66 @@ def _is_id_continue(character):
 	:return: ``True`` if the character is allowed as a first character, or
 	``False`` if it isn't.
 	"""
-	return unicodedata.category(character) in _allowed_id_continue_categories or character in _allowed_id_continue_characters or unicodedata.category(unicodedata.normalize("NFKC", character)) in _allowed_id_continue_categories or unicodedata.normalize("NFKC", character) in _allowed_id_continue_characters
\ No newline at end of file
+	return unicodedata.category(character) in _allowed_id_continue_categories or character in _allowed_id_continue_characters or unicodedata.category(unicodedata.normalize("NFKC", character)) in _allowed_id_continue_categories or unicodedata.normalize("NFKC", character) in _allowed_id_continue_characters
+
+@functools.lru_cache(maxsize=1024)
+def _is_unicode_reference(serialised):
+	"""
+	Detects whether bytes with non-ASCII characters represent an enumerated
+	type, by checking every character against the Unicode categories.
+
+	The results are cached, since checking the categories is slow.
+	:param serialised: The ``bytes`` of which the represented type is unknown.
+	:return: ``True`` if the bytes represent an enumerated type, or ``False``
+	if it doesn't.
+	"""
+	try:
+		unicode_string = serialised.decode(encoding="utf_8")
+	except UnicodeDecodeError:
+		return False #If it's not UTF-8 encoded, it's not an enum.
+	num_pieces = 1 #How many period-delimited pieces we find. We want at least 3: A module, a class and an instance.
+	next_should_continue = False #Whether the next character should be a continuation character (True) or a start character (False)
+	for character in unicode_string:
+		if next_should_continue: #Should be a continuation character.
+			if not _is_id_continue(character) and character != ".": #Also allow periods since Enums are serialised as fully qualified names.
+				return False
+			if character == ".":
+				next_should_continue = False
+				num_pieces += 1
+		else: #Should be a start character.
+			if not _is_id_start(character):
+				return False
+			next_should_continue = True
+	return next_should_continue and num_pieces >= 3 #All characters are correct, but we mustn't end with an empty piece.
+
+@functools.lru_cache(maxsize=1024)
+def _resolve(serialised):
+	"""
+	Finds the instance that a serialised reference refers to.
+
+	The results are cached, so this also returns which modules the reference
+	was resolved through. If any of those is replaced, the result is out of
+	date.
+	:param serialised: The ``bytes`` that represent an enumerated type.
+	:return: A tuple with a tuple of the names and module objects that the
+	reference was resolved through, and the instance that it refers to.
+	:raises SerialisationException: The serialisation does not represent an
+	enumerated type.
+	"""
+	try:
+		serialised_string = serialised.decode(encoding="utf_8")
+	except UnicodeDecodeError as e:
+		raise luna.plugins.api("data").SerialisationException("The serialised data is not UTF-8 encoded.") from e
+	path_segments = serialised_string.split(".")
+	if path_segments[0] not in sys.modules:
+		raise luna.plugins.api("data").SerialisationException("The serialised data does not represent an enumerated type or is not imported: {serialised}".format(serialised=serialised_string))
+	enum_instance = sys.modules[path_segments[0]]
+	modules = [(path_segments[0], enum_instance)]
+	for path_segment in path_segments[1:]: #Continue iterating where we left off.
+		try:
+			enum_instance = getattr(enum_instance, path_segment) #Walk down the path with getattr.
+		except AttributeError as e:
+			raise luna.plugins.api("data").SerialisationException("The serialised data requests an enumerated type {qualname} that doesn't exist.".format(qualname=serialised_string)) from e
+		if isinstance(enum_instance, types.ModuleType) and sys.modules.get(enum_instance.__name__) is enum_instance: #A submodule, which may be replaced separately.
+			modules.append((enum_instance.__name__, enum_instance))
+	return tuple(modules), enum_instance
\ No newline at end of file
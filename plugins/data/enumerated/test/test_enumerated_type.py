@@ -13,6 +13,9 @@
 
 import enum #To define example enumerated types to test with.
 import plistlib #Built-in enumerated types to test with.
+import random #To generate random candidates for the fuzz test.
+import sys #To replace modules that enumerated types are resolved through.
+import types #To create modules to replace.
 import unittest.mock #To replace the dependency on the data module.
 
 import enumerated.enumerated_type #The module we're testing.
@@ -80,6 +83,39 @@ def test_deserialise(self, serialised):
 		result = enumerated.enumerated_type.deserialise(serialised)
 		self.assertIsInstance(result, enum.Enum)
 
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_deserialise_many(self):
+		"""
+		Tests whether deserialising many references at once gives the same
+		results as deserialising them one by one, and resolves every distinct
+		reference only once.
+		"""
+		serialised = [b"enumerated.test.test_enumerated_type.Animal.CAT", bytearray(b"plistlib.PlistFormat.FMT_BINARY")] * 1000 + [b"enumerated.test.test_enumerated_type.EnumContainer.Material.STONE"]
+		with unittest.mock.patch("enumerated.enumerated_type.deserialise", unittest.mock.MagicMock(wraps=enumerated.enumerated_type.deserialise)) as deserialise:
+			result = enumerated.enumerated_type.deserialise_many(serialised)
+			self.assertEqual(deserialise.call_count, 3, "Repeated references must be resolved only once.")
+		self.assertEqual(result, [enumerated.enumerated_type.deserialise(item) for item in serialised])
+		with self.assertRaises(luna.tests.MockException):
+			enumerated.enumerated_type.deserialise_many([b"enumerated.test.test_enumerated_type.Animal.CAT", b"enumerated.test.test_enumerated_type.Animal.SNAKE"])
+
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_deserialise_module_replaced(self):
+		"""
+		Tests whether references are resolved again if a module that they were
+		resolved through is replaced, such as when it's reloaded.
+		"""
+		first = types.ModuleType("reloaded")
+		first.Animal = Animal
+		second = types.ModuleType("reloaded")
+		second.Animal = enum.Enum("Animal", ["CAT", "DOG", "BIRD"])
+		with unittest.mock.patch.dict(sys.modules, {"reloaded": first}):
+			self.assertIs(enumerated.enumerated_type.deserialise(b"reloaded.Animal.CAT"), Animal.CAT)
+			self.assertIs(enumerated.enumerated_type.deserialise(b"reloaded.Animal.CAT"), Animal.CAT, "Resolving from the cache must give the same instance.")
+			sys.modules["reloaded"] = second
+			self.assertIs(enumerated.enumerated_type.deserialise(b"reloaded.Animal.CAT"), second.Animal.CAT, "After replacing the module, the new module must be used.")
+		with self.assertRaises(luna.tests.MockException):
+			enumerated.enumerated_type.deserialise(b"reloaded.Animal.CAT") #The module is no longer loaded at all.
+
 	@luna.tests.parametrise({
 		"not_utf_8":           {"serialised": bytes([0x80, 0x61, 0x62, 0x63])}, #First 0x80, the Euro sign, which is not an allowed start character for UTF-8. Then followed by "abc".
 		"unknown_module":      {"serialised": b"evilcorp.destroy_the_world.VirusType.RANSOMWARE"}, #evilcorp does not exist.
@@ -116,6 +152,26 @@ def test_deserialise_serialise(self, serialised):
 		new_serialised = enumerated.enumerated_type.serialise(instance)
 		self.assertEqual(serialised, new_serialised, "The serialised form must be consistent after deserialising and serialising.")
 
+	@luna.tests.parametrise({
+		"ascii":      {"serialised": b"module.Type.INSTANCE", "expected": True},
+		"underscore": {"serialised": b"_private.Type.INSTANCE", "expected": True},
+		"non_ascii":  {"serialised": "ŇţȕʭπҎ.Type.INSTANCE".encode("utf_8"), "expected": True},
+		"empty":      {"serialised": b"", "expected": False},
+		"digit":      {"serialised": b"42", "expected": False},
+		"sign":       {"serialised": b"-3.14", "expected": False},
+		"bracket":    {"serialised": b"[module.Type.INSTANCE]", "expected": False}
+	})
+	def test_may_be_serialised(self, serialised, expected):
+		"""
+		Tests the quick pre-filter that rejects bytes that certainly don't
+		represent enumerated types.
+		:param serialised: The bytes to check.
+		:param expected: Whether the bytes may represent an enumerated type.
+		"""
+		self.assertEqual(enumerated.enumerated_type.may_be_serialised(serialised), expected)
+		if enumerated.enumerated_type.is_serialised(serialised):
+			self.assertTrue(enumerated.enumerated_type.may_be_serialised(serialised), "The pre-filter must never reject serialised enumerated types.")
+
 	@luna.tests.parametrise({
 		"module_local":  {"instance": Animal.CAT},
 		"module_local2": {"instance": Animal.BIRD}, #Different module-local one that is not the first-defined entry.
@@ -170,6 +226,33 @@ def test_is_not_serialised(self, serialised):
 		"""
 		self.assertFalse(enumerated.enumerated_type.is_serialised(serialised), "This must not be identified as a serialised enumerated type.")
 
+	def test_is_serialised_cached(self):
+		"""
+		Tests whether references with non-ASCII characters are only checked
+		character by character once.
+		"""
+		enumerated.enumerated_type._is_unicode_reference.cache_clear()
+		serialised = "módulo.Tipo.INSTÂNCIA".encode("utf_8")
+		with unittest.mock.patch("enumerated.enumerated_type._is_id_start", unittest.mock.MagicMock(wraps=enumerated.enumerated_type._is_id_start)) as is_id_start:
+			self.assertTrue(enumerated.enumerated_type.is_serialised(serialised))
+			self.assertTrue(enumerated.enumerated_type.is_serialised(bytearray(serialised)), "Mutable bytes must be checked the same way.")
+			self.assertEqual(is_id_start.call_count, 3, "The second time, the result must come from the cache.")
+
+	def test_is_serialised_fuzz(self):
+		"""
+		Tests whether the fast path for ASCII references gives the same results
+		as checking every character against the Unicode categories.
+
+		The candidates are random combinations of the characters that matter to
+		references, so that many of them are valid or nearly valid.
+		"""
+		generator = random.Random(1337) #Fixed seed, so that failures can be reproduced.
+		alphabet = b"aZ_9" * 8 + b" -\n\r(" #Mostly valid characters.
+		candidates = [b".".join(bytes(generator.choice(alphabet) for _ in range(generator.randrange(4))) for _ in range(generator.randrange(1, 5))) for _ in range(20000)]
+		expected = [enumerated.enumerated_type._is_unicode_reference.__wrapped__(candidate) for candidate in candidates] #Bypass the cache and the fast path.
+		self.assertGreater(sum(expected), 100, "The fuzz test must generate enough valid references to be meaningful.")
+		self.assertEqual([enumerated.enumerated_type.is_serialised(candidate) for candidate in candidates], expected)
+
 	@luna.tests.parametrise({
 		"simple":        {"serialised": b"module.Type.INSTANCE"},
 		"long":          {"serialised": b"module.submodule.Class.Subclass.Type.INSTANCE"},
@@ -35,7 +35,12 @@ def metadata():
 		"data": {
 			"serialise": integer_module.serialise,
 			"deserialise": integer_module.deserialise,
+			"serialise_many": integer_module.serialise_many,
+			"deserialise_many": integer_module.deserialise_many,
 			"is_instance": integer_module.is_instance,
-			"is_serialised": integer_module.is_serialised
+			"is_serialised": integer_module.is_serialised,
+			"magic": [b"-", b"0", b"1", b"2", b"3", b"4", b"5", b"6", b"7", b"8", b"9", integer_module.BINARY_MAGIC], #Serialised numbers always start with a sign, a digit or the header of the binary form.
+			"instance_types": [int],
+			"converters": {"real": integer_module.to_real}
 		}
 	}
\ No newline at end of file
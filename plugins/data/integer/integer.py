@@ -8,24 +8,127 @@
 Provides the implementation of integers as a data type definition.
 
 Integers are serialised in a human-readable format as a string of base 10.
+Very large integers are serialised in binary instead, since converting them to
+and from base 10 takes quadratic time, and CPython refuses to convert integers
+with more than a few thousand digits. The binary form starts with a header of
+16 bytes: 8 magic bytes followed by the length of the integer in bytes as a
+little-endian 64-bit unsigned integer. After the header follows the integer
+itself, in little-endian two's complement. Both forms are recognised when
+deserialising.
 """
 
+import array #To return many integers compactly.
+import json #To parse many integers at once.
+
 import luna.plugins #To access the data API for raising SerialisationExceptions.
 
+try:
+	import numpy #Optional, to parse many integers faster and return them as a NumPy array.
+except ImportError: #NumPy is not installed. Use the array module instead.
+	numpy = None
+
+BINARY_MAGIC = b"\x89LBI\r\n\x1a\n"
+"""
+The bytes that every integer in binary form starts with.
+
+Like the signature of PNG files, this contains a byte with the high bit set
+and line breaks of both styles, so that transfers that mangle binary data are
+detected. It can't be confused with an integer in base 10.
+"""
+
+_BINARY_HEADER_SIZE = 16
+"""
+The number of bytes before the integer itself in the binary form.
+"""
+
+_DECIMAL_MAX_BITS = 14000
+"""
+The maximum number of bits of integers that are serialised in base 10 by
+default. Larger integers are serialised in binary.
+
+This is about 4200 digits, so that every integer that is serialised in base 10
+can be deserialised within CPython's default limit of 4300 digits. It doesn't
+depend on the configured limit, so that the serialised form is the same on
+every machine.
+"""
+
+_DIGITS = b"0123456789"
+"""
+The bytes that represent digits.
+"""
+
 def deserialise(serialised):
 	"""
 	Interprets a sequence of bytes that represents an integer.
-	:param serialised: A ``bytes`` object that represents an integer.
+
+	The integer may be in base 10 or in binary form.
+	:param serialised: A bytes-like object that represents an integer.
 	:return: The integer that was being represented by the bytes.
 	"""
+	if serialised[:len(BINARY_MAGIC)] == BINARY_MAGIC:
+		if not _is_binary(serialised):
+			raise luna.plugins.api("data").SerialisationException("The serialised sequence is shorter or longer than the length of the integer in its header.")
+		return int.from_bytes(memoryview(serialised)[_BINARY_HEADER_SIZE:], "little", signed=True)
 	try:
-		instance = int(serialised.decode(encoding="utf-8"))
+		instance = int(bytes(serialised).decode(encoding="utf-8"))
 	except UnicodeDecodeError as e:
 		raise luna.plugins.api("data").SerialisationException("The serialised sequence is not proper UTF-8, so it doesn't represent an integer.") from e
 	except ValueError as e:
 		raise luna.plugins.api("data").SerialisationException("The serialised sequence does not represent an integer with base 10.") from e
 	return instance
 
+def deserialise_array(serialised, delimiter=b"\n"):
+	"""
+	Interprets a buffer of delimited integers.
+
+	The whole buffer is validated with ``is_serialised_many`` first, after
+	which all integers are parsed at once. The integers are returned in a
+	compact form: a NumPy array if NumPy is installed, or an ``array`` of
+	64-bit integers otherwise.
+	:param serialised: A bytes-like object that contains integers separated by
+	the delimiter. An empty buffer contains no integers.
+	:param delimiter: The single byte that separates the integers, such as a
+	line break or a comma.
+	:return: An array of the integers in the buffer, in the same order.
+	:raises SerialisationException: The buffer doesn't represent delimited
+	integers, or one of the integers doesn't fit in 64 bits.
+	"""
+	serialised = bytes(serialised)
+	if not is_serialised_many(serialised, delimiter):
+		raise luna.plugins.api("data").SerialisationException("The serialised buffer does not represent integers with base 10, separated by {delimiter}.".format(delimiter=repr(delimiter)))
+	if not serialised:
+		return numpy.zeros(0, dtype=numpy.int64) if numpy is not None else array.array("q")
+	try:
+		if numpy is not None:
+			pieces = serialised.split(delimiter)
+			if max(len(piece) for piece in pieces) <= 18: #A sign and 18 digits always fit in 64 bits, so NumPy can convert them without checking.
+				return numpy.array(pieces).astype(numpy.int64)
+			return numpy.array([int(piece) for piece in pieces], dtype=numpy.int64)
+		try:
+			instances = json.loads(b"[" + serialised.replace(delimiter, b",") + b"]") #The buffer was validated, so this is a JSON list of numbers, parsed by a fast decoder.
+		except ValueError: #Leading zeroes are not allowed in JSON.
+			instances = [int(piece) for piece in serialised.split(delimiter)]
+		return array.array("q", instances)
+	except (OverflowError, ValueError) as e: #Integers with more digits than Python converts give a ValueError.
+		raise luna.plugins.api("data").SerialisationException("One of the serialised integers doesn't fit in 64 bits.") from e
+
+def deserialise_many(serialised):
+	"""
+	Interprets many sequences of bytes that represent integers.
+
+	All sequences are first converted without decoding them. If that fails,
+	for instance because some are in binary form, they are deserialised one by
+	one, which gives the same results as ``deserialise``, including its
+	exceptions.
+	:param serialised: A sequence of ``bytes`` objects that represent integers.
+	:return: A list of the integers that were being represented by the bytes.
+	"""
+	serialised = list(serialised) #May need to be iterated twice.
+	try:
+		return [int(item) for item in serialised]
+	except (TypeError, ValueError): #Not plain ASCII, or not an integer at all.
+		return [deserialise(item) for item in serialised]
+
 def is_instance(instance):
 	"""
 	Detects whether some object is an integer.
@@ -37,22 +140,135 @@ def is_instance(instance):
 def is_serialised(serialised):
 	"""
 	Detects whether a ``bytes`` object represents an integer.
+
+	Integers in binary form are recognised by their header. The data after the
+	header may be shorter than the length in the header, since only the start of
+	a stream may be given. Whether the data is complete is only checked when
+	deserialising.
 	:param serialised: A ``bytes`` instance which must be identified as being an
 	integer or not.
 	:return: ``True`` if the ``bytes`` likely represent an integer, or ``False``
 	if they do not.
 	"""
+	if isinstance(serialised, memoryview):
+		if serialised[:len(BINARY_MAGIC)] == BINARY_MAGIC: #Check the header without copying the integer itself.
+			return _has_binary_header(serialised)
+		serialised = bytes(serialised) #Decimal integers are small, so copying them is cheaper than checking byte by byte.
+	if isinstance(serialised, (bytes, bytearray)): #Check all bytes at once.
+		if serialised[:len(BINARY_MAGIC)] == BINARY_MAGIC:
+			return _has_binary_header(serialised)
+		digits = serialised[1:] if serialised[:1] == b"-" else serialised #Minus is allowed for first byte, as negative sign.
+		return bool(digits) and not digits.translate(None, _DIGITS)
 	first_byte = True
+	has_digits = False
 	for byte in serialised:
 		if not (byte >= b"0"[0] and byte <= b"9"[0]) and not (first_byte and byte == b"-"[0]): #Minus is allowed for first byte, as negative sign.
 			return False #Not a byte representing a digit.
 		first_byte = False
-	return not first_byte #All characters are correct and there has been at least one byte.
+		has_digits = has_digits or byte != b"-"[0]
+	return has_digits #All characters are correct and there has been at least one digit.
+
+def is_serialised_many(serialised, delimiter=b"\n"):
+	"""
+	Detects whether a buffer contains only integers, separated by a delimiter.
+
+	Instead of checking every byte in turn, the whole buffer is checked with a
+	few passes that are each done at once: Only digits, minus signs and
+	delimiters may occur, no integer may be empty, and minus signs may only
+	occur at the start of an integer, followed by a digit.
+	:param serialised: A bytes-like object that may contain integers separated
+	by the delimiter. An empty buffer contains no integers, which is valid.
+	:param delimiter: The single byte that separates the integers, such as a
+	line break or a comma.
+	:return: ``True`` if the buffer contains only delimited integers, or
+	``False`` if it doesn't.
+	:raises ValueError: The delimiter is not a single byte, or it is a digit or
+	a minus sign.
+	"""
+	if len(delimiter) != 1 or delimiter in _DIGITS or delimiter == b"-":
+		raise ValueError("The delimiter must be a single byte that is not part of integers, not {delimiter}.".format(delimiter=repr(delimiter)))
+	serialised = bytes(serialised)
+	if not serialised:
+		return True
+	if serialised.translate(None, _DIGITS + b"-" + delimiter): #Other bytes than these.
+		return False
+	if serialised.startswith(delimiter) or serialised.endswith(delimiter) or delimiter + delimiter in serialised: #Empty integers.
+		return False
+	if serialised.endswith(b"-") or b"-" + delimiter in serialised: #Minus signs without digits.
+		return False
+	return serialised.count(b"-") == serialised.startswith(b"-") + serialised.count(delimiter + b"-") #Minus signs only at the start of integers.
 
-def serialise(instance):
+def serialise(instance, binary=None):
 	"""
 	Serialises an integer to bytes.
 	:param instance: The integer to serialise.
+	:param binary: Whether to serialise the integer in binary form rather than
+	in base 10. By default, only very large integers are serialised in binary
+	form.
 	:return: The ``bytes`` representing that integer.
 	"""
-	return str(instance).encode("utf_8")
\ No newline at end of file
+	if binary or (binary is None and instance.bit_length() > _DECIMAL_MAX_BITS):
+		return _serialise_binary(instance)
+	return str(instance).encode("utf_8")
+
+def serialise_many(instances, binary=None):
+	"""
+	Serialises many integers to bytes.
+	:param instances: A sequence of integers to serialise.
+	:param binary: Whether to serialise the integers in binary form rather than
+	in base 10. By default, only very large integers are serialised in binary
+	form.
+	:return: A list of ``bytes`` objects representing those integers.
+	"""
+	if binary is None:
+		return [str(instance).encode("utf_8") if instance.bit_length() <= _DECIMAL_MAX_BITS else _serialise_binary(instance) for instance in instances]
+	if binary:
+		return [_serialise_binary(instance) for instance in instances]
+	return [str(instance).encode("utf_8") for instance in instances]
+
+def to_real(instance):
+	"""
+	Converts an integer to a real number, without serialising it.
+	:param instance: The integer to convert.
+	:return: The real number closest to the integer.
+	:raises SerialisationException: The integer is too large to be represented
+	as a real number.
+	"""
+	try:
+		return float(instance)
+	except OverflowError as e:
+		raise luna.plugins.api("data").SerialisationException("The integer is too large to be represented as a real number.") from e
+
+def _has_binary_header(serialised):
+	"""
+	Detects whether a bytes-like object that starts with the magic bytes of the
+	binary form has a valid header.
+
+	The data after the header may be cut off, but it may not be longer than the
+	length in the header.
+	:param serialised: A bytes-like object that starts with ``BINARY_MAGIC``.
+	:return: ``True`` if the header is valid, or ``False`` if it isn't.
+	"""
+	if len(serialised) < _BINARY_HEADER_SIZE:
+		return False
+	length = int.from_bytes(serialised[len(BINARY_MAGIC):_BINARY_HEADER_SIZE], "little")
+	return 0 < length and len(serialised) - _BINARY_HEADER_SIZE <= length
+
+def _is_binary(serialised):
+	"""
+	Detects whether a bytes-like object that starts with the magic bytes of the
+	binary form has the length that its header announces.
+	:param serialised: A bytes-like object that starts with ``BINARY_MAGIC``.
+	:return: ``True`` if the length matches the header, or ``False`` if it
+	doesn't.
+	"""
+	return len(serialised) > _BINARY_HEADER_SIZE and int.from_bytes(serialised[len(BINARY_MAGIC):_BINARY_HEADER_SIZE], "little") == len(serialised) - _BINARY_HEADER_SIZE
+
+def _serialise_binary(instance):
+	"""
+	Serialises an integer to its binary form.
+	:param instance: The integer to serialise.
+	:return: The ``bytes`` representing that integer in binary form.
+	"""
+	length = instance.bit_length() // 8 + 1 #Room for the sign bit.
+	return BINARY_MAGIC + length.to_bytes(_BINARY_HEADER_SIZE - len(BINARY_MAGIC), "little") + instance.to_bytes(length, "little", signed=True)
\ No newline at end of file
@@ -57,7 +57,10 @@ def test_deserialise(self, serialised):
 		"not_utf_8":      {"serialised": bytes([0x80, 0x61, 0x62, 0x63])}, #First 0x80, the Euro sign, which is not an allowed start character for UTF-8. Then followed by "abc".
 		"letters":        {"serialised": b"ghostkeeper"},
 		"float":          {"serialised": b"3.1416"},
-		"round_float":    {"serialised": b"9.0"}
+		"round_float":    {"serialised": b"9.0"},
+		"binary_short":   {"serialised": b"\x89LBI\r\n\x1a\n" + (3).to_bytes(8, "little") + b"\x01\x02"},
+		"binary_long":    {"serialised": b"\x89LBI\r\n\x1a\n" + (1).to_bytes(8, "little") + b"\x01\x02"},
+		"binary_empty":   {"serialised": b"\x89LBI\r\n\x1a\n" + (0).to_bytes(8, "little")}
 	})
 	@unittest.mock.patch("luna.plugins.api", mock_api)
 	def test_deserialise_error(self, serialised):
@@ -68,11 +71,63 @@ def test_deserialise_error(self, serialised):
 		with self.assertRaises(luna.tests.MockException):
 			integer_module.deserialise(serialised)
 
+	@luna.tests.parametrise({
+		"empty":          {"serialised": b"", "delimiter": b"\n"},
+		"lines":          {"serialised": b"0\n42\n-99\n9223372036854775807\n-9223372036854775808", "delimiter": b"\n"},
+		"commas":         {"serialised": b"-1,-2,3", "delimiter": b","},
+		"leading_zeroes": {"serialised": b"007\n-00\n1", "delimiter": b"\n"} #Not allowed in JSON.
+	})
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_deserialise_array(self, serialised, delimiter):
+		"""
+		Tests whether parsing a buffer of integers at once gives the same
+		integers as deserialising them one by one.
+		:param serialised: A buffer of delimited integers.
+		:param delimiter: The delimiter between the integers.
+		"""
+		expected = [integer_module.deserialise(piece) for piece in serialised.split(delimiter)] if serialised else []
+		self.assertEqual(list(integer_module.deserialise_array(serialised, delimiter)), expected)
+
+	@luna.tests.parametrise({
+		"invalid":  {"serialised": b"1\nghostkeeper"},
+		"overflow": {"serialised": b"1\n9223372036854775808"}, #2^63 doesn't fit in 64 bits.
+		"too_long": {"serialised": b"1\n" + b"9" * 5000} #More digits than Python converts to an integer.
+	})
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_deserialise_array_error(self, serialised):
+		"""
+		Tests fail cases in which parsing a buffer of integers must give an
+		exception.
+		:param serialised: A buffer that can't be parsed into 64-bit integers.
+		"""
+		with self.assertRaises(luna.tests.MockException):
+			integer_module.deserialise_array(serialised)
+
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_deserialise_many(self):
+		"""
+		Tests whether deserialising many integers at once gives the same results as
+		deserialising them one by one.
+		"""
+		serialised = [b"0", b"42", b"-99", b"1000000000000000000000000"] + ["\u0664\u0662".encode("utf_8")] #Digits that are not ASCII must be handled by the fallback.
+		self.assertEqual(integer_module.deserialise_many(serialised), [integer_module.deserialise(item) for item in serialised])
+		self.assertEqual(integer_module.deserialise_many(iter(serialised)), [integer_module.deserialise(item) for item in serialised], "A generator must give the same results, also if the fallback is needed.")
+
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_deserialise_many_error(self):
+		"""
+		Tests whether deserialising many integers at once gives an exception if one
+		of them is not an integer.
+		"""
+		with self.assertRaises(luna.tests.MockException):
+			integer_module.deserialise_many([b"42", b"ghostkeeper"])
+
 	@luna.tests.parametrise({
 		"zero":       {"serialised": b"0"},
 		"fourtytwo":  {"serialised": b"42"},
 		"septillion": {"serialised": b"1000000000000000000000000"}, #10^24, way too large to be represented by 32-bit integers, or even 64-bit.
-		"negative":   {"serialised": b"-99"}
+		"negative":   {"serialised": b"-99"},
+		"huge":       {"serialised": b"\x89LBI\r\n\x1a\n" + (2000).to_bytes(8, "little") + b"\x01" * 1999 + b"\x7f"}
 	})
 	@unittest.mock.patch("luna.plugins.api", mock_api)
 	def test_deserialise_serialise(self, serialised):
@@ -121,7 +176,13 @@ def test_is_not_instance(self, instance):
 		"letters":        {"serialised": b"ghostkeeper"},
 		"foreign_digits": {"serialised": "４".encode("utf_8")},
 		"float":          {"serialised": b"3.1416"},
-		"round_float":    {"serialised": b"9.0"}
+		"round_float":    {"serialised": b"9.0"},
+		"minus_only":     {"serialised": b"-"},
+		"double_minus":   {"serialised": b"--1"},
+		"minus_inside":   {"serialised": b"1-1"},
+		"binary_header":  {"serialised": b"\x89LBI\r\n\x1a"}, #Header cut off.
+		"binary_long":    {"serialised": b"\x89LBI\r\n\x1a\n" + (1).to_bytes(8, "little") + b"\x01\x02"},
+		"binary_empty":   {"serialised": b"\x89LBI\r\n\x1a\n" + (0).to_bytes(8, "little")}
 	})
 	def test_is_not_serialised(self, serialised):
 		"""
@@ -131,6 +192,27 @@ def test_is_not_serialised(self, serialised):
 		integer.
 		"""
 		self.assertFalse(integer_module.is_serialised(serialised), "This must not be identified as a serialised integer.")
+		self.assertFalse(integer_module.is_serialised(iter(serialised)), "Checking byte by byte must give the same result.")
+
+	@luna.tests.parametrise({
+		"empty_integer":  {"serialised": b"1\n\n2"},
+		"leading":        {"serialised": b"\n1"},
+		"trailing":       {"serialised": b"1\n"},
+		"minus_only":     {"serialised": b"1\n-\n2"},
+		"minus_end":      {"serialised": b"1\n-"},
+		"double_minus":   {"serialised": b"1\n--2"},
+		"minus_inside":   {"serialised": b"1\n2-3"},
+		"comma":          {"serialised": b"1,2"},
+		"float":          {"serialised": b"1\n2.5"}
+	})
+	def test_is_not_serialised_many(self, serialised):
+		"""
+		Tests whether buffers that don't contain only delimited integers are
+		identified as such.
+		:param serialised: A buffer that doesn't contain only integers separated
+		by line breaks.
+		"""
+		self.assertFalse(integer_module.is_serialised_many(serialised), "This must not be identified as serialised integers.")
 
 	@luna.tests.parametrise({
 		"zero":       {"serialised": b"0"},
@@ -145,6 +227,49 @@ def test_is_serialised(self, serialised):
 		:param serialised: A correct serialised form of an integer.
 		"""
 		self.assertTrue(integer_module.is_serialised(serialised), "This must be identified as a serialised integer.")
+		self.assertTrue(integer_module.is_serialised(iter(serialised)), "Checking byte by byte must give the same result.")
+
+	@luna.tests.parametrise({
+		"complete": {"serialised": b"\x89LBI\r\n\x1a\n" + (2).to_bytes(8, "little") + b"\x01\x02"},
+		"cut_off":  {"serialised": b"\x89LBI\r\n\x1a\n" + (2000).to_bytes(8, "little") + b"\x01\x02"}, #Only the start of a stream.
+		"view":     {"serialised": memoryview(b"\x89LBI\r\n\x1a\n" + (2).to_bytes(8, "little") + b"\x01\x02")}
+	})
+	def test_is_serialised_binary(self, serialised):
+		"""
+		Tests whether the binary form of integers is identified by its header,
+		also if only the start of the data is given.
+		:param serialised: The start of the binary form of an integer.
+		"""
+		self.assertTrue(integer_module.is_serialised(serialised), "This must be identified as a serialised integer.")
+
+	@luna.tests.parametrise({
+		"empty":     {"serialised": b"", "delimiter": b"\n"},
+		"single":    {"serialised": b"-99", "delimiter": b"\n"},
+		"lines":     {"serialised": b"0\n42\n-99\n1000000000000000000000000", "delimiter": b"\n"},
+		"commas":    {"serialised": b"-1,-2,3", "delimiter": b","},
+		"bytearray": {"serialised": bytearray(b"1\n2"), "delimiter": b"\n"}
+	})
+	def test_is_serialised_many(self, serialised, delimiter):
+		"""
+		Tests whether buffers of delimited integers are identified as such.
+		:param serialised: A buffer of delimited integers.
+		:param delimiter: The delimiter between the integers.
+		"""
+		self.assertTrue(integer_module.is_serialised_many(serialised, delimiter), "This must be identified as serialised integers.")
+
+	@luna.tests.parametrise({
+		"empty": {"delimiter": b""},
+		"long":  {"delimiter": b", "},
+		"digit": {"delimiter": b"0"},
+		"minus": {"delimiter": b"-"}
+	})
+	def test_is_serialised_many_delimiter(self, delimiter):
+		"""
+		Tests whether delimiters that can't separate integers are refused.
+		:param delimiter: An invalid delimiter.
+		"""
+		with self.assertRaises(ValueError):
+			integer_module.is_serialised_many(b"1", delimiter)
 
 	@luna.tests.parametrise({
 		"zero":       {"instance": 0},
@@ -166,15 +291,67 @@ def test_serialise(self, instance):
 		"zero":       {"instance": 0},
 		"fourtytwo":  {"instance": 42},
 		"septillion": {"instance": 1000000000000000000000000}, #10^24, way too large to be represented by 32-bit integers, or even 64-bit.
-		"negative":   {"instance": -99}
+		"negative":   {"instance": -99},
+		"byte_edge":  {"instance": 128}, #Needs a second byte for the sign bit.
+		"byte_neg":   {"instance": -129},
+		"huge":       {"instance": 10 ** 5000}, #More digits than CPython converts to a string by default.
+		"huge_neg":   {"instance": -(10 ** 5000)}
 	})
 	@unittest.mock.patch("luna.plugins.api", mock_api)
 	def test_serialise_deserialise(self, instance):
 		"""
 		Tests whether serialising and then deserialising results in the original
-		instance.
+		instance, in base 10 as well as in binary form.
 		:param instance: The instance to start (and hopefully end up) with.
 		"""
 		serialised = integer_module.serialise(instance)
+		self.assertTrue(integer_module.is_serialised(serialised), "The serialised form must be recognised as an integer.")
 		deserialised = integer_module.deserialise(serialised)
-		self.assertEqual(instance, deserialised, "The integer must be the same after serialising and deserialising.")
\ No newline at end of file
+		self.assertEqual(instance, deserialised, "The integer must be the same after serialising and deserialising.")
+		serialised = integer_module.serialise(instance, binary=True)
+		self.assertTrue(integer_module.is_serialised(serialised), "The binary form must be recognised as an integer.")
+		self.assertEqual(instance, integer_module.deserialise(serialised), "The integer must be the same after serialising in binary form and deserialising.")
+
+	@luna.tests.parametrise({
+		"decimal": {"instance": -42},
+		"binary":  {"instance": 10 ** 20000}
+	})
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_serialise_deserialise_memoryview(self, instance):
+		"""
+		Tests whether serialised integers are recognised and deserialised from a
+		``memoryview``, such as a view on a mapped file.
+		:param instance: The integer to serialise.
+		"""
+		serialised = memoryview(integer_module.serialise(instance))
+		self.assertTrue(integer_module.is_serialised(serialised))
+		self.assertEqual(integer_module.deserialise(serialised), instance)
+		self.assertEqual(integer_module.is_serialised(serialised[:-1]), integer_module.is_serialised(bytes(serialised[:-1])), "A truncated view must be recognised the same way as truncated bytes.")
+
+	def test_serialise_huge(self):
+		"""
+		Tests whether only integers that are too large for base 10 are
+		serialised in binary form by default.
+		"""
+		self.assertEqual(integer_module.serialise(10 ** 4000), b"1" + b"0" * 4000)
+		self.assertTrue(integer_module.serialise(10 ** 5000).startswith(integer_module.BINARY_MAGIC))
+
+	def test_serialise_many(self):
+		"""
+		Tests whether serialising many integers at once gives the same results as
+		serialising them one by one.
+		"""
+		instances = [0, 42, -99, 10 ** 24, 10 ** 5000]
+		self.assertEqual(integer_module.serialise_many(instances), [integer_module.serialise(instance) for instance in instances])
+		self.assertEqual(integer_module.serialise_many(instances, binary=True), [integer_module.serialise(instance, binary=True) for instance in instances])
+		self.assertEqual(integer_module.deserialise_many(integer_module.serialise_many(instances)), instances)
+
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_to_real(self):
+		"""
+		Tests converting integers to real numbers.
+		"""
+		self.assertEqual(integer_module.to_real(-42), -42.0)
+		self.assertIsInstance(integer_module.to_real(10 ** 24), float)
+		with self.assertRaises(luna.tests.MockException):
+			integer_module.to_real(10 ** 400) #Larger than the largest real number.
\ No newline at end of file
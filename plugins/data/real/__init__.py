@@ -34,7 +34,11 @@ def metadata():
 		"data": {
 			"serialise": real.real_number.serialise,
 			"deserialise": real.real_number.deserialise,
+			"serialise_many": real.real_number.serialise_many,
+			"deserialise_many": real.real_number.deserialise_many,
 			"is_instance": real.real_number.is_instance,
-			"is_serialised": real.real_number.is_serialised
+			"is_serialised": real.real_number.is_serialised,
+			"magic": [b"-", b"0", b"1", b"2", b"3", b"4", b"5", b"6", b"7", b"8", b"9"], #Serialised numbers always start with a sign or a digit.
+			"instance_types": [float]
 		}
 	}
\ No newline at end of file
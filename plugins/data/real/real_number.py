@@ -7,25 +7,119 @@
 """
 Provides the implementation of real numbers as a data type definition.
 
-Real numbers are serialised in a human-readable format in base 10.
+Real numbers are serialised in a human-readable format in base 10. On request
+they are serialised in hexadecimal instead, as given by ``float.hex``. That is
+cheaper to format and always represents the number exactly. Both forms are
+recognised when deserialising.
 """
 
+import re #To check whether bytes represent a real number.
+
 import luna.plugins #To access the data API for raising SerialisationExceptions.
 
+_DIGITS = b"0123456789"
+"""
+The bytes that represent digits.
+"""
+
+_HEXADECIMAL_DIGITS = b"0123456789abcdefABCDEF"
+"""
+The bytes that represent hexadecimal digits.
+"""
+
+_HEXADECIMAL_PREFIX = re.compile(rb"-?0[xX]")
+"""
+The pattern that the start of real numbers in hexadecimal matches.
+"""
+
+_PATTERN = re.compile(rb"-?(?:[0-9]+(?:\.[0-9]+(?:[eE][-+]?[0-9]+)?|[eE][-+]?[0-9]+)|0[xX][0-9a-fA-F]+(?:\.[0-9a-fA-F]+)?[pP][-+]?[0-9]+)")
+"""
+The pattern that serialised real numbers match entirely.
+
+In base 10, an integer part is followed by a fractional part, an exponent or
+both. In hexadecimal, the ``0x`` prefix and the integer part are followed by an
+optional fractional part and a mandatory binary exponent, so that they can't be
+confused with integers. This is the same language that the transition table
+accepts.
+"""
+
+_REJECTED = 16
+"""
+The state of the transition table in which the bytes can no longer represent a
+real number.
+"""
+
+_TRANSITIONS = tuple(bytes(next((target for characters, target in edges if byte in characters), _REJECTED) for byte in range(256)) for edges in (
+	((b"-", 1), (b"0", 8), (_DIGITS, 2)),                      #0, initial: May be a negative sign or the integer part.
+	((b"0", 8), (_DIGITS, 2)),                                 #1, integer start: An integer must have at least one digit.
+	((_DIGITS, 2), (b".", 3), (b"eE", 5)),                     #2, integer: May continue with a fractional part or an exponent.
+	((_DIGITS, 4),),                                           #3, fractional start: A fractional part must have at least one digit.
+	((_DIGITS, 4), (b"eE", 5)),                                #4, fractional: May continue with an exponent. Accepting.
+	((b"-+", 6), (_DIGITS, 7)),                                #5, exponent initial: May be a sign or the exponent.
+	((_DIGITS, 7),),                                           #6, exponent start: An exponent must have at least one digit.
+	((_DIGITS, 7),),                                           #7, exponent. Accepting.
+	((_DIGITS, 2), (b".", 3), (b"eE", 5), (b"xX", 9)),         #8, zero: Like the integer, but may also start a hexadecimal number.
+	((_HEXADECIMAL_DIGITS, 10),),                              #9, hexadecimal start: Must have at least one hexadecimal digit.
+	((_HEXADECIMAL_DIGITS, 10), (b".", 11), (b"pP", 13)),      #10, hexadecimal integer: May continue with a fractional part or the exponent.
+	((_HEXADECIMAL_DIGITS, 12),),                              #11, hexadecimal fractional start: Must have at least one hexadecimal digit.
+	((_HEXADECIMAL_DIGITS, 12), (b"pP", 13)),                  #12, hexadecimal fractional: Must continue with the exponent.
+	((b"-+", 14), (_DIGITS, 15)),                              #13, binary exponent initial: May be a sign or the exponent.
+	((_DIGITS, 15),),                                          #14, binary exponent start: The exponent must have at least one digit.
+	((_DIGITS, 15),),                                          #15, binary exponent. Accepting.
+	()                                                         #16, rejected.
+))
+"""
+The finite state automaton that recognises serialised real numbers, for input
+that is not available as a whole.
+
+For every state, this holds 256 bytes that give the next state for every
+possible input byte.
+"""
+
+_ACCEPTING = {4, 7, 15}
+"""
+The states of the transition table in which the bytes so far represent a real
+number.
+"""
+
 def deserialise(serialised):
 	"""
 	Interprets ``bytes`` that represent a real number.
+
+	Real numbers in hexadecimal are recognised by their ``0x`` prefix.
 	:param serialised: The bytes that represent a real number.
 	:return: The real number that was being represented by the ``bytes``.
 	"""
 	try:
-		instance = float(serialised.decode(encoding="utf_8"))
+		if _HEXADECIMAL_PREFIX.match(serialised):
+			instance = float.fromhex(serialised.decode(encoding="utf_8"))
+		else:
+			instance = float(serialised.decode(encoding="utf_8"))
 	except UnicodeDecodeError as e:
 		raise luna.plugins.api("data").SerialisationException("The serialised sequence is not proper UTF-8, so it doesn't represent a real number.") from e
 	except ValueError as e:
 		raise luna.plugins.api("data").SerialisationException("The serialised sequence does not represent a real number.") from e
+	except OverflowError as e: #Only for hexadecimal. Too large numbers in base 10 become infinity.
+		raise luna.plugins.api("data").SerialisationException("The serialised sequence represents a real number that is too large.") from e
 	return instance
 
+def deserialise_many(serialised):
+	"""
+	Interprets many sequences of bytes that represent real numbers.
+
+	All sequences are first converted without decoding them. If that fails,
+	for instance because some are in hexadecimal, they are deserialised one by
+	one, which gives the same results as ``deserialise``, including its
+	exceptions.
+	:param serialised: A sequence of ``bytes`` objects that represent real numbers.
+	:return: A list of the real numbers that were being represented by the bytes.
+	"""
+	serialised = list(serialised) #May need to be iterated twice.
+	try:
+		return [float(item) for item in serialised]
+	except (TypeError, ValueError): #Not plain ASCII, or not a real number at all.
+		return [deserialise(item) for item in serialised]
+
 def is_instance(instance):
 	"""
 	Detects whether some object is a real number.
@@ -37,73 +131,61 @@ def is_instance(instance):
 def is_serialised(serialised):
 	"""
 	Detects whether some bytes represent a real number.
+
+	Bytes that are available as a whole are matched with a precompiled
+	pattern. Other sequences of bytes, such as streams, are fed through a
+	transition table byte by byte.
 	:param serialised: A ``bytes`` object which must be identified as being a
 	real number or not.
 	:return: ``True`` if the ``bytes`` likely represent a real number, or
 	``False`` if it does not.
 	"""
-	#This works with a simple finite state automaton in a linear fashion:
-	#initial -> integer_start -> integer -> fractional_start -> fractional -> exponent_initial -> exponent_start -> exponent
-	#Each state represents what character is expected next.
-	#The FSA solution is not pretty, but it's the only way it could be made to work with a possibly infinite byte stream.
-	state = "initial"
+	if isinstance(serialised, (bytes, bytearray, memoryview)): #Available as a whole, so the pattern can check it at once.
+		return _PATTERN.fullmatch(serialised) is not None
+	#Possibly an infinite byte stream, so go through it byte by byte with the finite state automaton.
+	state = 0
 	for byte in serialised:
-		if state == "initial": #Initial state: May be a negative sign or integer_start.
-			if byte == b"-"[0]:
-				state = "integer_start"
-			elif byte >= b"0"[0] and byte <= b"9"[0]:
-				state = "integer"
-			else:
-				return False
-		elif state == "integer_start": #First character of integer. An integer must have at least 1 digit.
-			if byte >= b"0"[0] and byte <= b"9"[0]:
-				state = "integer"
-			else:
-				return False
-		elif state == "integer": #Consecutive characters of the integer. May be a period, indicating start of fractional, or an E, indicating start of exponent.
-			if byte >= b"0"[0] and byte <= b"9"[0]:
-				pass #Still integer.
-			elif byte == b"."[0]:
-				state = "fractional_start"
-			elif byte == b"e"[0] or byte == b"E"[0]:
-				state = "exponent_initial"
-			else:
-				return False
-		elif state == "fractional_start": #Start of fractional part.
-			if byte >= b"0"[0] and byte <= b"9"[0]:
-				state = "fractional"
-			else:
-				return False
-		elif state == "fractional": #Continuation of factional part. May be an E, indicating start of exponent.
-			if byte >= b"0"[0] and byte <= b"9"[0]:
-				pass #Still fractional part.
-			elif byte == b"e"[0] or byte == b"E"[0]:
-				state = "exponent_initial"
-			else:
-				return False
-		elif state == "exponent_initial": #Initial state of exponent, may be negative or a number.
-			if byte == b"-"[0] or byte == b"+"[0]:
-				state = "exponent_start"
-			elif byte >= b"0"[0] and byte <= b"9"[0]:
-				state = "exponent"
-			else:
-				return False
-		elif state == "exponent_start": #First character of an exponent. Not an end state.
-			if byte >= b"0"[0] and byte <= b"9"[0]:
-				state = "exponent"
-			else:
-				return False
-		elif state == "exponent": #Continuation of an exponent.
-			if byte >= b"0"[0] and byte <= b"9"[0]:
-				pass #Still exponent.
-			else:
-				return False
-	return state == "fractional" or state == "exponent" #Allowable end states.
-
-def serialise(instance):
+		state = _TRANSITIONS[state][byte]
+		if state == _REJECTED:
+			return False
+	return state in _ACCEPTING
+
+def is_serialised_many(candidates):
+	"""
+	Detects for many sequences of bytes whether they represent real numbers.
+	:param candidates: A sequence of ``bytes`` objects of which the
+	represented type is unknown.
+	:return: A list with for every candidate ``True`` if it represents a real
+	number, or ``False`` if it doesn't.
+	"""
+	fullmatch = _PATTERN.fullmatch
+	candidates = list(candidates)
+	try:
+		return [fullmatch(candidate) is not None for candidate in candidates]
+	except TypeError: #Some candidates are not bytes-like, such as streams.
+		return [is_serialised(candidate) for candidate in candidates]
+
+def serialise(instance, hexadecimal=False):
 	"""
 	Serialises a real number to a sequence of bytes.
 	:param instance: The real number to serialise.
+	:param hexadecimal: Whether to serialise the number in hexadecimal rather
+	than in base 10. This is about twice as fast and represents every number
+	exactly, but it is hard to read for humans.
 	:return: A sequence of bytes representing the real number.
 	"""
-	return str(instance).encode("utf_8")
\ No newline at end of file
+	if hexadecimal:
+		return float.hex(instance).encode("utf_8")
+	return str(instance).encode("utf_8")
+
+def serialise_many(instances, hexadecimal=False):
+	"""
+	Serialises many real numbers to bytes.
+	:param instances: A sequence of real numbers to serialise.
+	:param hexadecimal: Whether to serialise the numbers in hexadecimal rather
+	than in base 10.
+	:return: A list of ``bytes`` objects representing those real numbers.
+	"""
+	if hexadecimal:
+		return [float.hex(instance).encode("utf_8") for instance in instances]
+	return [str(instance).encode("utf_8") for instance in instances]
\ No newline at end of file
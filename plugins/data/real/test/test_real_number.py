@@ -11,6 +11,7 @@
 module.
 """
 
+import random #To generate random candidates for the fuzz test.
 import unittest.mock #To replace the dependency on the data module.
 
 import real.real_number #The module we're testing.
@@ -30,6 +31,76 @@ def mock_api(plugin_type):
 		mock.SerialisationException = luna.tests.MockException
 	return mock
 
+def _reference_is_serialised(serialised):
+	"""
+	Detects whether some bytes represent a real number, the way it was done
+	before the pattern and the transition table were introduced.
+
+	This is the original finite state automaton, kept as the reference that
+	the faster implementations must agree with.
+	:param serialised: A ``bytes`` object which must be identified as being a
+	real number or not.
+	:return: ``True`` if the ``bytes`` likely represent a real number, or
+	``False`` if it does not.
+	"""
+	#This works with a simple finite state automaton in a linear fashion:
+	#initial -> integer_start -> integer -> fractional_start -> fractional -> exponent_initial -> exponent_start -> exponent
+	#Each state represents what character is expected next.
+	#The FSA solution is not pretty, but it's the only way it could be made to work with a possibly infinite byte stream.
+	state = "initial"
+	for byte in serialised:
+		if state == "initial": #Initial state: May be a negative sign or integer_start.
+			if byte == b"-"[0]:
+				state = "integer_start"
+			elif byte >= b"0"[0] and byte <= b"9"[0]:
+				state = "integer"
+			else:
+				return False
+		elif state == "integer_start": #First character of integer. An integer must have at least 1 digit.
+			if byte >= b"0"[0] and byte <= b"9"[0]:
+				state = "integer"
+			else:
+				return False
+		elif state == "integer": #Consecutive characters of the integer. May be a period, indicating start of fractional, or an E, indicating start of exponent.
+			if byte >= b"0"[0] and byte <= b"9"[0]:
+				pass #Still integer.
+			elif byte == b"."[0]:
+				state = "fractional_start"
+			elif byte == b"e"[0] or byte == b"E"[0]:
+				state = "exponent_initial"
+			else:
+				return False
+		elif state == "fractional_start": #Start of fractional part.
+			if byte >= b"0"[0] and byte <= b"9"[0]:
+				state = "fractional"
+			else:
+				return False
+		elif state == "fractional": #Continuation of factional part. May be an E, indicating start of exponent.
+			if byte >= b"0"[0] and byte <= b"9"[0]:
+				pass #Still fractional part.
+			elif byte == b"e"[0] or byte == b"E"[0]:
+				state = "exponent_initial"
+			else:
+				return False
+		elif state == "exponent_initial": #Initial state of exponent, may be negative or a number.
+			if byte == b"-"[0] or byte == b"+"[0]:
+				state = "exponent_start"
+			elif byte >= b"0"[0] and byte <= b"9"[0]:
+				state = "exponent"
+			else:
+				return False
+		elif state == "exponent_start": #First character of an exponent. Not an end state.
+			if byte >= b"0"[0] and byte <= b"9"[0]:
+				state = "exponent"
+			else:
+				return False
+		elif state == "exponent": #Continuation of an exponent.
+			if byte >= b"0"[0] and byte <= b"9"[0]:
+				pass #Still exponent.
+			else:
+				return False
+	return state == "fractional" or state == "exponent" #Allowable end states.
+
 class TestRealNumber(luna.tests.TestCase):
 	"""
 	Tests the behaviour of various functions belonging to real numbers.
@@ -50,7 +121,9 @@ class TestRealNumber(luna.tests.TestCase):
 		"negative_exp":   {"serialised": b"3e-100"},
 		"positive_exp":   {"serialised": b"7.1e+10"},
 		"float_rounding": {"serialised": b"3.0"}, #Number can't be exactly represented with IEEE 754.
-		"very_negative":  {"serialised": b"-1000000000000000000000000.0"} #-10^24.
+		"very_negative":  {"serialised": b"-1000000000000000000000000.0"}, #-10^24.
+		"hexadecimal":    {"serialised": b"0x1.921f9f01b866ep+1"},
+		"hex_negative":   {"serialised": b"-0x1.8p-3"}
 	})
 	@unittest.mock.patch("luna.plugins.api", mock_api)
 	def test_deserialise(self, serialised):
@@ -67,7 +140,10 @@ def test_deserialise(self, serialised):
 		"letters":         {"serialised": b"ghostkeeper"},
 		"imaginary":       {"serialised": b"9.8i"},
 		"no_exponent":     {"serialised": b"0.3e"},
-		"no_exponent_neg": {"serialised": b"0.3e-"}
+		"no_exponent_neg": {"serialised": b"0.3e-"},
+		"hex_no_digits":   {"serialised": b"0xp+1"},
+		"hex_overflow":    {"serialised": b"0x1p+1024"},
+		"hex_letters":     {"serialised": b"0xghostp+1"}
 	})
 	@unittest.mock.patch("luna.plugins.api", mock_api)
 	def test_deserialise_error(self, serialised):
@@ -78,6 +154,25 @@ def test_deserialise_error(self, serialised):
 		with self.assertRaises(luna.tests.MockException):
 			real.real_number.deserialise(serialised)
 
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_deserialise_many(self):
+		"""
+		Tests whether deserialising many real numbers at once gives the same results as
+		deserialising them one by one.
+		"""
+		serialised = [b"0.0", b"-3.2", b"2e100", b"7.1e+10", b"0x1.8p+1"] + ["\u0664.\u0662".encode("utf_8")] #Hexadecimal numbers and digits that are not ASCII must be handled by the fallback.
+		self.assertEqual(real.real_number.deserialise_many(serialised), [real.real_number.deserialise(item) for item in serialised])
+		self.assertEqual(real.real_number.deserialise_many(iter(serialised)), [real.real_number.deserialise(item) for item in serialised], "A generator must give the same results, also if the fallback is needed.")
+
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_deserialise_many_error(self):
+		"""
+		Tests whether deserialising many real numbers at once gives an exception if one
+		of them is not a real number.
+		"""
+		with self.assertRaises(luna.tests.MockException):
+			real.real_number.deserialise_many([b"3.2", b"0.3e"])
+
 	@luna.tests.parametrise({
 		"zero": {
 			"serialised": b"0.0"
@@ -187,6 +282,12 @@ def test_is_not_instance(self, instance):
 		"no_exponent":     {"serialised": b"0.3e"},
 		"no_exponent_neg": {"serialised": b"0.3e-"},
 		"minus":           {"serialised": b"-"},
+		"line_break":      {"serialised": b"1.0\n"},
+		"hex_integer":     {"serialised": b"0x1f"}, #Without binary exponent, this is not a real number.
+		"hex_no_prefix":   {"serialised": b"1.8p+1"},
+		"hex_no_fraction": {"serialised": b"0x1.p+1"},
+		"hex_exponent":    {"serialised": b"0x1.8pf"},
+		"hex_leading":     {"serialised": b"10x1.8p+1"}
 	})
 	def test_is_not_serialised(self, serialised):
 		"""
@@ -196,6 +297,8 @@ def test_is_not_serialised(self, serialised):
 		number.
 		"""
 		self.assertFalse(real.real_number.is_serialised(serialised), "{serialised} must not be identified as a serialised real number.".format(serialised=str(serialised)))
+		self.assertFalse(real.real_number.is_serialised(iter(serialised)), "Checking byte by byte must give the same result.")
+		self.assertEqual(real.real_number.is_serialised_many([serialised]), [False])
 
 	@luna.tests.parametrise({
 		"zero":           {"serialised": b"0.0"},
@@ -210,7 +313,11 @@ def test_is_not_serialised(self, serialised):
 		"negative_exp":   {"serialised": b"3e-100"},
 		"positive_exp":   {"serialised": b"7.1e+10"},
 		"float_rounding": {"serialised": b"3.0"}, #Number can't be exactly represented with IEEE 754.
-		"very_negative":  {"serialised": b"-1000000000000000000000000.0"} #-10^24.
+		"very_negative":  {"serialised": b"-1000000000000000000000000.0"}, #-10^24.
+		"hexadecimal":    {"serialised": b"0x1.921f9f01b866ep+1"},
+		"hex_negative":   {"serialised": b"-0x1.8p-3"},
+		"hex_uppercase":  {"serialised": b"0X1.AP3"},
+		"hex_no_frac":    {"serialised": b"0x1p+0"}
 	})
 	def test_is_serialised(self, serialised):
 		"""
@@ -219,6 +326,46 @@ def test_is_serialised(self, serialised):
 		:param serialised: A correct serialised form of a real number.
 		"""
 		self.assertTrue(real.real_number.is_serialised(serialised), "{serialised} must be identified as a serialised real number.".format(serialised=str(serialised)))
+		self.assertTrue(real.real_number.is_serialised(iter(serialised)), "Checking byte by byte must give the same result.")
+		self.assertEqual(real.real_number.is_serialised_many([serialised]), [True])
+
+	def test_is_serialised_fuzz(self):
+		"""
+		Tests whether the pattern, the transition table and the bulk variant
+		accept exactly the same bytes as the original finite state automaton.
+
+		The candidates are random combinations of the bytes that matter to
+		real numbers, so that many of them are valid or nearly valid.
+		"""
+		generator = random.Random(1337) #Fixed seed, so that failures can be reproduced.
+		alphabet = b"0123456789-+.eEx \n"
+		candidates = [bytes(generator.choice(alphabet) for _ in range(generator.randrange(12))) for _ in range(20000)]
+		candidates += [b"-" + candidate for candidate in candidates[:5000]]
+		expected = [_reference_is_serialised(candidate) for candidate in candidates]
+		self.assertGreater(sum(expected), 100, "The fuzz test must generate enough valid real numbers to be meaningful.")
+		self.assertEqual([real.real_number.is_serialised(candidate) for candidate in candidates], expected)
+		self.assertEqual([real.real_number.is_serialised(iter(candidate)) for candidate in candidates], expected)
+		self.assertEqual(real.real_number.is_serialised_many(candidates), expected)
+
+	def test_is_serialised_fuzz_hexadecimal(self):
+		"""
+		Tests whether the pattern, the transition table and the bulk variant
+		accept the same bytes in hexadecimal, and whether everything they
+		accept can be parsed, if it's not too large.
+		"""
+		generator = random.Random(1337) #Fixed seed, so that failures can be reproduced.
+		alphabet = b"0123456789abcdefxXpP-+."
+		candidates = [b"0x" + bytes(generator.choice(alphabet) for _ in range(generator.randrange(8))) for _ in range(20000)]
+		expected = [real.real_number.is_serialised(iter(candidate)) for candidate in candidates]
+		self.assertGreater(sum(expected), 100, "The fuzz test must generate enough valid real numbers to be meaningful.")
+		self.assertEqual([real.real_number.is_serialised(candidate) for candidate in candidates], expected)
+		self.assertEqual(real.real_number.is_serialised_many(candidates), expected)
+		for candidate, accepted in zip(candidates, expected):
+			if accepted:
+				try:
+					float.fromhex(candidate.decode("ascii")) #Must not raise ValueError.
+				except OverflowError:
+					pass
 
 	@luna.tests.parametrise({
 		"zero":          {"instance": 0.0},
@@ -247,7 +394,9 @@ def test_serialise(self, instance):
 		"very_big":      {"instance": 2e65},
 		"negative":      {"instance": -42.0},
 		"very_small":    {"instance": 3e-100},
-		"very_negative": {"instance": -1000000000000000000000000.0} #-10^24.
+		"very_negative": {"instance": -1000000000000000000000000.0}, #-10^24.
+		"subnormal":     {"instance": 5e-324},
+		"third":         {"instance": 1 / 3} #Not exactly representable in base 10.
 	})
 	@unittest.mock.patch("luna.plugins.api", mock_api)
 	def test_serialise_deserialise(self, instance):
@@ -258,4 +407,16 @@ def test_serialise_deserialise(self, instance):
 		"""
 		serialised = real.real_number.serialise(instance)
 		deserialised = real.real_number.deserialise(serialised)
-		self.assertEqual(instance, deserialised, "The real number {instance} must be the same after serialising and deserialising.".format(instance=str(instance)))
\ No newline at end of file
+		self.assertEqual(instance, deserialised, "The real number {instance} must be the same after serialising and deserialising.".format(instance=str(instance)))
+		serialised = real.real_number.serialise(instance, hexadecimal=True)
+		self.assertTrue(real.real_number.is_serialised(serialised), "The hexadecimal form must be recognised as a real number.")
+		self.assertEqual(instance, real.real_number.deserialise(serialised), "The real number {instance} must be the same after serialising in hexadecimal and deserialising.".format(instance=str(instance)))
+
+	def test_serialise_many(self):
+		"""
+		Tests whether serialising many real numbers at once gives the same results as
+		serialising them one by one.
+		"""
+		instances = [0.0, 3.1416, -42.0, 3e-100]
+		self.assertEqual(real.real_number.serialise_many(instances), [real.real_number.serialise(instance) for instance in instances])
+		self.assertEqual(real.real_number.serialise_many(instances, hexadecimal=True), [real.real_number.serialise(instance, hexadecimal=True) for instance in instances])
\ No newline at end of file
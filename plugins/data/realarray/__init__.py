@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+#This software is distributed under the Creative Commons license (CC0) version 1.0. A copy of this license should have been distributed with this software.
+#The license can also be read online: <https://creativecommons.org/publicdomain/zero/1.0/>. If this online license differs from the license provided with this software, the license provided with this software should be applied.
+
+"""
+Defines a data type for arrays of real numbers.
+
+Arrays of real numbers are serialised in a compact binary format: a small header
+followed by the numbers as little-endian 64-bit floating point numbers.
+"""
+
+import realarray.real_array #The functions that implement the data type.
+
+def metadata():
+	"""
+	Provides the metadata for the Real Array plug-in.
+
+	This gives human-readable information on the plug-in, dependency resolution
+	information, and tells the plug-in system what this plug-in can do.
+	:return: Dictionary of metadata.
+	"""
+	return {
+		"name": "Real Array",
+		"description": "Defines arrays of real numbers in a compact binary form, to be used as communication between application components.",
+		"version": 1,
+		"dependencies": {
+			"datatype": {
+				"version_min": 1,
+				"version_max": 1
+			}
+		},
+
+		"data": {
+			"serialise": realarray.real_array.serialise,
+			"deserialise": realarray.real_array.deserialise,
+			"serialise_stream": realarray.real_array.serialise_stream,
+			"deserialise_stream": realarray.real_array.deserialise_stream,
+			"is_instance": realarray.real_array.is_instance,
+			"is_serialised": realarray.real_array.is_serialised,
+			"magic": [realarray.real_array.MAGIC],
+			"sniff_length": realarray.real_array.HEADER_SIZE, #Only the header is checked.
+			"mime_type": "application/x-luna-real-array",
+			"name": "Real number array",
+			"extensions": [".f64"]
+		}
+	}
\ No newline at end of file
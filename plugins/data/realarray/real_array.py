@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+#This software is distributed under the Creative Commons license (CC0) version 1.0. A copy of this license should have been distributed with this software.
+#The license can also be read online: <https://creativecommons.org/publicdomain/zero/1.0/>. If this online license differs from the license provided with this software, the license provided with this software should be applied.
+
+"""
+Provides the implementation of arrays of real numbers as a data type
+definition.
+
+The serialised form starts with a header of 16 bytes: 8 magic bytes followed by
+the number of elements as a little-endian 64-bit unsigned integer. After the
+header, every element takes 8 bytes as a little-endian IEEE 754 double. This is
+about a third of the size of the text form of real numbers, and converting it
+needs no parsing.
+
+Instances are ``array.array`` objects with type code ``"d"``, or ``memoryview``
+objects of format ``"d"``. On little-endian machines, deserialising gives a
+``memoryview`` on the serialised data without copying it.
+"""
+
+import array #The compact form of the real numbers.
+import sys #To find the byte order of this machine.
+
+import luna.plugins #To access the data API for raising SerialisationExceptions.
+
+HEADER_SIZE = 16
+"""
+The number of bytes before the first element in the serialised form.
+"""
+
+MAGIC = b"\x89LRA\r\n\x1a\n"
+"""
+The bytes that every serialised array of real numbers starts with.
+
+Like the signature of PNG files, this contains a byte with the high bit set
+and line breaks of both styles, so that transfers that mangle binary data are
+detected. It also contains control characters, so it doesn't look like text.
+"""
+
+_ELEMENT_SIZE = 8
+"""
+The number of bytes of every element in the serialised form.
+"""
+
+_STREAM_BLOCK_COUNT = 65536
+"""
+The number of elements to make room for at once when reading from a stream,
+at least.
+
+The number of elements announced by the header is not trusted, since a corrupt
+header could announce more than fits in memory. The room is enlarged while the
+numbers arrive instead.
+"""
+
+def deserialise(serialised):
+	"""
+	Interprets ``bytes`` that represent an array of real numbers.
+
+	On little-endian machines, this doesn't copy the numbers. The result is a
+	read-only ``memoryview`` on the serialised data, which is kept alive as
+	long as the result is. On big-endian machines, the numbers are copied into
+	an ``array`` to swap their bytes.
+	:param serialised: The bytes-like object that represents an array of real
+	numbers.
+	:return: A ``memoryview`` of format ``"d"``, or an ``array`` with type code
+	``"d"`` on big-endian machines.
+	:raises SerialisationException: The bytes don't represent an array of real
+	numbers, or they have fewer or more numbers than announced.
+	"""
+	count = _read_header(serialised)
+	if len(serialised) != HEADER_SIZE + count * _ELEMENT_SIZE:
+		raise luna.plugins.api("data").SerialisationException("The serialised array announces {count} real numbers, but has {size} bytes of them.".format(count=count, size=len(serialised) - HEADER_SIZE))
+	elements = memoryview(serialised)[HEADER_SIZE:].cast("B").cast("d").toreadonly()
+	if sys.byteorder == "little":
+		return elements
+	instances = array.array("d", elements)
+	instances.byteswap()
+	return instances
+
+def deserialise_stream(reader):
+	"""
+	Reads an array of real numbers from a stream.
+
+	The numbers are read directly into an ``array``, without holding the
+	serialised form in memory as well. The array is enlarged in blocks while
+	the numbers arrive, so a header that announces more numbers than the stream
+	has can't make this allocate much more memory than the stream contains.
+	:param reader: A ``BytesStreamReader`` to read the serialised array from.
+	:return: An ``array`` with type code ``"d"``.
+	:raises SerialisationException: The stream doesn't represent an array of
+	real numbers, or it has fewer or more numbers than announced.
+	"""
+	count = _read_header(reader.read(HEADER_SIZE))
+	instances = array.array("d")
+	while len(instances) < count:
+		start = len(instances)
+		instances += array.array("d", [0.0]) * min(count - start, max(start, _STREAM_BLOCK_COUNT)) #Double the room, to copy only a constant number of times per element.
+		with memoryview(instances) as view:
+			with view[start:].cast("B") as buffer:
+				position = 0
+				while position < len(buffer):
+					num_read = reader.readinto(buffer[position:])
+					if not num_read:
+						raise luna.plugins.api("data").SerialisationException("The serialised array announces {count} real numbers, but the stream ended after {read}.".format(count=count, read=start + position // _ELEMENT_SIZE))
+					position += num_read
+	if reader.read(1):
+		raise luna.plugins.api("data").SerialisationException("The serialised array announces {count} real numbers, but the stream has more data.".format(count=count))
+	if sys.byteorder != "little":
+		instances.byteswap()
+	return instances
+
+def is_instance(instance):
+	"""
+	Detects whether some object is an array of real numbers.
+	:param instance: The object to determine the type of.
+	:return: ``True`` if the object is an ``array`` with type code ``"d"`` or a
+	one-dimensional ``memoryview`` of format ``"d"``, or ``False`` if it isn't.
+	"""
+	if isinstance(instance, array.array):
+		return instance.typecode == "d"
+	return isinstance(instance, memoryview) and instance.format == "d" and instance.ndim == 1
+
+def is_serialised(serialised):
+	"""
+	Detects whether some bytes represent an array of real numbers.
+
+	Only the header is checked, so this takes constant time. Whether the data
+	after the header is complete is only checked when deserialising.
+	:param serialised: A bytes-like object of which the represented type is
+	unknown.
+	:return: ``True`` if the bytes start with the header of an array of real
+	numbers, or ``False`` if they don't.
+	"""
+	return len(serialised) >= HEADER_SIZE and serialised[:len(MAGIC)] == MAGIC
+
+def serialise(instance):
+	"""
+	Serialises an array of real numbers.
+
+	Besides arrays of real numbers, this also accepts any other sequence of
+	real numbers, such as a list.
+	:param instance: The array of real numbers to serialise.
+	:return: The ``bytes`` that represent the array.
+	:raises SerialisationException: The instance is not a sequence of real
+	numbers.
+	"""
+	instances = _as_array(instance)
+	if sys.byteorder != "little":
+		instances = array.array("d", instances)
+		instances.byteswap()
+	with memoryview(instances) as view:
+		return _header(len(view)) + view.cast("B")
+
+def serialise_stream(instance, writer):
+	"""
+	Serialises an array of real numbers to a stream.
+
+	The numbers are written directly from the array, without making a
+	serialised copy of them first.
+	:param instance: The array of real numbers to serialise.
+	:param writer: A ``BytesStreamWriter`` to write the serialised array to.
+	:raises SerialisationException: The instance is not a sequence of real
+	numbers.
+	"""
+	instances = _as_array(instance)
+	if sys.byteorder != "little":
+		instances = array.array("d", instances)
+		instances.byteswap()
+	with memoryview(instances) as view:
+		writer.write(_header(len(view)))
+		writer.write(view.cast("B"))
+
+def _as_array(instance):
+	"""
+	Gives a contiguous buffer of doubles with the elements of an instance.
+
+	Arrays and contiguous ``memoryview`` objects of doubles are used without
+	copying them. Other sequences of real numbers are copied into an array.
+	:param instance: A sequence of real numbers.
+	:return: An object that supports the buffer protocol with format ``"d"``.
+	:raises SerialisationException: The instance is not a sequence of real
+	numbers.
+	"""
+	try:
+		with memoryview(instance) as view:
+			if view.format == "d" and view.ndim == 1 and view.c_contiguous:
+				return instance
+			raise luna.plugins.api("data").SerialisationException("The buffer to serialise has format {format} instead of doubles.".format(format=view.format))
+	except TypeError: #Doesn't support the buffer protocol, such as a list.
+		pass
+	try:
+		return array.array("d", instance)
+	except TypeError as e:
+		raise luna.plugins.api("data").SerialisationException("Trying to serialise something that is not a sequence of real numbers: {instance}".format(instance=str(instance))) from e
+
+def _header(count):
+	"""
+	Creates the header of a serialised array of real numbers.
+	:param count: The number of elements in the array.
+	:return: The ``bytes`` of the header.
+	"""
+	return MAGIC + count.to_bytes(HEADER_SIZE - len(MAGIC), "little")
+
+def _read_header(serialised):
+	"""
+	Checks the header of a serialised array of real numbers and reads the
+	number of elements from it.
+	:param serialised: The serialised array, or at least its header.
+	:return: The number of elements in the array.
+	:raises SerialisationException: The data doesn't start with the header of
+	an array of real numbers.
+	"""
+	if not is_serialised(serialised):
+		raise luna.plugins.api("data").SerialisationException("The serialised data doesn't start with the header of an array of real numbers.")
+	return int.from_bytes(serialised[len(MAGIC):HEADER_SIZE], "little")
\ No newline at end of file
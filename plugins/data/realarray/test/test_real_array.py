@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+#This software is distributed under the Creative Commons license (CC0) version 1.0. A copy of this license should have been distributed with this software.
+#The license can also be read online: <https://creativecommons.org/publicdomain/zero/1.0/>. If this online license differs from the license provided with this software, the license provided with this software should be applied.
+
+"""
+Tests the data type for arrays of real numbers.
+"""
+
+import array #To create arrays to serialise.
+import io #To collect the output of streams.
+import math #To test special floating point values.
+import unittest.mock #To replace the dependency on the data module.
+
+import luna.stream #To serialise to and deserialise from streams.
+import luna.tests #For parametrised tests and mock exceptions.
+import realarray.real_array #The module we're testing.
+
+def mock_api(plugin_type):
+	"""
+	Mocks calls to different APIs.
+
+	This allows the tests to remain unit tests, even if the actual units try to
+	call upon different plug-ins.
+	:param plugin_type: The type of plug-in to mock.
+	:return: A fake API for that plug-in.
+	"""
+	mock = unittest.mock.MagicMock()
+	if plugin_type == "data": #We need to specify the SerialisationException as an actual exception since the "raise" keyword is not Pythonic: It actually tests for type!
+		mock.SerialisationException = luna.tests.MockException
+	return mock
+
+class TestRealArray(luna.tests.TestCase):
+	"""
+	Tests the behaviour of various functions belonging to arrays of real
+	numbers.
+	"""
+	#Ignore multiple spaces after assignment. It's used for outlining, dumb linter.
+	#pylint: disable=C0326
+
+	@luna.tests.parametrise({
+		"empty":     {"serialised": b""},
+		"no_magic":  {"serialised": b"\x00" * 24},
+		"truncated": {"serialised": realarray.real_array.MAGIC + (2).to_bytes(8, "little") + b"\x00" * 8}, #Announces 2 numbers, but has only 1.
+		"trailing":  {"serialised": realarray.real_array.MAGIC + (0).to_bytes(8, "little") + b"\x00" * 8}, #Announces no numbers, but has 1.
+		"huge":      {"serialised": realarray.real_array.MAGIC + (2 ** 62).to_bytes(8, "little") + b"\x00" * 8} #Announces more numbers than fit in memory.
+	})
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_deserialise_error(self, serialised):
+		"""
+		Tests fail cases in which the deserialisation must give an exception.
+		:param serialised: Some serialised data that is not a complete array of
+		real numbers.
+		"""
+		with self.assertRaises(luna.tests.MockException):
+			realarray.real_array.deserialise(serialised)
+		with self.assertRaises(luna.tests.MockException):
+			realarray.real_array.deserialise_stream(luna.stream.BytesStreamReader(serialised))
+
+	def test_deserialise_zero_copy(self):
+		"""
+		Tests whether deserialising gives a view on the serialised data instead
+		of a copy.
+		"""
+		serialised = bytearray(realarray.real_array.serialise(array.array("d", [1.0, 2.0])))
+		instance = realarray.real_array.deserialise(serialised)
+		serialised[-8:] = array.array("d", [3.0]).tobytes() #Assumes a little-endian machine, like the zero-copy itself.
+		self.assertEqual(list(instance), [1.0, 3.0], "The result must share the memory of the serialised data.")
+		self.assertTrue(instance.readonly, "The result must not allow changing the serialised data through it.")
+
+	@luna.tests.parametrise({
+		"array":      {"instance": array.array("d", [1.0, -2.5])},
+		"empty":      {"instance": array.array("d")},
+		"memoryview": {"instance": memoryview(array.array("d", [3.1416]))}
+	})
+	def test_is_instance(self, instance):
+		"""
+		Tests whether arrays of real numbers are identified as such.
+		:param instance: An array of real numbers.
+		"""
+		self.assertTrue(realarray.real_array.is_instance(instance))
+
+	@luna.tests.parametrise({
+		"float":         {"instance": 3.1416},
+		"list":          {"instance": [1.0, 2.0]}, #Can be serialised, but is not detected as such.
+		"integer_array": {"instance": array.array("q", [1, 2])},
+		"bytes_view":    {"instance": memoryview(b"12345678")}
+	})
+	def test_is_not_instance(self, instance):
+		"""
+		Tests whether objects that are not arrays of real numbers are identified
+		as such.
+		:param instance: Not an array of real numbers.
+		"""
+		self.assertFalse(realarray.real_array.is_instance(instance))
+
+	@luna.tests.parametrise({
+		"empty":   {"serialised": b""},
+		"real":    {"serialised": b"3.1416"},
+		"header":  {"serialised": realarray.real_array.MAGIC[:-1]}, #Incomplete header.
+		"similar": {"serialised": b"\x89PNG\r\n\x1a\n" + b"\x00" * 8}
+	})
+	def test_is_not_serialised(self, serialised):
+		"""
+		Tests whether bytes that don't represent arrays of real numbers are
+		identified as such.
+		:param serialised: Bytes that don't represent an array of real numbers.
+		"""
+		self.assertFalse(realarray.real_array.is_serialised(serialised))
+
+	@luna.tests.parametrise({
+		"empty":    {"instance": array.array("d")},
+		"numbers":  {"instance": array.array("d", [0.0, -1.5, 1e300, 5e-324, math.inf])},
+		"list":     {"instance": [1.0, 2, -3.5]},
+		"view":     {"instance": memoryview(array.array("d", [42.0]))}
+	})
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_serialise_deserialise(self, instance):
+		"""
+		Tests whether serialising and then deserialising results in the same
+		numbers, and whether the serialised form is compact and recognised.
+		:param instance: The array of real numbers to serialise.
+		"""
+		serialised = realarray.real_array.serialise(instance)
+		self.assertTrue(realarray.real_array.is_serialised(serialised))
+		self.assertEqual(len(serialised), realarray.real_array.HEADER_SIZE + 8 * len(instance))
+		self.assertEqual(list(realarray.real_array.deserialise(serialised)), [float(number) for number in instance])
+
+	def test_serialise_error(self):
+		"""
+		Tests fail cases in which the serialisation must give an exception.
+		"""
+		for instance in ("not numbers", array.array("q", [1]), [1.0, "two"]):
+			with unittest.mock.patch("luna.plugins.api", mock_api), self.assertRaises(luna.tests.MockException):
+				realarray.real_array.serialise(instance)
+
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_serialise_deserialise_stream(self):
+		"""
+		Tests whether serialising to a stream gives the same bytes as serialising
+		at once, and whether deserialising from a stream gives back the numbers.
+		"""
+		instance = array.array("d", (number / 7 for number in range(100000))) #More than fits in the first block of room when deserialising.
+		output = io.BytesIO()
+		with luna.stream.BytesStreamWriter(output.write, high_water=1024) as writer:
+			realarray.real_array.serialise_stream(instance, writer)
+		self.assertEqual(output.getvalue(), realarray.real_array.serialise(instance))
+		self.assertEqual(realarray.real_array.deserialise_stream(luna.stream.BytesStreamReader(output.getvalue(), buffer_size=1001)), instance)
\ No newline at end of file
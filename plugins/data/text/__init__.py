@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+#This software is distributed under the Creative Commons license (CC0) version 1.0. A copy of this license should have been distributed with this software.
+#The license can also be read online: <https://creativecommons.org/publicdomain/zero/1.0/>. If this online license differs from the license provided with this software, the license provided with this software should be applied.
+
+"""
+Defines a data type for text.
+
+Text is a sequence of characters. Its serialised form may be in any of several
+character encodings, which are detected when deserialising.
+"""
+
+import text.text as text_module #The functions that implement the data type.
+
+def metadata():
+	"""
+	Provides the metadata for the Text plug-in.
+
+	This gives human-readable information on the plug-in, dependency resolution
+	information, and tells the plug-in system what this plug-in can do.
+	:return: Dictionary of metadata.
+	"""
+	return {
+		"name": "Text",
+		"description": "Defines text to be used as communication between application components, and detects its character encoding.",
+		"version": 1,
+		"dependencies": {
+			"datatype": {
+				"version_min": 1,
+				"version_max": 1
+			}
+		},
+
+		"data": {
+			"serialise": text_module.serialise,
+			"deserialise": text_module.deserialise,
+			"serialise_stream": text_module.serialise_stream,
+			"deserialise_stream": text_module.deserialise_stream,
+			"is_instance": text_module.is_instance,
+			"is_serialised": text_module.is_serialised,
+			"instance_types": [str],
+			"mime_type": "text/plain",
+			"name": "Plain text",
+			"extensions": [".txt"]
+		}
+	}
\ No newline at end of file
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+#This software is distributed under the Creative Commons license (CC0) version 1.0. A copy of this license should have been distributed with this software.
+#The license can also be read online: <https://creativecommons.org/publicdomain/zero/1.0/>. If this online license differs from the license provided with this software, the license provided with this software should be applied.
+
+"""
+Tests the text data type and the detection of character encodings.
+"""
+
+import io #To collect the output of streams.
+import os #To delete temporary files.
+import struct #To create binary data that must not be mistaken for text.
+import tempfile #To create files to convert.
+import unittest.mock #To replace the dependency on the data module.
+
+import luna.stream #To serialise to and deserialise from streams.
+import luna.tests #For parametrised tests and mock exceptions.
+import text.text as text_module #The module we're testing.
+
+def mock_api(plugin_type):
+	"""
+	Mocks calls to different APIs.
+
+	This allows the tests to remain unit tests, even if the actual units try to
+	call upon different plug-ins.
+	:param plugin_type: The type of plug-in to mock.
+	:return: A fake API for that plug-in.
+	"""
+	mock = unittest.mock.MagicMock()
+	if plugin_type == "data": #We need to specify the SerialisationException as an actual exception since the "raise" keyword is not Pythonic: It actually tests for type!
+		mock.SerialisationException = luna.tests.MockException
+	return mock
+
+class TestText(luna.tests.TestCase):
+	"""
+	Tests the behaviour of various functions belonging to text.
+	"""
+	#Ignore multiple spaces after assignment. It's used for outlining, dumb linter.
+	#pylint: disable=C0326
+
+	@luna.tests.parametrise({
+		"empty":   {"serialised": b""},
+		"binary":  {"serialised": bytes(range(256)) * 4},
+		"invalid": {"serialised": b"\xef\xbb\xbfabc\xff"} #UTF-8 BOM, but not valid UTF-8.
+	})
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_deserialise_error(self, serialised):
+		"""
+		Tests fail cases in which the deserialisation must give an exception.
+		:param serialised: Some serialised data that is not text.
+		"""
+		with self.assertRaises(luna.tests.MockException):
+			text_module.deserialise(serialised)
+
+	@luna.tests.parametrise({
+		"empty":   {"instance": ""},
+		"ascii":   {"instance": "Two words"},
+		"unicode": {"instance": "Ünïcödé 漢字 😀"},
+		"number":  {"instance": "42"} #Not to be confused with an integer.
+	})
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_serialise_deserialise(self, instance):
+		"""
+		Tests whether serialising and then deserialising results in the same
+		text, and that the serialised form is recognised as text.
+		:param instance: The text to serialise.
+		"""
+		serialised = text_module.serialise(instance)
+		self.assertTrue(text_module.is_serialised(serialised), "The serialised form must be recognised as text.")
+		self.assertEqual(text_module.deserialise(serialised), instance)
+
+	@luna.tests.parametrise({
+		"empty":   {"instance": ""},
+		"unicode": {"instance": "Ünïcödé 漢字 😀"},
+		"long":    {"instance": "Première ligne 漢字\n" * 10000} #Longer than the pieces that are encoded and decoded at once.
+	})
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_serialise_deserialise_stream(self, instance):
+		"""
+		Tests whether serialising to a stream gives the same bytes as serialising
+		at once, and whether deserialising from a stream gives back the text.
+		:param instance: The text to serialise.
+		"""
+		output = io.BytesIO()
+		with luna.stream.BytesStreamWriter(output.write, high_water=1024) as writer:
+			text_module.serialise_stream(instance, writer)
+		self.assertEqual(output.getvalue(), text_module.serialise(instance))
+		self.assertEqual(text_module.deserialise_stream(luna.stream.BytesStreamReader(output.getvalue(), buffer_size=1001)), instance)
+
+	@unittest.mock.patch("luna.plugins.api", mock_api)
+	def test_deserialise_stream_error(self):
+		"""
+		Tests deserialising a stream of which the end doesn't match the encoding
+		detected at the start.
+		"""
+		serialised = b"Hello world " * 100000 + b"\xff"
+		with self.assertRaises(luna.tests.MockException):
+			text_module.deserialise_stream(luna.stream.BytesStreamReader(serialised))
+
+	@luna.tests.parametrise({
+		"utf8_bom":    {"serialised": "Bonjour à tous".encode("utf-8-sig"), "encoding": "utf-8-sig", "confidence": 1.0},
+		"utf16_bom":   {"serialised": "Hello world".encode("utf-16"), "encoding": "utf-16", "confidence": 1.0},
+		"utf32_bom":   {"serialised": "Hello world".encode("utf-32"), "encoding": "utf-32", "confidence": 1.0},
+		"utf8":        {"serialised": "Bonjour à tous".encode("utf-8"), "encoding": "utf-8", "confidence": 0.99},
+		"ascii":       {"serialised": b"Hello world", "encoding": "utf-8", "confidence": 0.9},
+		"utf16_le":    {"serialised": "Hello world".encode("utf-16-le"), "encoding": "utf-16-le", "confidence": 0.9},
+		"utf16_be":    {"serialised": "Hello world".encode("utf-16-be"), "encoding": "utf-16-be", "confidence": 0.9},
+		"windows1252": {"serialised": "“Bonjour” à tous".encode("cp1252"), "encoding": "cp1252", "confidence": 0.6},
+		"latin1":      {"serialised": "Bonjour à tous\x81".encode("latin-1"), "encoding": "latin-1", "confidence": 0.5},
+		"binary":      {"serialised": bytes(range(256)), "encoding": None, "confidence": 0.0},
+		"nul":         {"serialised": b"Hello\x00world", "encoding": None, "confidence": 0.0},
+		"escape":      {"serialised": "Bonjour à tous\x1a".encode("cp1252"), "encoding": None, "confidence": 0.0}
+	})
+	def test_detect_encoding(self, serialised, encoding, confidence):
+		"""
+		Tests detecting the character encoding of text.
+		:param serialised: The encoded text.
+		:param encoding: The encoding that must be detected.
+		:param confidence: The minimum confidence that must be reported.
+		"""
+		detected_encoding, detected_confidence = text_module.detect_encoding(serialised)
+		self.assertEqual(detected_encoding, encoding)
+		self.assertGreaterEqual(detected_confidence, confidence)
+
+	def test_detect_encoding_samples(self):
+		"""
+		Tests whether only the samples are inspected, and whether samples may
+		start and end halfway through characters.
+		"""
+		serialised = ("漢字 " * 10000).encode("utf-8")
+		encoding, _ = text_module.detect_encoding(serialised, sample_size=1001)
+		self.assertEqual(encoding, "utf-8", "Characters cut in half at the edges of the samples must be allowed.")
+		quarter = len(serialised) // 4
+		serialised = serialised[:quarter] + b"\xff" + serialised[quarter:] #Invalid byte that is not in any sample.
+		encoding, _ = text_module.detect_encoding(serialised, sample_size=1001)
+		self.assertEqual(encoding, "utf-8", "Only the samples must be inspected.")
+
+	@luna.tests.parametrise({
+		"none":   {"instance": None},
+		"bytes":  {"instance": b"Hello world"}, #The serialised form of text, but not the text itself.
+		"number": {"instance": 42},
+		"object": {"instance": luna.tests.CallableObject()}
+	})
+	def test_is_not_instance(self, instance):
+		"""
+		Tests whether it is correctly detected that these are not text.
+		:param instance: Not text.
+		"""
+		self.assertFalse(text_module.is_instance(instance))
+
+	@luna.tests.parametrise({
+		"empty":   {"serialised": b""},
+		"integer": {"serialised": b"42"},
+		"real":    {"serialised": b"3.1416"},
+		"word":    {"serialised": b"ghostkeeper"},
+		"binary":  {"serialised": bytes(range(256))},
+		"reals":   {"serialised": struct.pack("<4d", 0.1, 12.99, -3.75, 1e-6)},
+		"nbsp":    {"serialised": b"\xa0\x85\xc3\xf1\xd2\xb4\xe7\xfe"}, #No-break space and next line, but no ASCII whitespace.
+		"control": {"serialised": b"\x1c\xe4\x1d\xf6\x1e\xfc\x1f"}
+	})
+	def test_is_not_serialised(self, serialised):
+		"""
+		Tests whether byte sequences that don't represent text, or that more
+		likely represent a different data type, are identified as such.
+		:param serialised: A sequence of bytes that isn't text.
+		"""
+		self.assertFalse(text_module.is_serialised(serialised), "This must not be identified as serialised text.")
+
+	@luna.tests.parametrise({
+		"sentence": {"serialised": b"Hello world"},
+		"utf16":    {"serialised": "Hello world".encode("utf-16-le")},
+		"lines":    {"serialised": "Première ligne\nDeuxième ligne".encode("cp1252")}
+	})
+	def test_is_serialised(self, serialised):
+		"""
+		Tests whether byte sequences that represent text are identified as such.
+		:param serialised: A sequence of bytes that represents text.
+		"""
+		self.assertTrue(text_module.is_serialised(serialised), "This must be identified as serialised text.")
+
+	def test_recode(self):
+		"""
+		Tests converting a file of which the encoding must be detected.
+		"""
+		handle, source = tempfile.mkstemp()
+		os.close(handle)
+		handle, destination = tempfile.mkstemp()
+		os.close(handle)
+		try:
+			with open(source, "wb") as source_file:
+				source_file.write(("Première ligne\nDeuxième ligne\n" * 1000).encode("utf-16"))
+			text_module.recode(source, destination, "utf-8")
+			with open(destination, "rb") as destination_file:
+				self.assertEqual(destination_file.read(), ("Première ligne\nDeuxième ligne\n" * 1000).encode("utf-8"))
+		finally:
+			os.remove(source)
+			os.remove(destination)
\ No newline at end of file
@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+#-*- coding: utf-8 -*-
+
+#This software is distributed under the Creative Commons license (CC0) version 1.0. A copy of this license should have been distributed with this software.
+#The license can also be read online: <https://creativecommons.org/publicdomain/zero/1.0/>. If this online license differs from the license provided with this software, the license provided with this software should be applied.
+
+"""
+Provides the implementation of text as a data type definition.
+
+Text is serialised as UTF-8 with a byte order mark. When deserialising, the
+character encoding of the text is detected. To keep the cost of detection
+independent of the size of the input, only a few blocks of the input are
+inspected: one at the start, one in the middle and one at the end.
+"""
+
+import codecs #For the byte order marks of the Unicode encodings.
+
+import luna.plugins #To access the data API for raising SerialisationExceptions.
+import luna.recode #To convert files to a different character encoding.
+import luna.stream #To sample local files without reading them entirely.
+
+DEFAULT_SAMPLE_SIZE = 4096
+"""
+The number of bytes in each of the blocks that are inspected to detect the
+character encoding.
+"""
+
+MINIMUM_CONFIDENCE = 0.5
+"""
+The confidence in the detected character encoding that is required to
+consider a sequence of bytes to be text.
+"""
+
+_ENCODE_CHUNK_SIZE = 64 * 1024
+"""
+The number of characters to encode at once when serialising text to a stream.
+"""
+
+_BYTE_ORDER_MARKS = (
+	(codecs.BOM_UTF32_LE, "utf-32"), #Must be checked before UTF-16, since it starts with the UTF-16 little-endian BOM.
+	(codecs.BOM_UTF32_BE, "utf-32"),
+	(codecs.BOM_UTF8, "utf-8-sig"),
+	(codecs.BOM_UTF16_LE, "utf-16"),
+	(codecs.BOM_UTF16_BE, "utf-16")
+)
+"""
+The byte order marks that indicate a character encoding, and the encodings
+that they indicate. The encodings strip the byte order mark when decoding.
+"""
+
+_CONTROLS = bytes(byte for byte in range(0x20) if byte not in b"\t\n\f\r") + b"\x7f"
+"""
+The control characters that rarely occur in text, unlike tabs and line breaks.
+"""
+
+_CP1252_UNDEFINED = b"\x81\x8d\x8f\x90\x9d"
+"""
+The bytes that have no character assigned to them in Windows-1252.
+"""
+
+_WHITESPACE = " \t\n\f\r"
+"""
+The characters that separate words in text. Other characters that Python
+considers whitespace, such as information separators and the no-break space,
+are too likely to occur in binary data by accident.
+"""
+
+_UTF8_CONTINUATION = bytes(range(0x80, 0xC0))
+"""
+The bytes that continue a character in UTF-8, rather than start one.
+"""
+
+def deserialise(serialised):
+	"""
+	Interprets a sequence of bytes as text.
+
+	The character encoding of the text is detected automatically.
+	:param serialised: A ``bytes`` object that represents text.
+	:return: The text, as a string.
+	:raises SerialisationException: The bytes don't represent text in any
+	recognised encoding.
+	"""
+	encoding, _ = detect_encoding(serialised)
+	if encoding is None:
+		raise luna.plugins.api("data").SerialisationException("The serialised sequence doesn't look like text in any known character encoding.")
+	try:
+		return bytes(serialised).decode(encoding)
+	except UnicodeDecodeError as e:
+		raise luna.plugins.api("data").SerialisationException("The serialised sequence is not proper {encoding}, though it looked like it.".format(encoding=encoding)) from e
+
+def deserialise_stream(reader):
+	"""
+	Interprets a stream of bytes as text.
+
+	The character encoding is detected from the start of the stream, after
+	which the stream is decoded piece by piece. Unlike with ``deserialise``,
+	the middle and the end of the data can't be inspected beforehand. If those
+	turn out not to match the detected encoding, the deserialisation fails.
+	:param reader: A ``BytesStreamReader`` to read the serialised text from.
+	:return: The text, as a string.
+	:raises SerialisationException: The bytes don't represent text in any
+	recognised encoding.
+	"""
+	reader = luna.stream.PeekableStream(reader)
+	encoding, _ = detect_encoding(reader.peek())
+	if encoding is None:
+		raise luna.plugins.api("data").SerialisationException("The serialised stream doesn't look like text in any known character encoding.")
+	decoder = codecs.getincrementaldecoder(encoding)()
+	pieces = []
+	try:
+		for chunk in reader.iter_chunks():
+			pieces.append(decoder.decode(chunk))
+		pieces.append(decoder.decode(b"", final=True))
+	except UnicodeDecodeError as e:
+		raise luna.plugins.api("data").SerialisationException("The serialised stream is not proper {encoding}, though it looked like it.".format(encoding=encoding)) from e
+	return "".join(pieces)
+
+def detect_encoding(serialised, sample_size=DEFAULT_SAMPLE_SIZE):
+	"""
+	Detects the character encoding of text.
+
+	A byte order mark at the start determines the encoding with certainty.
+	Otherwise, samples at the start, in the middle and at the end are checked
+	for being valid UTF-8, for looking like UTF-16 text without byte order
+	mark, and finally for looking like text in a single-byte encoding. Only the
+	samples are inspected, so the cost doesn't depend on the size of the input.
+	:param serialised: The encoded text. This may be any object that supports
+	``len`` and slicing, such as ``bytes`` or a ``MappedStreamReader``.
+	:param sample_size: The number of bytes in every sample.
+	:return: A tuple of the name of the detected encoding and the confidence in
+	that detection, between 0 and 1. If the data doesn't look like text, the
+	encoding is ``None`` and the confidence is 0.
+	"""
+	head = bytes(serialised[0:4])
+	for byte_order_mark, encoding in _BYTE_ORDER_MARKS:
+		if head.startswith(byte_order_mark):
+			return encoding, 1.0
+	samples = _samples(serialised, sample_size)
+	if not any(samples):
+		return None, 0.0
+
+	has_controls = _has_controls(samples)
+	if not has_controls and all(_is_utf8(sample, is_first=index == 0) for index, sample in enumerate(samples)):
+		if not all(sample.isascii() for sample in samples):
+			return "utf-8", 0.99 #Random high bytes are very unlikely to form valid UTF-8.
+		return "utf-8", 0.9 #Plain ASCII. Other ASCII-compatible encodings would decode it the same way.
+
+	utf16_encoding, utf16_confidence = _detect_utf16(samples)
+	if utf16_encoding is not None:
+		return utf16_encoding, utf16_confidence
+
+	if has_controls: #Any byte sequence is valid in the single-byte encodings, so control characters are the only sign of binary data.
+		return None, 0.0
+	if any(len(sample.translate(None, _CP1252_UNDEFINED)) < len(sample) for sample in samples):
+		return "latin-1", 0.6
+	return "cp1252", 0.6
+
+def is_instance(instance):
+	"""
+	Detects whether some object is text.
+	:param instance: The instance of which to check whether it is text.
+	:return: ``True`` if the object is a string, or ``False`` if it isn't.
+	"""
+	return type(instance) == str
+
+def is_serialised(serialised):
+	"""
+	Detects whether a ``bytes`` object represents text.
+
+	Text with a byte order mark is always recognised. Without byte order mark,
+	the samples of the text must contain ASCII whitespace. A single word without
+	whitespace is more likely to be the serialised form of a different data
+	type, such as a number.
+	:param serialised: A ``bytes`` instance which must be identified as being
+	text or not.
+	:return: ``True`` if the ``bytes`` likely represent text, or ``False`` if
+	they do not.
+	"""
+	encoding, confidence = detect_encoding(serialised)
+	if confidence == 1.0: #Byte order mark.
+		return True
+	if encoding is None or confidence < MINIMUM_CONFIDENCE:
+		return False
+	for index, sample in enumerate(_samples(serialised, DEFAULT_SAMPLE_SIZE)):
+		if index > 0 and encoding == "utf-8": #Samples may start halfway through a character.
+			sample = sample.lstrip(_UTF8_CONTINUATION)
+		if any(character in _WHITESPACE for character in sample.decode(encoding, errors="ignore")):
+			return True
+	return False
+
+def recode(source, destination, target_encoding="utf-8"):
+	"""
+	Converts a local text file to a different character encoding.
+
+	The encoding of the source file is detected from samples of the file, after
+	which the file is converted in parallel chunks.
+	:param source: The path or file URI of the text file to convert.
+	:param destination: The path or URI to write the converted text to.
+	:param target_encoding: The character encoding to convert to.
+	:raises SerialisationException: The source file doesn't look like text.
+	"""
+	with luna.stream.MappedStreamReader(source) as reader:
+		encoding, _ = detect_encoding(reader)
+	if encoding is None:
+		raise luna.plugins.api("data").SerialisationException("The file {source} doesn't look like text in any known character encoding.".format(source=source))
+	luna.recode.recode(source, destination, encoding, target_encoding)
+
+def serialise(instance):
+	"""
+	Serialises text to bytes.
+
+	The text is encoded as UTF-8 with a byte order mark, so that it is
+	recognised as text regardless of its contents.
+	:param instance: The string to serialise.
+	:return: The ``bytes`` representing that text.
+	"""
+	return instance.encode("utf-8-sig")
+
+def serialise_stream(instance, writer):
+	"""
+	Serialises text to a stream.
+
+	The text is encoded in pieces, so that the complete serialised form is
+	never in memory at once. The result is the same as with ``serialise``.
+	:param instance: The string to serialise.
+	:param writer: A ``BytesStreamWriter`` to write the serialised text to.
+	"""
+	writer.write(codecs.BOM_UTF8)
+	for start in range(0, len(instance), _ENCODE_CHUNK_SIZE):
+		writer.write(instance[start:start + _ENCODE_CHUNK_SIZE].encode("utf-8"))
+
+def _detect_utf16(samples):
+	"""
+	Detects whether samples look like UTF-16 without byte order mark.
+
+	Text in UTF-16 mostly consists of characters with a zero high byte, so one
+	of every two bytes is zero.
+	:param samples: The samples of the data to inspect.
+	:return: A tuple of the name of the detected encoding and the confidence in
+	that detection. If the samples don't look like UTF-16, the encoding is
+	``None``.
+	"""
+	units = 0
+	zero_even = 0 #Zero bytes at even positions indicate big-endian.
+	zero_odd = 0 #Zero bytes at odd positions indicate little-endian.
+	for sample in samples:
+		units += len(sample) // 2
+		zero_even += sample[0:len(sample) - 1:2].count(0)
+		zero_odd += sample[1::2].count(0)
+	if units == 0:
+		return None, 0.0
+	if zero_odd > zero_even * 4 and zero_odd > units / 2:
+		return "utf-16-le", 0.9 * zero_odd / units
+	if zero_even > zero_odd * 4 and zero_even > units / 2:
+		return "utf-16-be", 0.9 * zero_even / units
+	return None, 0.0
+
+def _is_utf8(sample, is_first):
+	"""
+	Checks whether a sample is valid UTF-8.
+
+	The sample may end halfway through a character. Samples that are not at
+	the start of the data may also start halfway through a character.
+	:param sample: The ``bytes`` to check.
+	:param is_first: Whether the sample is at the start of the data.
+	:return: ``True`` if the sample is valid UTF-8, or ``False`` if it isn't.
+	"""
+	if not is_first:
+		sample = sample.lstrip(_UTF8_CONTINUATION)
+	try:
+		codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+	except UnicodeDecodeError:
+		return False
+	return True
+
+def _has_controls(samples):
+	"""
+	Checks whether any of the samples contain control characters other than
+	tabs and line breaks.
+
+	Those control characters, including NUL bytes, practically never occur in
+	text in an ASCII-compatible encoding, but they are common in binary data.
+	:param samples: The samples of the data to inspect.
+	:return: ``True`` if there is a control character in any of the samples, or
+	``False`` if there isn't.
+	"""
+	return any(len(sample.translate(None, _CONTROLS)) < len(sample) for sample in samples)
+
+def _samples(serialised, sample_size):
+	"""
+	Takes blocks from the start, the middle and the end of the data.
+
+	Small data is returned as a single sample. The samples start at even
+	positions, so that UTF-16 code units are not split.
+	:param serialised: The data to take samples from.
+	:param sample_size: The number of bytes in every sample.
+	:return: A list of ``bytes`` samples.
+	"""
+	length = len(serialised)
+	if length <= sample_size * 3:
+		return [bytes(serialised[0:length])]
+	middle = (length // 2 - sample_size // 2) & ~1
+	tail = (length - sample_size) & ~1
+	return [bytes(serialised[0:sample_size]), bytes(serialised[middle:middle + sample_size]), bytes(serialised[tail:length])]
\ No newline at end of file